@@ -2,19 +2,25 @@
 Flask Application Factory
 Initializes the Flask app with all configurations, blueprints, and extensions
 """
-from flask import Flask
 from dotenv import load_dotenv
-from flask_cors import CORS            # <-- ADD THIS
-from app.config import Config
 
-# Load environment variables
+# Load environment variables (before Config reads them)
 load_dotenv()
 
+from flask import Flask
+from flask_cors import CORS            # <-- ADD THIS
+from app.config import Config
+
 def create_app(config_class=Config):
     """Create and configure the Flask application"""
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Templates compiled ahead of time by python -m app.compile_templates
+    if app.config['PRECOMPILED_TEMPLATES']:
+        from app.compile_templates import use_compiled_templates
+        use_compiled_templates(app)
+
     # ----------------------------------
     # Enable CORS for frontend access
     # (Vercel frontend -> Cloudflared -> Flask)
@@ -28,6 +34,17 @@ def create_app(config_class=Config):
     init_db(app)
     app.teardown_appcontext(close_db)
 
+    # Return stock held by pickup requests nobody approved in time
+    from app.models.reservation_model import start_expirer
+    start_expirer(app)
+
+    # Verified-client index for the volunteer sign-in fast path
+    from app.utils.client_index import start_client_index
+    start_client_index(app)
+
+    from app.utils.query_stats import init_query_stats
+    init_query_stats(app)
+
     # -----------------------------
     # Blueprints (Routes)
     # -----------------------------
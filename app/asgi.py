@@ -0,0 +1,76 @@
+"""
+ASGI Serving Mode
+Serve the Flask app under an ASGI server (e.g. uvicorn) with the hot
+routes swapped for async versions that use the aiomysql pool
+(app/async_database.py):
+
+    uvicorn api.asgi:app --workers 4
+
+Sync views run on a pool of ASGI_THREADS threads, so a slow report only
+ties up its own thread. Async views run their queries on the server's
+event loop. Needs the optional asgiref, aiomysql and uvicorn packages.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from app import create_app
+from app.config import Config
+
+# endpoint -> async view served in its place
+ASYNC_VIEWS = {
+    'auth.login': 'app.routes.auth_routes:login_async',
+    'volunteer.client_signin': 'app.routes.volunteer_routes:client_signin_async',
+    'volunteer.verify_qr': 'app.routes.volunteer_routes:verify_qr_async',
+}
+
+
+def install_async_views(app):
+    """Point the ASYNC_VIEWS endpoints at their async versions"""
+    for endpoint, target in ASYNC_VIEWS.items():
+        module, _, name = target.partition(':')
+        app.view_functions[endpoint] = getattr(import_module(module), name)
+
+
+class FlaskASGI(WsgiToAsgi):
+    """
+    WsgiToAsgi that runs requests on its own thread pool. The stock adapter
+    runs every request on one shared thread. Async views called from these
+    threads are scheduled on the server's event loop, where the async pools
+    live.
+    """
+
+    def __init__(self, wsgi_application, threads):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='asgi-worker')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        instance = WsgiToAsgiInstance(self.wsgi_application)
+        instance.run_wsgi_app = sync_to_async(
+            _RUN_WSGI_APP.__get__(instance), thread_sensitive=False, executor=self.executor)
+        await instance(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+# The plain function behind WsgiToAsgiInstance.run_wsgi_app's @sync_to_async
+_RUN_WSGI_APP = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+
+
+def create_asgi_app(config_class=Config):
+    """Flask app with the async views installed, wrapped for ASGI"""
+    app = create_app(config_class)
+    install_async_views(app)
+    return FlaskASGI(app, threads=app.config['ASGI_THREADS'])
@@ -0,0 +1,141 @@
+"""
+Async Database Access
+aiomysql counterparts of query_db and transaction() for the async views
+served under ASGI (see app/asgi.py). Each event loop gets its own pool of
+up to ASYNC_DB_POOL_SIZE connections, separate from the sync pool.
+
+Statements always run on the primary. Writes notify the same table
+listeners and sticky-primary session flag as the sync path.
+"""
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+from flask import current_app
+
+from app.database import PoolTimeout, _discard_writes, _mark_write, _note_write
+from app.utils.query_stats import record_query
+
+
+async def _create_pool(config):
+    import aiomysql       # only needed when the async views are installed
+
+    return await aiomysql.create_pool(
+        host=config["MYSQL_HOST"],
+        port=config["MYSQL_PORT"],
+        user=config["MYSQL_USER"],
+        password=config["MYSQL_PASSWORD"],
+        db=config["MYSQL_DATABASE"],
+        charset="utf8mb4",
+        cursorclass=aiomysql.DictCursor,
+        autocommit=True,
+        minsize=0,
+        maxsize=config["ASYNC_DB_POOL_SIZE"],
+        pool_recycle=config["DB_POOL_MAX_LIFETIME"],
+        init_command=f"SET time_zone = '{config['DB_TIME_ZONE']}'" if config.get("DB_TIME_ZONE") else None,
+    )
+
+
+async def get_async_pool():
+    """
+    Returns the aiomysql pool for the running event loop, creating it on
+    first use. Pools are tied to their loop, so each loop has its own.
+    """
+    import asyncio        # not imported at startup; only the async views need it
+
+    loop = asyncio.get_running_loop()
+    pools = current_app.extensions.setdefault("async_db_pools", weakref.WeakKeyDictionary())
+    if loop not in pools:
+        # Store the task before awaiting so concurrent first callers share it
+        pools[loop] = loop.create_task(_create_pool(current_app.config))
+    try:
+        return await pools[loop]
+    except Exception:
+        pools.pop(loop, None)
+        raise
+
+
+async def _acquire(pool):
+    import asyncio
+
+    try:
+        return await asyncio.wait_for(pool.acquire(), current_app.config["DB_POOL_TIMEOUT"])
+    except asyncio.TimeoutError:
+        raise PoolTimeout(
+            2013, f"Timed out waiting for an async database connection (pool size {pool.maxsize})"
+        ) from None
+
+
+async def query_db(query, args=(), one=False, commit=False):
+    """
+    Async query_db. Connections run in autocommit mode, so commit=True
+    statements are committed as they run; use transaction() to group them.
+    """
+    pool = await get_async_pool()
+    conn = await _acquire(pool)
+    started = time.perf_counter()
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, args)
+            if commit:
+                _note_write(query)
+                _mark_write()
+                return cursor.lastrowid
+            rows = await cursor.fetchall()
+            return (rows[0] if rows else None) if one else rows
+
+    except Exception as exc:
+        if commit:
+            _discard_writes()
+        print("MySQL error:", exc)
+        raise
+
+    finally:
+        pool.release(conn)
+        record_query(query, time.perf_counter() - started)
+
+
+class AsyncTransaction:
+    """Handle yielded by transaction(); statements run on the block's connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lastrowid = None
+
+    async def execute(self, query, args=()):
+        """Run one statement; returns the affected row count."""
+        started = time.perf_counter()
+        try:
+            async with self.conn.cursor() as cursor:
+                await cursor.execute(query, args)
+                _note_write(query)
+                self.lastrowid = cursor.lastrowid
+                return cursor.rowcount
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def transaction():
+    """
+    Async unit of work with a single COMMIT:
+
+        async with transaction() as tx:
+            await tx.execute('INSERT ...', (...))
+
+    Any exception rolls the block back. Blocks do not nest.
+    """
+    pool = await get_async_pool()
+    conn = await _acquire(pool)
+    try:
+        await conn.begin()
+        try:
+            yield AsyncTransaction(conn)
+        except BaseException:
+            await conn.rollback()
+            _discard_writes()
+            raise
+        await conn.commit()
+        _mark_write()
+    finally:
+        pool.release(conn)
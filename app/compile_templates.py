@@ -0,0 +1,91 @@
+"""
+Precompile the Jinja templates into Python modules under
+app/templates_compiled, so a cold start renders its first page without
+parsing or compiling any template. Run it as part of the deploy build:
+
+    python -m app.compile_templates
+
+create_app loads them when PRECOMPILED_TEMPLATES is on (the FAST_START
+default) and they were compiled from the current template sources;
+otherwise templates are compiled on first use as usual.
+"""
+import hashlib
+import os
+import shutil
+import sys
+
+COMPILED_DIR = os.path.join(os.path.dirname(__file__), 'templates_compiled')
+SOURCES_FILE = 'SOURCES'
+
+
+def _is_template(name):
+    return name.endswith('.html')
+
+
+def templates_fingerprint(template_folder):
+    """Hash of every template's path and contents"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(template_folder):
+        dirs.sort()
+        for name in sorted(files):
+            if _is_template(name):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, template_folder).replace(os.sep, '/').encode() + b'\0')
+                with open(path, 'rb') as source:
+                    digest.update(source.read())
+    return digest.hexdigest()
+
+
+def compile_templates(app, target=COMPILED_DIR):
+    """Compile every template of ``app`` into ``target``; returns how many"""
+    compiled = []
+    shutil.rmtree(target, ignore_errors=True)
+    app.jinja_env.compile_templates(target, filter_func=_is_template, zip=None,
+                                    ignore_errors=False, log_function=compiled.append)
+    with open(os.path.join(target, SOURCES_FILE), 'w') as sources:
+        sources.write(templates_fingerprint(os.path.join(app.root_path, app.template_folder)))
+    return sum(1 for line in compiled if line.startswith('Compiled'))
+
+
+def use_compiled_templates(app, target=COMPILED_DIR):
+    """
+    Serve templates from ``target`` if it matches the current sources.
+    Must run before the app's Jinja environment is first used.
+    """
+    from jinja2 import ModuleLoader
+
+    try:
+        with open(os.path.join(target, SOURCES_FILE)) as sources:
+            fingerprint = sources.read().strip()
+    except OSError:
+        return False
+    if fingerprint != templates_fingerprint(os.path.join(app.root_path, app.template_folder)):
+        print("Precompiled templates are stale; compiling on first use "
+              "(run python -m app.compile_templates)")
+        return False
+    app.jinja_options = dict(app.jinja_options, loader=ModuleLoader(target))
+    return True
+
+
+def main(argv):
+    if argv:
+        print(__doc__)
+        return 1
+
+    from app import create_app
+    from app.config import Config
+
+    class CompileConfig(Config):
+        """Only the Jinja environment is needed: no DB probe or background work"""
+        DB_CONNECT_ON_START = False
+        CLIENT_INDEX_ENABLED = False
+        RESERVATION_SWEEP_SECONDS = 0
+        PRECOMPILED_TEMPLATES = False
+
+    count = compile_templates(create_app(CompileConfig))
+    print(f"Compiled {count} templates into {COMPILED_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -17,6 +17,12 @@ class Config:
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+
+    # Serverless fast start (default on Vercel): skip the startup DB probe and
+    # background threads, and load precompiled templates when they are current
+    FAST_START = (os.environ.get('FAST_START') or ('1' if os.environ.get('VERCEL') else '0')) == '1'
+    DB_CONNECT_ON_START = (os.environ.get('DB_CONNECT_ON_START') or ('0' if FAST_START else '1')) == '1'
+    PRECOMPILED_TEMPLATES = (os.environ.get('PRECOMPILED_TEMPLATES') or ('1' if FAST_START else '0')) == '1'
     
     # MySQL Database Configuration
     MYSQL_HOST = os.environ.get('MYSQL_HOST') or 'localhost'
@@ -24,7 +30,69 @@ class Config:
     MYSQL_USER = os.environ.get('MYSQL_USER') or 'foodlink_user'
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD') or 'your_password'
     MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE') or 'foodlink_db'
-    
+
+    # Connection pool (per worker process)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)                    # max open connections
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 5)            # seconds to wait for a free connection
+    DB_POOL_IDLE_TIMEOUT = int(os.environ.get('DB_POOL_IDLE_TIMEOUT') or 300)  # close connections idle this long
+    DB_POOL_MAX_LIFETIME = int(os.environ.get('DB_POOL_MAX_LIFETIME') or 3600) # recycle connections older than this
+    DB_POOL_PING_AFTER = int(os.environ.get('DB_POOL_PING_AFTER') or 10)       # ping on checkout if idle this long
+
+    # Production server (python run.py --production, see app/serving.py)
+    WEB_BIND = os.environ.get('WEB_BIND') or f"0.0.0.0:{os.environ.get('PORT') or 5000}"
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS') or 0)                  # 0 = 2 x CPUs + 1
+    WEB_THREADS = int(os.environ.get('WEB_THREADS') or 4)                  # per worker, capped at DB_POOL_SIZE
+    WEB_MAX_REQUESTS = int(os.environ.get('WEB_MAX_REQUESTS') or 1000)     # recycle a worker after this many
+    WEB_MAX_REQUESTS_JITTER = int(os.environ.get('WEB_MAX_REQUESTS_JITTER') or 100)  # so workers do not recycle together
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT') or 30)                 # kill a worker stuck this long
+    WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT') or 30)  # in-flight grace on reload/stop
+    WEB_WARMUP_TIMEOUT = int(os.environ.get('WEB_WARMUP_TIMEOUT') or 30)   # wait for the client index at boot
+    # ASGI mode (app/asgi.py): aiomysql pool for the async views, threads for the sync ones
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE') or 20)
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS') or 32)
+
+    # Read replicas: comma-separated host[:port] list, same credentials/database as the primary
+    MYSQL_REPLICAS = [h.strip() for h in (os.environ.get('MYSQL_REPLICAS') or '').split(',') if h.strip()]
+    REPLICA_RETRY_AFTER = int(os.environ.get('REPLICA_RETRY_AFTER') or 30)        # skip a failed replica this long
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 5)   # session reads primary after a write
+
+    # Query instrumentation (Server-Timing header, slow-query log, /admin/query-stats)
+    QUERY_STATS_ENABLED = (os.environ.get('QUERY_STATS_ENABLED') or '1') == '1'
+    QUERY_STATS_WINDOW = 1000  # recent samples kept per route/statement for percentiles
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 200)
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')  # file path; unset logs to stderr
+
+    # Time zone for "today" and date-range filters (IANA name, e.g. America/Toronto).
+    # Unset uses the server's local time. DB_TIME_ZONE sets the MySQL session
+    # time_zone (e.g. '-05:00') so TIMESTAMP columns read back in the same zone.
+    APP_TIMEZONE = os.environ.get('APP_TIMEZONE')
+    DB_TIME_ZONE = os.environ.get('DB_TIME_ZONE')
+
+    # List views: rows per page, and the most a ?per_page= request may ask for
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE') or 25)
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE') or 100)
+
+    # Admin dashboard statistics snapshot lifetime (seconds)
+    DASHBOARD_STATS_TTL = int(os.environ.get('DASHBOARD_STATS_TTL') or 30)
+
+    # Signed-in client lookups (get_client_by_user_id) cached per worker (seconds)
+    CLIENT_CACHE_TTL = int(os.environ.get('CLIENT_CACHE_TTL') or 60)
+    # Verified clients by client_number for volunteer sign-in, loaded at startup
+    CLIENT_INDEX_ENABLED = (os.environ.get('CLIENT_INDEX_ENABLED') or ('0' if FAST_START else '1')) == '1'
+    CLIENT_INDEX_POLL_SECONDS = int(os.environ.get('CLIENT_INDEX_POLL_SECONDS') or 5)  # catch up with other workers
+
+    # Also keep rendered QR code PNGs in app/static/qr_cache (survives restarts)
+    QR_DISK_CACHE = os.environ.get('QR_DISK_CACHE') == '1'
+
+    # Client QR codes carry an HMAC-signed payload that scanners verify
+    # without the database; CLIENT:FL-001 codes are still accepted
+    QR_SIGNED_PAYLOADS = (os.environ.get('QR_SIGNED_PAYLOADS') or '1') == '1'
+    QR_SIGNING_KEY = os.environ.get('QR_SIGNING_KEY')  # unset = SECRET_KEY
+    QR_TOKEN_TTL_DAYS = int(os.environ.get('QR_TOKEN_TTL_DAYS') or 365)
+
+    # Worker processes for bulk QR card exports (unset = one per CPU)
+    QR_EXPORT_PROCESSES = int(os.environ.get('QR_EXPORT_PROCESSES') or 0) or None
+
     # Upload configuration (for income proof documents)
     UPLOAD_FOLDER = 'app/static/uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -36,5 +104,25 @@ class Config:
     
     # Client number format (e.g., LOC-001, LOC-002)
     CLIENT_NUMBER_PREFIX = 'FL'
+    # Numbers each worker reserves per trip to client_number_sequences;
+    # 1 keeps numbering gap-free, larger blocks skip unused numbers on restart
+    CLIENT_NUMBER_BLOCK_SIZE = int(os.environ.get('CLIENT_NUMBER_BLOCK_SIZE') or 1)
+
+    # Pickup requests hold their stock until approved, rejected or expired
+    RESERVATION_TTL_SECONDS = int(os.environ.get('RESERVATION_TTL_SECONDS') or 86400)
+    RESERVATION_SWEEP_SECONDS = int(os.environ.get('RESERVATION_SWEEP_SECONDS') or (0 if FAST_START else 60))  # 0 = no background expirer
+
+    # Admin reports over more than REPORT_INLINE_MAX_DAYS are computed by
+    # background jobs; results are cached in report_jobs until the data changes
+    REPORT_INLINE_MAX_DAYS = int(os.environ.get('REPORT_INLINE_MAX_DAYS') or 31)
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS') or (0 if FAST_START else 2))  # 0 = run in the request
+    REPORT_JOB_TIMEOUT = int(os.environ.get('REPORT_JOB_TIMEOUT') or 600)  # then a running job counts as abandoned
+
+    # Most pickups or clients one bulk approve/reject request may select
+    BULK_ACTION_MAX = int(os.environ.get('BULK_ACTION_MAX') or 500)
+    # Most offline sign-ins a volunteer device may sync per request
+    SIGNIN_SYNC_MAX = int(os.environ.get('SIGNIN_SYNC_MAX') or 200)
+    # Most QR payloads one batch verify request may send
+    QR_VERIFY_BATCH_MAX = int(os.environ.get('QR_VERIFY_BATCH_MAX') or 200)
 
 
@@ -2,32 +2,311 @@
 Database Connection Manager
 MySQL implementation for local and hosted environments
 """
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import pymysql
-from flask import current_app, g
+from flask import current_app, g, has_request_context, session
 
+from app.utils.query_stats import record_query
 
-def init_db(app):
+
+class PoolTimeout(pymysql.err.OperationalError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
     """
-    Validate MySQL connectivity at startup.
+    Thread-safe, bounded pool of MySQL connections.
+
+    At most ``size`` connections are open at once (idle plus checked out).
+    Idle connections are pinged on checkout when they have not been used
+    recently, closed after ``idle_timeout`` seconds of inactivity, and
+    retired once they are older than ``max_lifetime`` seconds.
     """
-    try:
-        conn = pymysql.connect(
-            host=app.config["MYSQL_HOST"],
-            port=app.config["MYSQL_PORT"],
-            user=app.config["MYSQL_USER"],
-            password=app.config["MYSQL_PASSWORD"],
-            database=app.config["MYSQL_DATABASE"],
+
+    def __init__(self, connect, size=10, timeout=5.0, idle_timeout=300,
+                 max_lifetime=3600, ping_after=10):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()      # (conn, created_at, last_used), newest on the right
+        self._in_use = {}         # id(conn) -> created_at
+        self._open = 0
+
+    def acquire(self):
+        """
+        Check a connection out of the pool, opening a new one if needed.
+        Blocks for up to ``timeout`` seconds when the pool is exhausted.
+        """
+        deadline = time.monotonic() + self.timeout
+        conn, created_at, last_used = None, None, None
+
+        with self._cond:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    # Reserve a slot; the connection is opened outside the lock
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        2013, f"Timed out waiting for a database connection (pool size {self.size})"
+                    )
+                self._cond.wait(remaining)
+
+        now = time.monotonic()
+        if conn is not None and not self._is_healthy(conn, created_at, last_used, now):
+            self._close_quietly(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            created_at = now
+
+        with self._cond:
+            self._in_use[id(conn)] = created_at
+        return conn
+
+    def release(self, conn, discard=False):
+        """
+        Return a connection to the pool. Any open transaction is rolled back
+        so the next borrower starts from a clean snapshot.
+        """
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+        if created_at is None:
+            # Not ours (or already released)
+            return
+
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        if discard or now - created_at >= self.max_lifetime:
+            self._close_quietly(conn)
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, now))
+            self._cond.notify()
+
+    def close(self):
+        """Close every idle connection. Checked-out connections close on release."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Snapshot of pool occupancy."""
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+            }
+
+    def _evict_idle(self):
+        """Drop idle connections past their idle timeout or lifetime. Caller holds the lock."""
+        now = time.monotonic()
+        kept = deque()
+        for conn, created_at, last_used in self._idle:
+            if now - last_used >= self.idle_timeout or now - created_at >= self.max_lifetime:
+                self._open -= 1
+                self._close_quietly(conn)
+            else:
+                kept.append((conn, created_at, last_used))
+        self._idle = kept
+
+    def _is_healthy(self, conn, created_at, last_used, now):
+        if now - created_at >= self.max_lifetime:
+            return False
+        if now - last_used < self.ping_after:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class ReplicaSet:
+    """
+    Round-robin over read-replica pools. A replica that fails to connect or
+    drops a connection is skipped for ``retry_after`` seconds.
+    """
+
+    def __init__(self, pools, retry_after=30):
+        self.pools = pools            # [(name, ConnectionPool)]
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down_until = [0.0] * len(pools)
+
+    def acquire(self):
+        """
+        Returns (index, connection) from the next healthy replica, or
+        (None, None) when every replica is down.
+        """
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.pools)
+
+        now = time.monotonic()
+        for offset in range(len(self.pools)):
+            index = (start + offset) % len(self.pools)
+            if self._down_until[index] > now:
+                continue
+            try:
+                return index, self.pools[index][1].acquire()
+            except Exception as exc:
+                print(f"Read replica {self.pools[index][0]} unavailable:", exc)
+                self.mark_down(index)
+        return None, None
+
+    def release(self, index, conn, discard=False):
+        self.pools[index][1].release(conn, discard=discard)
+
+    def mark_down(self, index):
+        self._down_until[index] = time.monotonic() + self.retry_after
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            name: dict(pool.stats(), healthy=self._down_until[index] <= now)
+            for index, (name, pool) in enumerate(self.pools)
+        }
+
+
+_READ_ONLY_STATEMENT = re.compile(r"^\s*\(?\s*(SELECT|SHOW|EXPLAIN|DESCRIBE|DESC|WITH)\b", re.IGNORECASE)
+_LOCKING_READ = re.compile(r"\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", re.IGNORECASE)
+
+# Connection-level failures that justify retrying a read on the primary
+_REPLICA_FAILURE_CODES = {2003, 2006, 2013}
+
+_WRITTEN_TABLE = re.compile(
+    r"^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+IGNORE)?|DELETE\s+FROM)\s+`?(\w+)`?",
+    re.IGNORECASE,
+)
+
+# table name -> callbacks fired after a committed write to that table
+_write_listeners = {}
+
+
+def _connect_factory(config, host=None, port=None):
+    """Build a zero-argument callable that opens a connection from app config."""
+    def connect():
+        return pymysql.connect(
+            host=host or config["MYSQL_HOST"],
+            port=port or config["MYSQL_PORT"],
+            user=config["MYSQL_USER"],
+            password=config["MYSQL_PASSWORD"],
+            database=config["MYSQL_DATABASE"],
             charset="utf8mb4",
             cursorclass=pymysql.cursors.DictCursor,
+            autocommit=False,
+            init_command=f"SET time_zone = '{config['DB_TIME_ZONE']}'" if config.get("DB_TIME_ZONE") else None,
         )
-        conn.close()
-        print(
-            f"Connected to MySQL at {app.config['MYSQL_HOST']}:{app.config['MYSQL_PORT']} "
-            f"(DB: {app.config['MYSQL_DATABASE']})"
-        )
-    except Exception as exc:
-        print("Failed to connect to MySQL:", exc)
-        raise
+    return connect
+
+
+def _make_pool(config, host=None, port=None):
+    return ConnectionPool(
+        _connect_factory(config, host, port),
+        size=config["DB_POOL_SIZE"],
+        timeout=config["DB_POOL_TIMEOUT"],
+        idle_timeout=config["DB_POOL_IDLE_TIMEOUT"],
+        max_lifetime=config["DB_POOL_MAX_LIFETIME"],
+        ping_after=config["DB_POOL_PING_AFTER"],
+    )
+
+
+def init_db(app):
+    """
+    Create the connection pools and validate MySQL connectivity at startup.
+    With DB_CONNECT_ON_START off the probe is skipped and connections open
+    on first use (a bad configuration then surfaces on the first query).
+    """
+    pool = _make_pool(app.config)
+    app.extensions["db_pool"] = pool
+    probe = app.config.get("DB_CONNECT_ON_START", True)
+
+    if probe:
+        try:
+            # Opening the first connection also warms the pool
+            pool.release(pool.acquire())
+            print(
+                f"Connected to MySQL at {app.config['MYSQL_HOST']}:{app.config['MYSQL_PORT']} "
+                f"(DB: {app.config['MYSQL_DATABASE']}, pool size {pool.size})"
+            )
+        except Exception as exc:
+            print("Failed to connect to MySQL:", exc)
+            raise
+
+    replicas = []
+    for entry in app.config["MYSQL_REPLICAS"]:
+        host, _, port = entry.partition(":")
+        replicas.append((entry, _make_pool(app.config, host, int(port) if port else None)))
+    if replicas:
+        replica_set = ReplicaSet(replicas, retry_after=app.config["REPLICA_RETRY_AFTER"])
+        app.extensions["db_replicas"] = replica_set
+        # A replica that is down at startup is not fatal; reads fail over to the primary
+        for index, (name, replica_pool) in enumerate(replicas if probe else ()):
+            try:
+                replica_pool.release(replica_pool.acquire())
+                print(f"Connected to read replica at {name}")
+            except Exception as exc:
+                print(f"Read replica {name} unavailable:", exc)
+                replica_set.mark_down(index)
+
+def get_pool():
+    """
+    Returns the connection pool for the current app.
+    """
+    return current_app.extensions["db_pool"]
+
+
+def get_replicas():
+    """
+    Returns the app's ReplicaSet, or None when no replicas are configured.
+    """
+    return current_app.extensions.get("db_replicas")
 
 
 def get_db():
@@ -35,49 +314,294 @@ def get_db():
     Returns a MySQL connection for the current request context.
     """
     if "db" not in g:
-        g.db = pymysql.connect(
-            host=current_app.config["MYSQL_HOST"],
-            port=current_app.config["MYSQL_PORT"],
-            user=current_app.config["MYSQL_USER"],
-            password=current_app.config["MYSQL_PASSWORD"],
-            database=current_app.config["MYSQL_DATABASE"],
-            charset="utf8mb4",
-            cursorclass=pymysql.cursors.DictCursor,
-            autocommit=False,
-        )
+        g.db = get_pool().acquire()
     return g.db
 
 
+def get_read_db():
+    """
+    Returns a connection for read-only statements: a replica connection when
+    one is configured and healthy, otherwise the primary connection.
+    """
+    if "read_db" not in g:
+        replicas = get_replicas()
+        index, conn = replicas.acquire() if replicas else (None, None)
+        # None is cached too, so a request does not retry dead replicas per query
+        g.read_db = (index, conn) if conn is not None else None
+    if g.read_db is None:
+        return get_db()
+    return g.read_db[1]
+
+
+def _release_read_db(discard=False):
+    read_db = g.pop("read_db", None)
+    if read_db is not None:
+        index, conn = read_db
+        get_replicas().release(index, conn, discard=discard)
+
+
+def _replica_failed():
+    """Mark the request's replica down and send the rest of the request to the primary."""
+    read_db = g.get("read_db")
+    if read_db is not None:
+        get_replicas().mark_down(read_db[0])
+        _release_read_db(discard=True)
+    g.read_db = None
+
+
+def _routes_to_replica(query, primary=False):
+    """
+    Decide whether a statement may run on a replica. Writes, locking reads,
+    anything inside a transaction, and every read after this request (or,
+    briefly, this session) committed a write stay on the primary so callers
+    always read their own writes.
+    """
+    if primary or get_replicas() is None:
+        return False
+    if in_transaction_block() or g.get("db_wrote"):
+        return False
+    if has_request_context() and session.get("db_primary_until", 0) > time.time():
+        return False
+    return bool(_READ_ONLY_STATEMENT.match(query)) and not _LOCKING_READ.search(query)
+
+
+def on_table_write(tables, callback):
+    """
+    Register callback(table) to run after any commit that wrote to one of
+    ``tables``. Used to invalidate in-process caches; it only sees writes
+    made by this worker process.
+    """
+    for table in tables:
+        _write_listeners.setdefault(table.lower(), []).append(callback)
+
+
+def after_commit(callback):
+    """
+    Run callback() once the current transaction() block commits, or right
+    away outside one. Dropped on rollback. For invalidating cached rows
+    without letting another request re-cache the pre-commit value.
+    """
+    if in_transaction_block():
+        g.setdefault("db_after_commit", []).append(callback)
+    else:
+        callback()
+
+
+def _note_write(query):
+    """Remember which watched table a statement writes, until commit or rollback."""
+    match = _WRITTEN_TABLE.match(query)
+    if match and match.group(1).lower() in _write_listeners:
+        g.setdefault("db_written_tables", set()).add(match.group(1).lower())
+
+
+def _discard_writes():
+    g.pop("db_written_tables", None)
+    g.pop("db_after_commit", None)
+
+
+def _mark_write():
+    """Record a committed write so later reads go to the primary, and notify listeners."""
+    g.db_wrote = True
+    for table in g.pop("db_written_tables", ()):
+        for callback in _write_listeners[table]:
+            callback(table)
+    for callback in g.pop("db_after_commit", ()):
+        callback()
+    sticky = current_app.config.get("REPLICA_STICKY_SECONDS")
+    if sticky and get_replicas() is not None and has_request_context():
+        # Covers the redirect that usually follows a POST
+        session["db_primary_until"] = time.time() + sticky
+
+
+def _is_replica_failure(exc):
+    if isinstance(exc, pymysql.err.InterfaceError):
+        return True
+    return (isinstance(exc, pymysql.err.OperationalError)
+            and bool(exc.args) and exc.args[0] in _REPLICA_FAILURE_CODES)
+
+
 def close_db(e=None):
     """
-    Closes DB connection after request.
+    Returns the request's DB connections to their pools after request.
     """
+    _release_read_db()
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        get_pool().release(db)
 
 
-def query_db(query, args=(), one=False, commit=False):
+def query_db(query, args=(), one=False, commit=False, primary=False):
     """
     Executes SQL query with parameters against MySQL.
+    With commit=True the statement is committed immediately, unless it runs
+    inside a transaction() block, which commits once at the end instead.
+    Read-only statements go to a read replica when configured; pass
+    primary=True to force the primary.
     """
-    db = get_db()
+    if not commit and _routes_to_replica(query, primary):
+        try:
+            return _execute(get_read_db(), query, args, one, commit)
+        except Exception as exc:
+            if g.get("read_db") is None or not _is_replica_failure(exc):
+                raise
+            _replica_failed()
+            # Fall through and retry on the primary
+
+    return _execute(get_db(), query, args, one, commit)
+
+
+def _execute(db, query, args, one, commit):
     cursor = db.cursor()
+    started = time.perf_counter()
+    # Inside transaction() the block owns COMMIT/ROLLBACK
+    in_transaction = in_transaction_block()
 
     try:
         cursor.execute(query, args)
 
         if commit:
-            db.commit()
+            _note_write(query)
+            if not in_transaction:
+                db.commit()
+                _mark_write()
             return cursor.lastrowid
 
         rows = cursor.fetchall()
         return (rows[0] if rows else None) if one else rows
 
     except Exception as exc:
-        db.rollback()
+        if not in_transaction:
+            db.rollback()
+            _discard_writes()
+        print("MySQL error:", exc)
+        raise
+
+    finally:
+        cursor.close()
+        record_query(query, time.perf_counter() - started)
+
+
+def stream_db(query, args=(), chunk_size=500, primary=False):
+    """
+    Executes a SELECT and yields rows lazily from an unbuffered server-side
+    cursor (SSDictCursor), so memory stays flat however many rows match.
+    Routed to a read replica like query_db unless primary=True.
+
+    The connection cannot run other statements until the generator is
+    exhausted or closed; fetch anything else you need before iterating.
+    """
+    db = get_read_db() if _routes_to_replica(query, primary) else get_db()
+    cursor = db.cursor(pymysql.cursors.SSDictCursor)
+    started = time.perf_counter()
+    # Inside transaction() the block owns ROLLBACK, as in _execute
+    in_transaction = in_transaction_block()
+
+    try:
+        cursor.execute(query, args)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+    except Exception as exc:
+        if not in_transaction:
+            db.rollback()
         print("MySQL error:", exc)
         raise
 
     finally:
+        # Closing an unbuffered cursor drains any unread rows off the wire
         cursor.close()
+        record_query(query, time.perf_counter() - started)
+
+
+class Transaction:
+    """
+    Handle yielded by transaction(). Statements run on the request
+    connection and are committed (or rolled back) by the enclosing block.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.lastrowid = None
+
+    def execute(self, query, args=()):
+        """Run one statement; returns the affected row count."""
+        return self._run(query, lambda cursor: cursor.execute(query, args))
+
+    def executemany(self, query, seq_of_args):
+        """
+        Run one statement for many parameter sets. pymysql rewrites a plain
+        INSERT ... VALUES into a single multi-row INSERT.
+        """
+        seq_of_args = list(seq_of_args)
+        if not seq_of_args:
+            return 0
+        return self._run(query, lambda cursor: cursor.executemany(query, seq_of_args))
+
+    def savepoint(self):
+        """Nested block that can roll back on its own (SAVEPOINT)."""
+        return transaction()
+
+    def _run(self, query, execute):
+        cursor = self.db.cursor()
+        started = time.perf_counter()
+        try:
+            execute(cursor)
+            _note_write(query)
+            self.lastrowid = cursor.lastrowid
+            return cursor.rowcount
+        finally:
+            cursor.close()
+            record_query(query, time.perf_counter() - started)
+
+
+def in_transaction_block():
+    """
+    True while a transaction() block is open on the request connection.
+    """
+    return g.get("tx_depth", 0) > 0
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work on the request connection with a single COMMIT.
+
+        with transaction() as tx:
+            user_id = create_user(...)          # commit=True is deferred
+            tx.execute('UPDATE ...', (...))     # returns rowcount
+
+    Any exception rolls the whole block back. Nested blocks become
+    SAVEPOINTs, so an inner failure can be caught without losing the
+    outer work.
+    """
+    db = get_db()
+    depth = g.get("tx_depth", 0)
+    savepoint = f"sp_{depth}"
+    tx = Transaction(db)
+
+    if depth:
+        tx.execute(f"SAVEPOINT {savepoint}")
+    else:
+        db.begin()
+    g.tx_depth = depth + 1
+
+    try:
+        yield tx
+    except BaseException:
+        g.tx_depth = depth
+        if depth:
+            tx.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+        else:
+            db.rollback()
+            _discard_writes()
+        raise
+    else:
+        g.tx_depth = depth
+        if depth:
+            tx.execute(f"RELEASE SAVEPOINT {savepoint}")
+        else:
+            db.commit()
+            _mark_write()
@@ -0,0 +1,26 @@
+"""
+Utility to release expired pickup holds once, for deployments that run
+without the background expirer (RESERVATION_SWEEP_SECONDS=0), e.g. from cron:
+
+    python -m app.expire_reservations
+"""
+import sys
+
+from app import create_app
+from app.models.reservation_model import expire_reservations
+
+
+def main(argv):
+    if argv:
+        print(__doc__)
+        return 1
+
+    app = create_app()
+    with app.app_context():
+        released = expire_reservations()
+    print(f"Released {released} expired hold(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""
+Export printable QR cards for verified clients without going through the
+web UI. The format follows the output file's extension:
+
+    python -m app.export_qr_cards cards.pdf                      # every verified client
+    python -m app.export_qr_cards cards.zip --location FL        # one location, PNG per card
+    python -m app.export_qr_cards cards.pdf --verified-from 2025-01-01 --verified-to 2025-01-31
+"""
+import argparse
+import sys
+import time
+
+from app import create_app
+from app.models.client_model import get_clients_for_cards
+from app.utils.qr_cards import attach_qr_data, stream_pdf, stream_zip
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='cards.pdf or cards.zip')
+    parser.add_argument('--location', help='only client numbers with this prefix, e.g. FL')
+    parser.add_argument('--verified-from', help='first verification day (YYYY-MM-DD)')
+    parser.add_argument('--verified-to', help='last verification day (YYYY-MM-DD)')
+    parser.add_argument('--processes', type=int, help='worker processes (default: QR_EXPORT_PROCESSES or one per CPU)')
+    args = parser.parse_args(argv)
+
+    if not args.output.endswith(('.pdf', '.zip')):
+        parser.error('output must end in .pdf or .zip')
+
+    app = create_app()
+    with app.app_context():
+        clients = get_clients_for_cards(location=args.location, verified_from=args.verified_from,
+                                        verified_to=args.verified_to)
+        attach_qr_data(clients)
+        processes = args.processes or app.config['QR_EXPORT_PROCESSES']
+    if not clients:
+        print("No verified clients match those filters.")
+        return 1
+
+    started = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\rRendered {done}/{total} cards", end='', file=sys.stderr, flush=True)
+
+    stream = stream_pdf if args.output.endswith('.pdf') else stream_zip
+    with open(args.output, 'wb') as out:
+        for chunk in stream(clients, progress, processes):
+            out.write(chunk)
+    print(f"\nWrote {len(clients)} cards to {args.output} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,8 +1,13 @@
 """
 Utility to initialize the MySQL schema from migrations/schema.sql.
 Run manually if you need to reseed the database.
+
+Pass a path to run a single upgrade script instead, e.g.
+    python -m app.init_schema migrations/002_pickups_updated_at.sql
 """
 import os
+import re
+import sys
 
 import pymysql
 from pymysql.constants import CLIENT
@@ -14,14 +19,15 @@ SCHEMA_PATH = os.path.normpath(
 )
 
 
-def initialize_schema():
+def initialize_schema(path=SCHEMA_PATH):
     """
-    Execute migrations/schema.sql against the configured MySQL database.
+    Execute migrations/schema.sql (or another SQL script) against the
+    configured MySQL database.
     """
     cfg = Config()
-    print("Initializing MySQL schema...")
+    print(f"Initializing MySQL schema from {os.path.basename(path)}...")
 
-    with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
+    with open(path, "r", encoding="utf-8") as schema_file:
         sql_script = schema_file.read()
 
     connection = pymysql.connect(
@@ -45,5 +51,39 @@ def initialize_schema():
         connection.close()
 
 
+def create_database_from_schema(database, path=SCHEMA_PATH):
+    """
+    Drop and recreate ``database`` on the configured server and load the
+    schema into it. Used for scratch test and benchmark databases.
+    """
+    cfg = Config()
+    with open(path, "r", encoding="utf-8") as schema_file:
+        sql_script = schema_file.read()
+    # The schema pins foodlink_db; load it into the requested database instead
+    sql_script = re.sub(r"^\s*(CREATE DATABASE|USE)\b.*?;\s*$", "", sql_script,
+                        flags=re.MULTILINE | re.IGNORECASE)
+
+    connection = pymysql.connect(
+        host=cfg.MYSQL_HOST,
+        port=cfg.MYSQL_PORT,
+        user=cfg.MYSQL_USER,
+        password=cfg.MYSQL_PASSWORD,
+        charset="utf8mb4",
+        client_flag=CLIENT.MULTI_STATEMENTS,
+    )
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+            cursor.execute(f"CREATE DATABASE `{database}` CHARACTER SET utf8mb4")
+            cursor.execute(f"USE `{database}`")
+            cursor.execute(sql_script)
+            while cursor.nextset():
+                pass
+        connection.commit()
+    finally:
+        connection.close()
+
+
 if __name__ == "__main__":
-    initialize_schema()
+    initialize_schema(*sys.argv[1:2])
@@ -2,7 +2,25 @@
 Client Model
 Client-specific operations
 """
-from app.database import query_db
+import re
+
+from flask import current_app, g
+from app.database import query_db, after_commit, transaction
+from app.models.sequence_model import allocate_client_numbers
+from app.utils.cache import TTLCache
+from app.utils.client_index import reindex_clients, discard_clients
+from app.utils.helpers import day_range
+from app.utils.pagination import keyset_page
+
+# Every client route starts by loading the signed-in client. Rows are cached
+# per process for CLIENT_CACHE_TTL seconds and memoized per request; writes
+# made by this worker invalidate them, other workers see them within the TTL.
+_client_cache = TTLCache('client_by_user_id', maxsize=4096)
+
+
+class VerificationError(Exception):
+    """A client could not be verified or rejected."""
+
 
 def get_client_by_id(client_id):
     """Get client by ID with user information"""
@@ -16,15 +34,54 @@ def get_client_by_id(client_id):
     )
 
 def get_client_by_user_id(user_id):
-    """Get client by user ID"""
-    return query_db(
-        '''SELECT c.*, u.email, u.full_name, u.phone
-           FROM clients c
-           JOIN users u ON c.user_id = u.user_id
-           WHERE c.user_id = %s''',
-        (user_id,),
-        one=True
-    )
+    """Get client by user ID (cached, see invalidate_client)"""
+    user_id = int(user_id)
+    memo = g.setdefault('client_by_user_id', {})
+    if user_id in memo:
+        return memo[user_id]
+
+    client = _client_cache.get(user_id)
+    if client is None:
+        # Fill from the primary so a lagging replica cannot re-cache a row
+        # that was just invalidated
+        client = query_db(
+            '''SELECT c.*, u.email, u.full_name, u.phone
+               FROM clients c
+               JOIN users u ON c.user_id = u.user_id
+               WHERE c.user_id = %s''',
+            (user_id,),
+            one=True,
+            primary=True
+        )
+        if client is not None:
+            _client_cache.set(user_id, client, ttl=current_app.config['CLIENT_CACHE_TTL'])
+    # Callers get their own copy; the cached row is shared between requests
+    client = dict(client) if client is not None else None
+    memo[user_id] = client
+    return client
+
+def invalidate_client(user_id=None, client_id=None):
+    """
+    Drop a client's cached row after it changes, by user_id or client_id.
+    Inside a transaction() block this waits for the commit.
+    """
+    def matches(key, row):
+        if user_id is not None:
+            return key == int(user_id)
+        return row is not None and row['client_id'] == int(client_id)
+
+    def invalidate():
+        if user_id is not None:
+            _client_cache.pop(int(user_id))
+        else:
+            for key, row in _client_cache.items():
+                if matches(key, row):
+                    _client_cache.pop(key)
+        memo = g.get('client_by_user_id', {})
+        for key, row in list(memo.items()):
+            if matches(key, row):
+                del memo[key]
+    after_commit(invalidate)
 
 def create_client(user_id, address, family_size, allergies='', food_preferences='', verification_status='pending'):
     """Create a new client"""
@@ -52,37 +109,150 @@ def update_client(client_id, **kwargs):
     
     values.append(client_id)
     query = f"UPDATE clients SET {', '.join(updates)} WHERE client_id = %s"
-    return query_db(query, tuple(values), commit=True)
+    result = query_db(query, tuple(values), commit=True)
+    invalidate_client(client_id=client_id)
+    reindex_clients(client_ids=[client_id])
+    return result
 
-def get_pending_clients():
-    """Get all clients pending verification"""
-    return query_db(
-        '''SELECT c.*, u.full_name, u.email, u.phone, u.created_at
+def _lock_clients(client_ids):
+    """Lock clients (in id order) and sort them into pending rows and per-id errors"""
+    placeholders = ', '.join(['%s'] * len(client_ids))
+    rows = query_db(
+        f'''SELECT client_id, user_id, verification_status FROM clients
+            WHERE client_id IN ({placeholders})
+            ORDER BY client_id FOR UPDATE''',
+        tuple(client_ids)
+    )
+    found = {row['client_id']: row for row in rows}
+    pending, results = [], {}
+    for client_id in client_ids:
+        row = found.get(client_id)
+        if row is None:
+            results[client_id] = VerificationError('Client not found')
+        elif row['verification_status'] != 'pending':
+            results[client_id] = VerificationError(f"Client is already {row['verification_status']}")
+        else:
+            pending.append(row)
+    return pending, results
+
+def approve_clients(client_ids, location_code, verified_by):
+    """
+    Verify pending clients in one transaction: number them from the
+    location's sequence in client_id order and activate their accounts.
+    Returns {client_id: new client number, or the VerificationError};
+    raises ValueError for a bad location code.
+    """
+    client_ids = sorted({int(client_id) for client_id in client_ids})
+    if not client_ids:
+        return {}
+    with transaction() as tx:
+        pending, results = _lock_clients(client_ids)
+        if pending:
+            numbers = allocate_client_numbers(location_code, len(pending))
+            assigned = dict(zip((row['client_id'] for row in pending), numbers))
+            ids = list(assigned)
+            placeholders = ', '.join(['%s'] * len(ids))
+            cases = ' '.join(['WHEN %s THEN %s'] * len(ids))
+            tx.execute(
+                f'''UPDATE clients SET verification_status = "verified",
+                   client_number = CASE client_id {cases} END,
+                   verified_date = NOW(), verified_by = %s
+                   WHERE client_id IN ({placeholders})''',
+                tuple(value for item in assigned.items() for value in item) + (verified_by,) + tuple(ids)
+            )
+            user_ids = [row['user_id'] for row in pending]
+            tx.execute(
+                f"UPDATE users SET is_active = 1 WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})",
+                tuple(user_ids)
+            )
+            for user_id in user_ids:
+                invalidate_client(user_id=user_id)
+            reindex_clients(client_ids=ids)
+            results.update(assigned)
+    return results
+
+def reject_clients(client_ids, reason):
+    """
+    Reject pending clients in one statement, recording the reason in notes.
+    Returns {client_id: None, or the VerificationError}.
+    """
+    client_ids = sorted({int(client_id) for client_id in client_ids})
+    if not client_ids:
+        return {}
+    with transaction() as tx:
+        pending, results = _lock_clients(client_ids)
+        if pending:
+            ids = [row['client_id'] for row in pending]
+            tx.execute(
+                f'''UPDATE clients SET verification_status = "rejected", notes = %s
+                   WHERE client_id IN ({', '.join(['%s'] * len(ids))})''',
+                (reason,) + tuple(ids)
+            )
+            for row in pending:
+                invalidate_client(user_id=row['user_id'])
+                results[row['client_id']] = None
+            discard_clients(ids)
+    return results
+
+def get_pending_clients(after=None, before=None, per_page=None):
+    """Get one page of clients pending verification, newest registrations first"""
+    return keyset_page(
+        '''SELECT c.*, u.full_name, u.email, u.phone
            FROM clients c
-           JOIN users u ON c.user_id = u.user_id
-           WHERE c.verification_status = "pending"
-           ORDER BY u.created_at DESC'''
+           JOIN users u ON c.user_id = u.user_id''',
+        'c.verification_status = "pending"', (),
+        ('c.created_at', 'c.client_id'),
+        after=after, before=before, per_page=per_page
     )
 
-def get_verified_clients():
-    """Get all verified clients"""
-    return query_db(
+def get_verified_clients(after=None, before=None, per_page=None):
+    """Get one page of verified clients, most recently verified first"""
+    return keyset_page(
         '''SELECT c.*, u.full_name, u.email, u.phone
            FROM clients c
-           JOIN users u ON c.user_id = u.user_id
-           WHERE c.verification_status = "verified"
-           ORDER BY c.verified_date DESC'''
+           JOIN users u ON c.user_id = u.user_id''',
+        'c.verification_status = "verified"', (),
+        ('c.verified_date', 'c.client_id'),
+        after=after, before=before, per_page=per_page
     )
 
-def get_client_distributions(client_id):
-    """Get all distributions for a client"""
+def get_clients_for_cards(location=None, verified_from=None, verified_to=None, client_numbers=None):
+    """
+    Verified clients for QR card printing, ordered by client number.
+    Optionally only one location prefix (e.g. FL), those verified between two
+    days (inclusive), or an explicit list of client numbers.
+    """
+    conditions = ['c.verification_status = "verified"', 'c.client_number IS NOT NULL']
+    args = []
+    if location:
+        # Match the prefix literally: a % or _ in the location is not a wildcard
+        conditions.append("c.client_number LIKE %s ESCAPE '!'")
+        args.append(re.sub(r'([!%_])', r'!\1', f'{location}-') + '%')
+    if verified_from or verified_to:
+        start, end = day_range(verified_from or verified_to, verified_to or verified_from)
+        conditions.append('c.verified_date >= %s AND c.verified_date < %s')
+        args += [start, end]
+    if client_numbers:
+        conditions.append(f"c.client_number IN ({', '.join(['%s'] * len(client_numbers))})")
+        args += list(client_numbers)
     return query_db(
+        f'''SELECT c.client_id, c.client_number, c.verified_date, u.full_name
+            FROM clients c
+            JOIN users u ON c.user_id = u.user_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY c.client_number''',
+        tuple(args)
+    )
+
+def get_client_distributions(client_id, after=None, before=None, per_page=None):
+    """Get one page of a client's distributions, newest first"""
+    return keyset_page(
         '''SELECT d.*, u.full_name as volunteer_name
            FROM distributions d
-           JOIN users u ON d.volunteer_id = u.user_id
-           WHERE d.client_id = %s
-           ORDER BY d.distribution_date DESC''',
-        (client_id,)
+           JOIN users u ON d.volunteer_id = u.user_id''',
+        'd.client_id = %s', (client_id,),
+        ('d.distribution_date', 'd.distribution_id'),
+        after=after, before=before, per_page=per_page
     )
 
 
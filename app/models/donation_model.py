@@ -2,17 +2,23 @@
 Donation Model
 Donation tracking operations
 """
-from app.database import query_db
+from app.database import query_db, transaction
+from app.models import rollup_model
+from app.utils.helpers import day_range, today_range
+from app.utils.pagination import keyset_page
 
 def create_donation(volunteer_id, donation_date, weight_kg, food_type=None, 
                    source=None, description=None, status='collected'):
     """Create a new donation record"""
-    return query_db(
-        '''INSERT INTO donations (volunteer_id, donation_date, weight_kg, food_type, source, description, status)
-           VALUES (%s, %s, %s, %s, %s, %s, %s)''',
-        (volunteer_id, donation_date, weight_kg, food_type, source, description, status),
-        commit=True
-    )
+    with transaction() as tx:
+        donation_id = query_db(
+            '''INSERT INTO donations (volunteer_id, donation_date, weight_kg, food_type, source, description, status)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)''',
+            (volunteer_id, donation_date, weight_kg, food_type, source, description, status),
+            commit=True
+        )
+        rollup_model.record_donation(tx, donation_id)
+    return donation_id
 
 def get_donation_by_id(donation_id):
     """Get donation by ID"""
@@ -25,17 +31,14 @@ def get_donation_by_id(donation_id):
         one=True
     )
 
-def get_donations_by_volunteer(volunteer_id, limit=None):
-    """Get all donations by a volunteer"""
-    query = '''SELECT d.*
-               FROM donations d
-               WHERE d.volunteer_id = %s
-               ORDER BY d.donation_date DESC'''
-    
-    if limit:
-        query += f' LIMIT {limit}'
-    
-    return query_db(query, (volunteer_id,))
+def get_donations_by_volunteer(volunteer_id, after=None, before=None, per_page=None):
+    """Get one page of a volunteer's donations, newest first"""
+    return keyset_page(
+        'SELECT d.* FROM donations d',
+        'd.volunteer_id = %s', (volunteer_id,),
+        ('d.donation_date', 'd.donation_id'),
+        after=after, before=before, per_page=per_page
+    )
 
 def get_recent_donations(limit=10):
     """Get recent donations"""
@@ -48,49 +51,68 @@ def get_recent_donations(limit=10):
         (limit,)
     )
 
+def get_todays_donations_by_volunteer(volunteer_id):
+    """Get a volunteer's donations logged today"""
+    return query_db(
+        '''SELECT * FROM donations
+           WHERE volunteer_id = %s AND donation_date >= %s AND donation_date < %s
+           ORDER BY donation_date DESC''',
+        (volunteer_id,) + today_range()
+    )
+
 def get_donations_by_date_range(start_date, end_date):
     """Get donations within a date range"""
     return query_db(
         '''SELECT d.*, u.full_name as volunteer_name
            FROM donations d
            JOIN users u ON d.volunteer_id = u.user_id
-           WHERE DATE(d.donation_date) BETWEEN %s AND %s
+           WHERE d.donation_date >= %s AND d.donation_date < %s
            ORDER BY d.donation_date DESC''',
-        (start_date, end_date)
+        day_range(start_date, end_date)
     )
 
 def update_donation_status(donation_id, status):
     """Update donation status"""
-    return query_db(
-        'UPDATE donations SET status = %s WHERE donation_id = %s',
-        (status, donation_id),
-        commit=True
-    )
+    with transaction() as tx:
+        donation = query_db(
+            '''SELECT DATE(donation_date) as day, weight_kg, status
+               FROM donations WHERE donation_id = %s FOR UPDATE''',
+            (donation_id,),
+            one=True
+        )
+        result = query_db(
+            'UPDATE donations SET status = %s WHERE donation_id = %s',
+            (status, donation_id),
+            commit=True
+        )
+        if donation and donation['status'] != status:
+            rollup_model.move_donation(tx, donation['day'], donation['weight_kg'], donation['status'], status)
+    return result
 
 def get_donation_statistics(start_date=None, end_date=None):
-    """Get donation statistics"""
+    """Get donation statistics (read from daily_donation_rollup)"""
     if start_date and end_date:
         return query_db(
             '''SELECT 
-                   DATE(donation_date) as date,
-                   COUNT(*) as num_donations,
-                   SUM(weight_kg) as total_weight
-               FROM donations
-               WHERE DATE(donation_date) BETWEEN %s AND %s
-               GROUP BY DATE(donation_date)
+                   day as date,
+                   SUM(num_donations) as num_donations,
+                   SUM(total_weight) as total_weight
+               FROM daily_donation_rollup
+               WHERE day BETWEEN %s AND %s
+               GROUP BY day
+               HAVING num_donations > 0
                ORDER BY date DESC''',
             (start_date, end_date)
         )
     else:
         return query_db(
             '''SELECT 
-                   DATE(donation_date) as date,
-                   COUNT(*) as num_donations,
-                   SUM(weight_kg) as total_weight
-               FROM donations
-               GROUP BY DATE(donation_date)
+                   day as date,
+                   SUM(num_donations) as num_donations,
+                   SUM(total_weight) as total_weight
+               FROM daily_donation_rollup
+               GROUP BY day
+               HAVING num_donations > 0
                ORDER BY date DESC
                LIMIT 30'''
         )
-
-
@@ -2,16 +2,26 @@
 Pickup Model
 User food pickup operations
 """
-from app.database import query_db
+from app.database import query_db, transaction
+from app.models import reservation_model, rollup_model
+from app.utils.pagination import keyset_page
 
 def create_pickup(user_id, inventory_id, quantity, status='pending'):
-    """Create a new pickup request"""
-    return query_db(
-        '''INSERT INTO pickups (user_id, inventory_id, quantity, status)
-           VALUES (%s, %s, %s, %s)''',
-        (user_id, inventory_id, quantity, status),
-        commit=True
-    )
+    """
+    Create a new pickup request. Pending requests hold their stock (see
+    reservation_model); raises InsufficientStock when there is not enough.
+    """
+    with transaction() as tx:
+        pickup_id = query_db(
+            '''INSERT INTO pickups (user_id, inventory_id, quantity, status)
+               VALUES (%s, %s, %s, %s)''',
+            (user_id, inventory_id, quantity, status),
+            commit=True
+        )
+        if status == 'pending':
+            reservation_model.hold_stock(tx, pickup_id, inventory_id, quantity)
+        rollup_model.record_pickup(tx, pickup_id)
+    return pickup_id
 
 def get_pickup_by_id(pickup_id):
     """Get pickup record by ID"""
@@ -25,16 +35,28 @@ def get_pickup_by_id(pickup_id):
         one=True
     )
 
-def get_pickups_by_user(user_id, limit=None):
-    """Get all pickups for a specific user"""
-    query = '''SELECT p.*, f.food_category
-               FROM pickups p
-               JOIN food_inventory f ON p.inventory_id = f.inventory_id
-               WHERE p.user_id = %s
-               ORDER BY p.created_at DESC'''
-    if limit:
-        query += f' LIMIT {limit}'
-    return query_db(query, (user_id,))
+def get_pickups_by_user(user_id, after=None, before=None, per_page=None):
+    """Get one page of a user's pickups, newest first"""
+    return keyset_page(
+        '''SELECT p.*, f.food_category
+           FROM pickups p
+           JOIN food_inventory f ON p.inventory_id = f.inventory_id''',
+        'p.user_id = %s', (user_id,),
+        ('p.created_at', 'p.pickup_id'),
+        after=after, before=before, per_page=per_page
+    )
+
+def get_all_pickups(after=None, before=None, per_page=None):
+    """Get one page of all pickup requests, newest first"""
+    return keyset_page(
+        '''SELECT p.*, u.full_name as user_name, f.food_category
+           FROM pickups p
+           JOIN users u ON p.user_id = u.user_id
+           JOIN food_inventory f ON p.inventory_id = f.inventory_id''',
+        '', (),
+        ('p.created_at', 'p.pickup_id'),
+        after=after, before=before, per_page=per_page
+    )
 
 def get_pending_pickups():
     """Get all pending pickup requests"""
@@ -49,32 +71,44 @@ def get_pending_pickups():
 
 def update_pickup_status(pickup_id, status):
     """Update pickup status (pending -> approved -> completed/rejected)"""
-    return query_db(
-        'UPDATE pickups SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE pickup_id = %s',
-        (status, pickup_id),
-        commit=True
-    )
+    with transaction() as tx:
+        pickup = query_db(
+            '''SELECT DATE(created_at) as day, quantity, status
+               FROM pickups WHERE pickup_id = %s FOR UPDATE''',
+            (pickup_id,),
+            one=True
+        )
+        result = query_db(
+            'UPDATE pickups SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE pickup_id = %s',
+            (status, pickup_id),
+            commit=True
+        )
+        if pickup and pickup['status'] != status:
+            rollup_model.move_pickup(tx, pickup['day'], pickup['quantity'], pickup['status'], status)
+    return result
 
 def get_pickup_statistics(start_date=None, end_date=None):
-    """Get pickup statistics (total quantity by date)"""
+    """Get pickup statistics (total quantity by date, read from daily_pickup_rollup)"""
     if start_date and end_date:
         return query_db(
-            '''SELECT DATE(created_at) as date,
-                      COUNT(*) as num_pickups,
-                      SUM(quantity) as total_quantity
-               FROM pickups
-               WHERE DATE(created_at) BETWEEN %s AND %s
-               GROUP BY DATE(created_at)
+            '''SELECT day as date,
+                      SUM(num_pickups) as num_pickups,
+                      SUM(total_quantity) as total_quantity
+               FROM daily_pickup_rollup
+               WHERE day BETWEEN %s AND %s
+               GROUP BY day
+               HAVING num_pickups > 0
                ORDER BY date DESC''',
             (start_date, end_date)
         )
     else:
         return query_db(
-            '''SELECT DATE(created_at) as date,
-                      COUNT(*) as num_pickups,
-                      SUM(quantity) as total_quantity
-               FROM pickups
-               GROUP BY DATE(created_at)
+            '''SELECT day as date,
+                      SUM(num_pickups) as num_pickups,
+                      SUM(total_quantity) as total_quantity
+               FROM daily_pickup_rollup
+               GROUP BY day
+               HAVING num_pickups > 0
                ORDER BY date DESC
                LIMIT 30'''
         )
@@ -0,0 +1,237 @@
+"""
+Report Job Model
+Compute report_model reports in the background and cache their results.
+
+report_jobs is both the queue and the cache. Each worker process runs
+jobs on its own thread pool (REPORT_JOB_WORKERS; 0 runs them inside the
+request). A finished job stores its rows together with the data watermark
+they were computed at: the newest id and updated_at of every table the
+report reads. Asking for the same report and range again reuses that
+result for as long as the watermark is unchanged.
+"""
+import hashlib
+import json
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app
+
+from app.database import query_db, transaction
+from app.models.report_model import REPORT_EXPORTS
+
+# Tables each report reads (the rollups are covered by their source tables)
+REPORT_SOURCES = {
+    'dashboard': ('clients', 'users', 'donations', 'distributions'),
+    'donation-summary': ('donations',),
+    'distribution-summary': ('distributions',),
+    'volunteer-performance': ('users', 'donations', 'distributions'),
+    'client-activity': ('clients', 'users', 'distributions'),
+}
+
+# table -> (id column, updated_at column); both are indexed, so MAX() is a lookup
+_WATERMARK_COLUMNS = {
+    'users': ('user_id', 'updated_at'),
+    'clients': ('client_id', 'updated_at'),
+    'donations': ('donation_id', 'updated_at'),
+    # Distributions are never updated or deleted
+    'distributions': ('distribution_id', None),
+}
+
+_JOB_COLUMNS = '''job_id, report, params, status, row_count, error,
+                  created_at, started_at, finished_at'''
+
+_executor_lock = threading.Lock()
+
+
+def data_watermark(tables):
+    """
+    (watermark, settled) for ``tables``. A watermark is not settled while
+    its newest updated_at is in the current second: a later change in that
+    same second would not move it, so results computed then are not reused.
+    """
+    columns = ['NOW() AS now']
+    for table in tables:
+        id_column, updated_column = _WATERMARK_COLUMNS[table]
+        columns.append(f'(SELECT MAX({id_column}) FROM {table}) AS {table}_id')
+        if updated_column:
+            columns.append(f'(SELECT MAX({updated_column}) FROM {table}) AS {table}_updated')
+    row = query_db('SELECT ' + ', '.join(columns), one=True)
+
+    parts, settled = [], True
+    for table in tables:
+        part = f"{table}:{row[f'{table}_id'] or 0}"
+        updated = row.get(f'{table}_updated')
+        if updated is not None:
+            part += f'@{updated:%Y%m%d%H%M%S}'
+            settled = settled and updated < row['now']
+        parts.append(part)
+    return ';'.join(parts), settled
+
+
+def _params(start_date, end_date):
+    return json.dumps({'start_date': str(start_date), 'end_date': str(end_date)}, sort_keys=True)
+
+def _params_key(report, params):
+    return hashlib.sha256(f'{report}:{params}'.encode()).hexdigest()
+
+
+def get_report_job(job_id):
+    """A job's status row (without its result), or None"""
+    return query_db(f'SELECT {_JOB_COLUMNS} FROM report_jobs WHERE job_id = %s',
+                    (job_id,), one=True, primary=True)
+
+def get_finished_job(job_ids, report, start_date, end_date):
+    """The newest finished job among ``job_ids`` for this report and range, or None"""
+    if not job_ids:
+        return None
+    return query_db(
+        f'''SELECT {_JOB_COLUMNS} FROM report_jobs
+            WHERE job_id IN ({', '.join(['%s'] * len(job_ids))})
+              AND params_key = %s AND status = 'done'
+            ORDER BY job_id DESC LIMIT 1''',
+        tuple(job_ids) + (_params_key(report, _params(start_date, end_date)),),
+        one=True, primary=True
+    )
+
+def submit_report_job(report, start_date, end_date, user_id=None):
+    """
+    Find or start the job computing ``report`` for this range and return
+    its status row: a finished job whose watermark is still current, the
+    job already queued or running, or a new one.
+    """
+    params = _params(start_date, end_date)
+    key = _params_key(report, params)
+    jobs = query_db(
+        '''SELECT job_id, status, watermark,
+                  TIMESTAMPDIFF(SECOND, COALESCE(started_at, created_at), NOW()) AS age
+           FROM report_jobs
+           WHERE params_key = %s AND status IN ('queued', 'running', 'done')
+           ORDER BY job_id DESC''',
+        (key,), primary=True
+    )
+
+    if any(job['status'] == 'done' and job['watermark'] for job in jobs):
+        watermark, _ = data_watermark(REPORT_SOURCES[report])
+        for job in jobs:
+            if job['status'] == 'done' and job['watermark'] == watermark:
+                return get_report_job(job['job_id'])
+
+    for job in jobs:
+        if job['status'] == 'queued':
+            # Whichever worker claims it first runs it, so queueing it here
+            # too is harmless and covers a worker that died before starting it
+            _enqueue(job['job_id'])
+            return get_report_job(job['job_id'])
+        if job['status'] == 'running':
+            if job['age'] < current_app.config['REPORT_JOB_TIMEOUT']:
+                return get_report_job(job['job_id'])
+            query_db('''UPDATE report_jobs SET status = 'failed', error = 'Abandoned', finished_at = NOW()
+                        WHERE job_id = %s AND status = 'running' ''', (job['job_id'],), commit=True)
+
+    job_id = query_db(
+        '''INSERT INTO report_jobs (report, params, params_key, requested_by)
+           VALUES (%s, %s, %s, %s)''',
+        (report, params, key, user_id),
+        commit=True
+    )
+    _enqueue(job_id)
+    return get_report_job(job_id)
+
+
+def _enqueue(job_id):
+    app = current_app._get_current_object()
+    workers = app.config['REPORT_JOB_WORKERS']
+    if workers <= 0:
+        run_report_job(app, job_id)
+        return
+    with _executor_lock:
+        executor = app.extensions.get('report_job_executor')
+        if executor is None:
+            executor = app.extensions['report_job_executor'] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='report-job')
+    executor.submit(run_report_job, app, job_id)
+
+
+def run_report_job(app, job_id):
+    """
+    Claim and compute one queued job; returns False if another worker
+    already claimed it or the report failed. Each step gets its own app
+    context, so the report itself may still read from a replica after the
+    claim wrote to the primary.
+    """
+    with app.app_context():
+        with transaction() as tx:
+            claimed = tx.execute('''UPDATE report_jobs SET status = 'running', started_at = NOW()
+                                    WHERE job_id = %s AND status = 'queued' ''', (job_id,))
+        if not claimed:
+            return False
+        job = query_db('SELECT report, params, params_key FROM report_jobs WHERE job_id = %s',
+                       (job_id,), one=True, primary=True)
+
+    try:
+        with app.app_context():
+            rows_for, _, _ = REPORT_EXPORTS[job['report']]
+            params = json.loads(job['params'])
+            # Read on the same connection as the report, before it
+            watermark, settled = data_watermark(REPORT_SOURCES[job['report']])
+            rows = list(rows_for(params['start_date'], params['end_date']))
+        result = zlib.compress(json.dumps(rows, default=_encode_value).encode())
+    except Exception as exc:
+        print(f"Report job {job_id} failed:", exc)
+        with app.app_context():
+            query_db('''UPDATE report_jobs SET status = 'failed', error = %s, finished_at = NOW()
+                        WHERE job_id = %s''', (str(exc)[:255], job_id), commit=True)
+        return False
+
+    with app.app_context():
+        with transaction() as tx:
+            tx.execute('''UPDATE report_jobs
+                          SET status = 'done', watermark = %s, result = %s, row_count = %s, finished_at = NOW()
+                          WHERE job_id = %s''',
+                       (watermark if settled else None, result, len(rows), job_id))
+            # Earlier results for the same report and range are superseded
+            tx.execute('''DELETE FROM report_jobs
+                          WHERE params_key = %s AND job_id < %s AND status IN ('done', 'failed')''',
+                       (job['params_key'], job_id))
+    return True
+
+
+def load_report_result(job_id):
+    """The rows a finished job computed, or None if it has not finished"""
+    row = query_db("SELECT result FROM report_jobs WHERE job_id = %s AND status = 'done'",
+                   (job_id,), one=True, primary=True)
+    if row is None:
+        return None
+    return json.loads(zlib.decompress(row['result']), object_hook=_decode_value)
+
+def clear_report_results():
+    """Drop every finished result, e.g. after the rollups were rebuilt; returns how many"""
+    with transaction() as tx:
+        return tx.execute("DELETE FROM report_jobs WHERE status IN ('done', 'failed')")
+
+
+# Report rows hold dates, datetimes and Decimals; keep their types through JSON
+_DECODERS = {
+    '$datetime': datetime.fromisoformat,
+    '$date': date.fromisoformat,
+    '$decimal': Decimal,
+}
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'$decimal': str(value)}
+    raise TypeError(f'Cannot store {type(value).__name__} in a report result')
+
+def _decode_value(obj):
+    if len(obj) == 1:
+        (key, value), = obj.items()
+        if key in _DECODERS:
+            return _DECODERS[key](value)
+    return obj
@@ -2,113 +2,200 @@
 Report Model
 Report generation queries
 """
-from app.database import query_db
+from flask import current_app
+from app.database import query_db, stream_db, on_table_write
+from app.utils.cache import TTLCache
+from app.utils.helpers import day_range, today_range
 from datetime import datetime, timedelta
 
+# One process-wide snapshot, shared by every admin request. Writes made by
+# this worker invalidate it immediately; other workers see them within the TTL.
+_dashboard_cache = TTLCache('dashboard_stats', maxsize=1)
+
+def _invalidate_dashboard_stats(table=None):
+    _dashboard_cache.clear()
+
+on_table_write(('clients', 'users', 'donations', 'distributions'), _invalidate_dashboard_stats)
+
 def get_dashboard_stats():
-    """Get dashboard statistics"""
-    return {
-        'total_clients': query_db(
-            'SELECT COUNT(*) as count FROM clients',
-            one=True
-        )['count'],
-        'pending_verifications': query_db(
-            'SELECT COUNT(*) as count FROM clients WHERE verification_status = "pending"',
-            one=True
-        )['count'],
-        'verified_clients': query_db(
-            'SELECT COUNT(*) as count FROM clients WHERE verification_status = "verified"',
-            one=True
-        )['count'],
-        'active_volunteers': query_db(
-            'SELECT COUNT(*) as count FROM users WHERE role = "volunteer" AND is_active = 1',
-            one=True
-        )['count'],
-        'today_donations': query_db(
-            'SELECT COALESCE(SUM(weight_kg), 0) as total FROM donations WHERE DATE(donation_date) = CURDATE()',
-            one=True
-        )['total'],
-        'total_donations': query_db(
-            'SELECT COALESCE(SUM(weight_kg), 0) as total FROM donations',
-            one=True
-        )['total'],
-        'today_distributions': query_db(
-            'SELECT COALESCE(SUM(weight_kg), 0) as total FROM distributions WHERE DATE(distribution_date) = CURDATE()',
-            one=True
-        )['total']
-    }
+    """Get dashboard statistics (cached for DASHBOARD_STATS_TTL seconds)"""
+    return _dashboard_cache.get_or_set(
+        'stats',
+        compute_dashboard_stats,
+        ttl=current_app.config['DASHBOARD_STATS_TTL']
+    )
 
-def get_donation_summary(start_date, end_date):
-    """Get donation summary for date range"""
+def compute_dashboard_stats():
+    """Compute dashboard statistics in a single round trip"""
+    today = today_range()
+    # Each derived table is one pass over its table; "today" uses a half-open
+    # range on the raw column so idx_date can serve it.
     return query_db(
-        '''SELECT 
-               DATE(donation_date) as date,
-               COUNT(*) as num_donations,
-               SUM(weight_kg) as total_weight
-           FROM donations
-           WHERE DATE(donation_date) BETWEEN %s AND %s
-           GROUP BY DATE(donation_date)
-           ORDER BY date DESC''',
-        (start_date, end_date)
+        '''SELECT
+               c.total_clients,
+               c.pending_verifications,
+               c.verified_clients,
+               v.active_volunteers,
+               d.today_donations,
+               d.total_donations,
+               t.today_distributions
+           FROM
+               (SELECT COUNT(*) as total_clients,
+                       COALESCE(SUM(verification_status = "pending"), 0) as pending_verifications,
+                       COALESCE(SUM(verification_status = "verified"), 0) as verified_clients
+                FROM clients) c
+           CROSS JOIN
+               (SELECT COUNT(*) as active_volunteers
+                FROM users WHERE role = "volunteer" AND is_active = 1) v
+           CROSS JOIN
+               (SELECT COALESCE(SUM(weight_kg), 0) as total_donations,
+                       COALESCE(SUM(CASE WHEN donation_date >= %s AND donation_date < %s
+                                         THEN weight_kg END), 0) as today_donations
+                FROM donations) d
+           CROSS JOIN
+               (SELECT COALESCE(SUM(weight_kg), 0) as today_distributions
+                FROM distributions
+                WHERE distribution_date >= %s AND distribution_date < %s) t''',
+        today + today,
+        one=True
     )
 
+DONATION_SUMMARY_QUERY = '''SELECT 
+           day as date,
+           SUM(num_donations) as num_donations,
+           SUM(total_weight) as total_weight
+       FROM daily_donation_rollup
+       WHERE day BETWEEN %s AND %s
+       GROUP BY day
+       HAVING num_donations > 0
+       ORDER BY date DESC'''
+
+def get_donation_summary(start_date, end_date):
+    """Get donation summary for date range (read from daily_donation_rollup)"""
+    return query_db(DONATION_SUMMARY_QUERY, (start_date, end_date))
+
+def iter_donation_summary(start_date, end_date):
+    """Stream the donation summary row by row (see stream_db)"""
+    return stream_db(DONATION_SUMMARY_QUERY, (start_date, end_date))
+
+DISTRIBUTION_SUMMARY_QUERY = '''SELECT 
+           day as date,
+           num_distributions,
+           total_weight,
+           unique_clients
+       FROM daily_distribution_rollup
+       WHERE day BETWEEN %s AND %s AND num_distributions > 0
+       ORDER BY date DESC'''
+
 def get_distribution_summary(start_date, end_date):
-    """Get distribution summary for date range"""
-    return query_db(
-        '''SELECT 
-               DATE(distribution_date) as date,
-               COUNT(*) as num_distributions,
-               SUM(weight_kg) as total_weight,
-               COUNT(DISTINCT client_id) as unique_clients
-           FROM distributions
-           WHERE DATE(distribution_date) BETWEEN %s AND %s
-           GROUP BY DATE(distribution_date)
-           ORDER BY date DESC''',
-        (start_date, end_date)
-    )
+    """Get distribution summary for date range (read from daily_distribution_rollup)"""
+    return query_db(DISTRIBUTION_SUMMARY_QUERY, (start_date, end_date))
+
+def iter_distribution_summary(start_date, end_date):
+    """Stream the distribution summary row by row (see stream_db)"""
+    return stream_db(DISTRIBUTION_SUMMARY_QUERY, (start_date, end_date))
+
+VOLUNTEER_PERFORMANCE_QUERY = '''SELECT 
+           u.user_id,
+           u.full_name,
+           u.email,
+           COALESCE(d.active_days, 0) as active_days,
+           COALESCE(d.num_pickups, 0) as num_pickups,
+           COALESCE(d.total_rescued, 0) as total_rescued,
+           COALESCE(dist.num_distributions, 0) as num_distributions,
+           COALESCE(dist.total_distributed, 0) as total_distributed
+       FROM users u
+       LEFT JOIN (SELECT volunteer_id,
+                         COUNT(DISTINCT DATE(donation_date)) as active_days,
+                         COUNT(*) as num_pickups,
+                         SUM(weight_kg) as total_rescued
+                  FROM donations
+                  WHERE donation_date >= %s AND donation_date < %s
+                  GROUP BY volunteer_id) d ON d.volunteer_id = u.user_id
+       LEFT JOIN (SELECT volunteer_id,
+                         COUNT(*) as num_distributions,
+                         SUM(weight_kg) as total_distributed
+                  FROM distributions
+                  WHERE distribution_date >= %s AND distribution_date < %s
+                  GROUP BY volunteer_id) dist ON dist.volunteer_id = u.user_id
+       WHERE u.role = "volunteer"
+       ORDER BY total_rescued DESC'''
 
 def get_volunteer_performance_report(start_date, end_date):
     """Get volunteer performance report"""
-    return query_db(
-        '''SELECT 
-               u.user_id,
-               u.full_name,
-               u.email,
-               COUNT(DISTINCT DATE(d.donation_date)) as active_days,
-               COUNT(d.donation_id) as num_pickups,
-               COALESCE(SUM(d.weight_kg), 0) as total_rescued,
-               COUNT(dist.distribution_id) as num_distributions,
-               COALESCE(SUM(dist.weight_kg), 0) as total_distributed
-           FROM users u
-           LEFT JOIN donations d ON u.user_id = d.volunteer_id
-              AND DATE(d.donation_date) BETWEEN %s AND %s
-           LEFT JOIN distributions dist ON u.user_id = dist.volunteer_id
-              AND DATE(dist.distribution_date) BETWEEN %s AND %s
-           WHERE u.role = "volunteer"
-           GROUP BY u.user_id
-           ORDER BY total_rescued DESC''',
-        (start_date, end_date, start_date, end_date)
-    )
+    # Donations and distributions are aggregated per volunteer before the
+    # join; joining both raw tables to users would multiply their rows.
+    return query_db(VOLUNTEER_PERFORMANCE_QUERY, day_range(start_date, end_date) * 2)
+
+def iter_volunteer_performance_report(start_date, end_date):
+    """Stream the volunteer performance report row by row (see stream_db)"""
+    return stream_db(VOLUNTEER_PERFORMANCE_QUERY, day_range(start_date, end_date) * 2)
+
+CLIENT_ACTIVITY_QUERY = '''SELECT 
+           c.client_id,
+           c.client_number,
+           u.full_name,
+           u.email,
+           COUNT(dist.distribution_id) as num_visits,
+           COALESCE(SUM(dist.weight_kg), 0) as total_received,
+           MAX(dist.distribution_date) as last_visit
+       FROM clients c
+       JOIN users u ON c.user_id = u.user_id
+       LEFT JOIN distributions dist ON c.client_id = dist.client_id
+          AND dist.distribution_date >= %s AND dist.distribution_date < %s
+       WHERE c.verification_status = "verified"
+       GROUP BY c.client_id
+       ORDER BY num_visits DESC, last_visit DESC'''
 
 def get_client_activity_report(start_date, end_date):
     """Get client activity report"""
-    return query_db(
-        '''SELECT 
-               c.client_id,
-               c.client_number,
-               u.full_name,
-               u.email,
-               COUNT(dist.distribution_id) as num_visits,
-               COALESCE(SUM(dist.weight_kg), 0) as total_received,
-               MAX(dist.distribution_date) as last_visit
-           FROM clients c
-           JOIN users u ON c.user_id = u.user_id
-           LEFT JOIN distributions dist ON c.client_id = dist.client_id
-              AND DATE(dist.distribution_date) BETWEEN %s AND %s
-           WHERE c.verification_status = "verified"
-           GROUP BY c.client_id
-           ORDER BY num_visits DESC, last_visit DESC''',
-        (start_date, end_date)
-    )
+    return query_db(CLIENT_ACTIVITY_QUERY, day_range(start_date, end_date))
+
+def iter_client_activity_report(start_date, end_date):
+    """Stream the client activity report row by row (see stream_db)"""
+    return stream_db(CLIENT_ACTIVITY_QUERY, day_range(start_date, end_date))
 
+def iter_dashboard_stats(start_date=None, end_date=None):
+    """The dashboard snapshot as a one-row report (date range is ignored)"""
+    yield compute_dashboard_stats()
 
+# Exportable reports: name -> (row iterator, [(column, header), ...], uses date range)
+REPORT_EXPORTS = {
+    'dashboard': (iter_dashboard_stats, [
+        ('total_clients', 'Total Clients'),
+        ('pending_verifications', 'Pending Verifications'),
+        ('verified_clients', 'Verified Clients'),
+        ('active_volunteers', 'Active Volunteers'),
+        ('today_donations', 'Donations Today (kg)'),
+        ('total_donations', 'Total Donations (kg)'),
+        ('today_distributions', 'Distributions Today (kg)'),
+    ], False),
+    'donation-summary': (iter_donation_summary, [
+        ('date', 'Date'),
+        ('num_donations', 'Number of Donations'),
+        ('total_weight', 'Total Weight (kg)'),
+    ], True),
+    'distribution-summary': (iter_distribution_summary, [
+        ('date', 'Date'),
+        ('num_distributions', 'Number of Distributions'),
+        ('total_weight', 'Total Weight (kg)'),
+        ('unique_clients', 'Unique Clients'),
+    ], True),
+    'volunteer-performance': (iter_volunteer_performance_report, [
+        ('full_name', 'Volunteer Name'),
+        ('email', 'Email'),
+        ('active_days', 'Active Days'),
+        ('num_pickups', 'Number of Pickups'),
+        ('total_rescued', 'Total Rescued (kg)'),
+        ('num_distributions', 'Number of Distributions'),
+        ('total_distributed', 'Total Distributed (kg)'),
+    ], True),
+    'client-activity': (iter_client_activity_report, [
+        ('client_number', 'Client Number'),
+        ('full_name', 'Client Name'),
+        ('email', 'Email'),
+        ('num_visits', 'Visits'),
+        ('total_received', 'Total Received (kg)'),
+        ('last_visit', 'Last Visit'),
+    ], True),
+}
@@ -0,0 +1,248 @@
+"""
+Reservation Model
+Inventory holds for pickup requests.
+
+create_pickup() takes the requested quantity out of food_inventory straight
+away with a conditional UPDATE and records it in inventory_reservations
+with an expiry. Approving a pickup consumes its hold; rejecting it, or the
+hold expiring first, puts the stock back. Whoever deletes the hold row owns
+the stock, so approval, rejection and expiry can race without stock being
+counted twice or going missing.
+"""
+import threading
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from app.database import query_db, transaction
+from app.models import rollup_model
+
+
+class ReservationError(Exception):
+    """A pickup could not be held, approved or rejected."""
+
+
+class InsufficientStock(ReservationError):
+    """The inventory row does not have enough stock left."""
+
+
+def _deduct(tx, inventory_id, quantity):
+    """Take stock out of an inventory row, or raise InsufficientStock"""
+    taken = tx.execute(
+        '''UPDATE food_inventory
+           SET quantity_kg = quantity_kg - %s
+           WHERE inventory_id = %s AND quantity_kg >= %s''',
+        (quantity, inventory_id, quantity)
+    )
+    if not taken:
+        raise InsufficientStock('Not enough stock left for this request')
+
+def _in(ids):
+    return ', '.join(['%s'] * len(ids))
+
+def _by_inventory(rows):
+    """{inventory_id: total quantity} for pickups or holds"""
+    totals = {}
+    for row in rows:
+        totals[row['inventory_id']] = totals.get(row['inventory_id'], 0) + row['quantity']
+    return totals
+
+def _restore(tx, totals):
+    """Put {inventory_id: quantity} back, one statement per inventory row"""
+    tx.executemany(
+        'UPDATE food_inventory SET quantity_kg = quantity_kg + %s WHERE inventory_id = %s',
+        [(quantity, inventory_id) for inventory_id, quantity in sorted(totals.items())]
+    )
+
+def _take_holds(tx, pickup_ids, expired_only=False):
+    """Lock and delete the holds of these pickups; returns {pickup_id: hold}"""
+    if not pickup_ids:
+        return {}
+    holds = query_db(
+        f'''SELECT pickup_id, inventory_id, quantity FROM inventory_reservations
+            WHERE pickup_id IN ({_in(pickup_ids)})''' +
+        (' AND expires_at <= NOW()' if expired_only else '') +
+        ' ORDER BY pickup_id FOR UPDATE',
+        tuple(pickup_ids)
+    )
+    if holds:
+        held = [hold['pickup_id'] for hold in holds]
+        tx.execute(f'DELETE FROM inventory_reservations WHERE pickup_id IN ({_in(held)})', tuple(held))
+    return {hold['pickup_id']: hold for hold in holds}
+
+def _lock_pending(pickup_ids):
+    """
+    Lock the given pickups (in id order, so concurrent batches cannot
+    deadlock). Returns (pending rows, {pickup_id: error} for the rest).
+    """
+    rows = query_db(
+        f'''SELECT pickup_id, inventory_id, quantity, status, DATE(created_at) as day
+            FROM pickups WHERE pickup_id IN ({_in(pickup_ids)})
+            ORDER BY pickup_id FOR UPDATE''',
+        tuple(pickup_ids)
+    )
+    found = {row['pickup_id']: row for row in rows}
+    pending, errors = [], {}
+    for pickup_id in pickup_ids:
+        pickup = found.get(pickup_id)
+        if pickup is None or pickup['status'] != 'pending':
+            errors[pickup_id] = ReservationError('Pickup is not pending')
+        else:
+            pending.append(pickup)
+    return pending, errors
+
+def _set_status(tx, pickups, status):
+    """Move pending pickups to status in one statement, rollups included"""
+    ids = [pickup['pickup_id'] for pickup in pickups]
+    tx.execute(
+        f'''UPDATE pickups SET status = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE pickup_id IN ({_in(ids)})''',
+        (status,) + tuple(ids)
+    )
+    rollup_model.move_pickups(tx, pickups, 'pending', status)
+
+
+def hold_stock(tx, pickup_id, inventory_id, quantity):
+    """
+    Hold stock for a new pickup for RESERVATION_TTL_SECONDS. Raises
+    InsufficientStock, rolling back the caller's transaction, when the
+    inventory row cannot cover it.
+    """
+    try:
+        quantity = Decimal(str(quantity))
+    except InvalidOperation:
+        quantity = None
+    if quantity is None or not quantity.is_finite() or quantity <= 0:
+        raise ReservationError('Quantity must be a positive number')
+    _deduct(tx, inventory_id, quantity)
+    tx.execute(
+        '''INSERT INTO inventory_reservations (pickup_id, inventory_id, quantity, expires_at)
+           VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)''',
+        (pickup_id, inventory_id, quantity, current_app.config['RESERVATION_TTL_SECONDS'])
+    )
+
+def approve_pickup(pickup_id):
+    """Approve one pending pickup, consuming its hold (see approve_pickups)"""
+    result = approve_pickups([pickup_id])[int(pickup_id)]
+    if result is not None:
+        raise result
+
+def approve_pickups(pickup_ids):
+    """
+    Approve pending pickups in one transaction. A pickup whose hold is still
+    in place keeps the stock it already took; one without a hold (expired,
+    or requested before holds existed) takes it now, oldest first, and
+    fails if the stock has run out.
+
+    Returns {pickup_id: None on success, or the ReservationError}; failures
+    do not stop the others from being approved.
+    """
+    pickup_ids = sorted({int(pickup_id) for pickup_id in pickup_ids})
+    if not pickup_ids:
+        return {}
+    with transaction() as tx:
+        pending, results = _lock_pending(pickup_ids)
+        holds = _take_holds(tx, [pickup['pickup_id'] for pickup in pending])
+        approved = [pickup for pickup in pending if pickup['pickup_id'] in holds]
+        unheld = [pickup for pickup in pending if pickup['pickup_id'] not in holds]
+
+        if unheld:
+            # Share out the stock under lock, then take it with one
+            # conditional UPDATE per inventory row
+            inventory_ids = sorted({pickup['inventory_id'] for pickup in unheld})
+            stock = {row['inventory_id']: row['quantity_kg'] for row in query_db(
+                f'''SELECT inventory_id, quantity_kg FROM food_inventory
+                    WHERE inventory_id IN ({_in(inventory_ids)})
+                    ORDER BY inventory_id FOR UPDATE''',
+                tuple(inventory_ids)
+            )}
+            taking = []
+            for pickup in unheld:
+                left = stock.get(pickup['inventory_id'], 0)
+                if left >= pickup['quantity']:
+                    stock[pickup['inventory_id']] = left - pickup['quantity']
+                    taking.append(pickup)
+                else:
+                    results[pickup['pickup_id']] = InsufficientStock('Not enough stock left for this request')
+            totals = _by_inventory(taking)
+            taken = tx.executemany(
+                '''UPDATE food_inventory
+                   SET quantity_kg = quantity_kg - %s
+                   WHERE inventory_id = %s AND quantity_kg >= %s''',
+                [(quantity, inventory_id, quantity) for inventory_id, quantity in sorted(totals.items())]
+            )
+            if taken != len(totals):
+                raise InsufficientStock('Inventory changed during approval')
+            approved += taking
+
+        if approved:
+            _set_status(tx, approved, 'approved')
+            results.update((pickup['pickup_id'], None) for pickup in approved)
+    return results
+
+def reject_pickup(pickup_id):
+    """Reject a pending pickup and return any stock it was holding"""
+    result = reject_pickups([pickup_id])[int(pickup_id)]
+    if result is not None:
+        raise result
+
+def reject_pickups(pickup_ids):
+    """
+    Reject pending pickups in one transaction, returning their held stock.
+    Returns {pickup_id: None on success, or the ReservationError}.
+    """
+    pickup_ids = sorted({int(pickup_id) for pickup_id in pickup_ids})
+    if not pickup_ids:
+        return {}
+    with transaction() as tx:
+        pending, results = _lock_pending(pickup_ids)
+        if pending:
+            holds = _take_holds(tx, [pickup['pickup_id'] for pickup in pending])
+            _restore(tx, _by_inventory(holds.values()))
+            _set_status(tx, pending, 'rejected')
+            results.update((pickup['pickup_id'], None) for pickup in pending)
+    return results
+
+def expire_reservations(limit=500):
+    """
+    Return the stock of holds past their expiry; returns how many were
+    released. Their pickups stay pending and take stock again on approval.
+    """
+    expired = query_db(
+        '''SELECT pickup_id FROM inventory_reservations
+           WHERE expires_at <= NOW()
+           ORDER BY expires_at LIMIT %s''',
+        (limit,),
+        primary=True
+    )
+    released = 0
+    for row in expired:
+        # One short transaction per hold; one approved meanwhile is skipped
+        with transaction() as tx:
+            holds = _take_holds(tx, [row['pickup_id']], expired_only=True)
+            _restore(tx, _by_inventory(holds.values()))
+            released += len(holds)
+    return released
+
+
+def start_expirer(app):
+    """
+    Release expired holds every RESERVATION_SWEEP_SECONDS on a daemon thread
+    (0 disables it; run ``python -m app.expire_reservations`` from cron
+    instead). Returns the thread's stop Event, or None when disabled.
+    """
+    interval = app.config.get('RESERVATION_SWEEP_SECONDS') or 0
+    if interval <= 0:
+        return None
+    stop = threading.Event()
+
+    def sweep():
+        while not stop.wait(interval):
+            try:
+                with app.app_context():
+                    expire_reservations()
+            except Exception as exc:
+                # Lock waits and outages are retried on the next sweep
+                print("Reservation expiry failed:", exc)
+
+    threading.Thread(target=sweep, name='reservation-expirer', daemon=True).start()
+    return stop
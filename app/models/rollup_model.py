@@ -0,0 +1,182 @@
+"""
+Rollup Model
+Daily rollup tables for donations, distributions and pickups.
+
+The create/update paths in the other models call these inside the same
+transaction as the row they write, so reports can read one row per day
+instead of scanning raw rows. rebuild_rollups() recomputes them from scratch.
+"""
+from app.database import transaction
+from app.utils.helpers import day_range
+
+# Shared by record_distribution and its async twin
+_FIRST_VISIT = '''INSERT IGNORE INTO daily_distribution_clients (day, client_id)
+                  SELECT DATE(distribution_date), client_id
+                  FROM distributions
+                  WHERE distribution_id = %s'''
+_DISTRIBUTION_DAY = '''INSERT INTO daily_distribution_rollup (day, num_distributions, total_weight, unique_clients)
+                       SELECT DATE(d.distribution_date), 1, d.weight_kg, %s
+                       FROM distributions d
+                       WHERE d.distribution_id = %s
+                       ON DUPLICATE KEY UPDATE num_distributions = num_distributions + 1,
+                                               total_weight = total_weight + d.weight_kg,
+                                               unique_clients = unique_clients + %s'''
+
+def record_donation(tx, donation_id):
+    """Add a newly inserted donation to its day/status bucket"""
+    tx.execute(
+        '''INSERT INTO daily_donation_rollup (day, status, num_donations, total_weight)
+           SELECT DATE(d.donation_date), d.status, 1, d.weight_kg
+           FROM donations d
+           WHERE d.donation_id = %s
+           ON DUPLICATE KEY UPDATE num_donations = num_donations + 1,
+                                   total_weight = total_weight + d.weight_kg''',
+        (donation_id,)
+    )
+
+def move_donation(tx, day, weight_kg, old_status, new_status):
+    """Move one donation between status buckets of the same day"""
+    tx.execute(
+        '''UPDATE daily_donation_rollup
+           SET num_donations = num_donations - 1, total_weight = total_weight - %s
+           WHERE day = %s AND status = %s''',
+        (weight_kg, day, old_status)
+    )
+    tx.execute(
+        '''INSERT INTO daily_donation_rollup (day, status, num_donations, total_weight)
+           VALUES (%s, %s, 1, %s)
+           ON DUPLICATE KEY UPDATE num_donations = num_donations + 1,
+                                   total_weight = total_weight + %s''',
+        (day, new_status, weight_kg, weight_kg)
+    )
+
+def record_distribution(tx, distribution_id):
+    """Add a newly inserted distribution to its day, counting first visits of the day once"""
+    new_client = tx.execute(_FIRST_VISIT, (distribution_id,))
+    tx.execute(_DISTRIBUTION_DAY, (new_client, distribution_id, new_client))
+
+async def record_distribution_async(tx, distribution_id):
+    """record_distribution inside an async_database.transaction() block"""
+    new_client = await tx.execute(_FIRST_VISIT, (distribution_id,))
+    await tx.execute(_DISTRIBUTION_DAY, (new_client, distribution_id, new_client))
+
+def record_distributions(tx, distributions):
+    """
+    record_distribution for a batch of new rows (dicts with client_id,
+    distribution_date and weight_kg): one INSERT IGNORE of first visits per
+    day, whose row count is that day's new unique clients, then one upsert.
+    """
+    days = {}
+    for row in distributions:
+        days.setdefault(row['distribution_date'].date(), []).append(row)
+    totals = []
+    for day, rows in sorted(days.items()):
+        new_clients = tx.executemany(
+            'INSERT IGNORE INTO daily_distribution_clients (day, client_id) VALUES (%s, %s)',
+            [(day, row['client_id']) for row in rows]
+        )
+        totals.append((day, len(rows), sum(row['weight_kg'] for row in rows), new_clients))
+    tx.executemany(
+        '''INSERT INTO daily_distribution_rollup (day, num_distributions, total_weight, unique_clients)
+           VALUES (%s, %s, %s, %s)
+           ON DUPLICATE KEY UPDATE num_distributions = num_distributions + VALUES(num_distributions),
+                                   total_weight = total_weight + VALUES(total_weight),
+                                   unique_clients = unique_clients + VALUES(unique_clients)''',
+        totals
+    )
+
+def record_pickup(tx, pickup_id):
+    """Add a newly inserted pickup to its day/status bucket"""
+    tx.execute(
+        '''INSERT INTO daily_pickup_rollup (day, status, num_pickups, total_quantity)
+           SELECT DATE(p.created_at), p.status, 1, p.quantity
+           FROM pickups p
+           WHERE p.pickup_id = %s
+           ON DUPLICATE KEY UPDATE num_pickups = num_pickups + 1,
+                                   total_quantity = total_quantity + p.quantity''',
+        (pickup_id,)
+    )
+
+def move_pickup(tx, day, quantity, old_status, new_status):
+    """Move one pickup between status buckets of the same day"""
+    tx.execute(
+        '''UPDATE daily_pickup_rollup
+           SET num_pickups = num_pickups - 1, total_quantity = total_quantity - %s
+           WHERE day = %s AND status = %s''',
+        (quantity, day, old_status)
+    )
+    tx.execute(
+        '''INSERT INTO daily_pickup_rollup (day, status, num_pickups, total_quantity)
+           VALUES (%s, %s, 1, %s)
+           ON DUPLICATE KEY UPDATE num_pickups = num_pickups + 1,
+                                   total_quantity = total_quantity + %s''',
+        (day, new_status, quantity, quantity)
+    )
+
+def move_pickups(tx, pickups, old_status, new_status):
+    """move_pickup for many pickups (dicts with day and quantity), one row per day"""
+    totals = {}
+    for pickup in pickups:
+        count, quantity = totals.get(pickup['day'], (0, 0))
+        totals[pickup['day']] = (count + 1, quantity + pickup['quantity'])
+    tx.executemany(
+        '''UPDATE daily_pickup_rollup
+           SET num_pickups = num_pickups - %s, total_quantity = total_quantity - %s
+           WHERE day = %s AND status = %s''',
+        [(count, quantity, day, old_status) for day, (count, quantity) in sorted(totals.items())]
+    )
+    tx.executemany(
+        '''INSERT INTO daily_pickup_rollup (day, status, num_pickups, total_quantity)
+           VALUES (%s, %s, %s, %s)
+           ON DUPLICATE KEY UPDATE num_pickups = num_pickups + VALUES(num_pickups),
+                                   total_quantity = total_quantity + VALUES(total_quantity)''',
+        [(day, new_status, count, quantity) for day, (count, quantity) in sorted(totals.items())]
+    )
+
+def rebuild_rollups(start_date=None, end_date=None):
+    """
+    Recompute every rollup table from the raw rows, optionally only for
+    days between start_date and end_date (inclusive). Runs as one transaction.
+    Raises ValueError when only one end of the range is given.
+    """
+    if bool(start_date) != bool(end_date):
+        raise ValueError('Give both start_date and end_date, or neither')
+    if start_date and end_date:
+        day_filter, day_args = 'WHERE day BETWEEN %s AND %s', (start_date, end_date)
+        raw_filter, args = 'WHERE {col} >= %s AND {col} < %s', day_range(start_date, end_date)
+    else:
+        day_filter, day_args = '', ()
+        raw_filter, args = '', ()
+
+    with transaction() as tx:
+        for table in ('daily_donation_rollup', 'daily_distribution_rollup',
+                      'daily_distribution_clients', 'daily_pickup_rollup'):
+            tx.execute(f'DELETE FROM {table} {day_filter}', day_args)
+
+        tx.execute(
+            f'''INSERT INTO daily_donation_rollup (day, status, num_donations, total_weight)
+                SELECT DATE(donation_date), status, COUNT(*), SUM(weight_kg)
+                FROM donations {raw_filter.format(col='donation_date')}
+                GROUP BY DATE(donation_date), status''',
+            args
+        )
+        tx.execute(
+            f'''INSERT INTO daily_distribution_clients (day, client_id)
+                SELECT DISTINCT DATE(distribution_date), client_id
+                FROM distributions {raw_filter.format(col='distribution_date')}''',
+            args
+        )
+        tx.execute(
+            f'''INSERT INTO daily_distribution_rollup (day, num_distributions, total_weight, unique_clients)
+                SELECT DATE(distribution_date), COUNT(*), SUM(weight_kg), COUNT(DISTINCT client_id)
+                FROM distributions {raw_filter.format(col='distribution_date')}
+                GROUP BY DATE(distribution_date)''',
+            args
+        )
+        tx.execute(
+            f'''INSERT INTO daily_pickup_rollup (day, status, num_pickups, total_quantity)
+                SELECT DATE(created_at), status, COUNT(*), SUM(quantity)
+                FROM pickups {raw_filter.format(col='created_at')}
+                GROUP BY DATE(created_at), status''',
+            args
+        )
@@ -0,0 +1,86 @@
+"""
+Sequence Model
+Atomic per-location client number allocation (client_number_sequences)
+"""
+import os
+import re
+import threading
+
+from flask import current_app
+from app.database import query_db, get_pool
+
+# Location codes become part of the client number, e.g. FL-001
+LOCATION_CODE = re.compile(r'^[A-Z0-9]{1,10}$')
+
+# One statement both creates a location's row and bumps an existing one;
+# LAST_INSERT_ID(expr) hands the new value back on this connection only, so
+# concurrent allocations never see each other's numbers.
+_ALLOCATE = '''INSERT INTO client_number_sequences (location_code, last_value)
+               VALUES (%s, LAST_INSERT_ID(%s))
+               ON DUPLICATE KEY UPDATE last_value = LAST_INSERT_ID(last_value + %s)'''
+
+# location -> [next_value, last_value] of the block this worker prefetched
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def _reset_blocks():
+    """A forked worker must not hand out numbers from its parent's blocks"""
+    _blocks.clear()
+
+if hasattr(os, 'register_at_fork'):     # not available on Windows
+    os.register_at_fork(after_in_child=_reset_blocks)
+
+
+def format_client_number(location_code, value):
+    """FL, 7 -> FL-007"""
+    return f'{location_code}-{value:03d}'
+
+def allocate_client_number(location_code):
+    """Next client number for a location, e.g. FL-042 (see allocate_client_numbers)"""
+    return allocate_client_numbers(location_code, 1)[0]
+
+def allocate_client_numbers(location_code, count):
+    """
+    The next ``count`` client numbers for a location, in order.
+
+    With CLIENT_NUMBER_BLOCK_SIZE = 1 (default) the numbers are reserved in the
+    caller's transaction: concurrent verifications for the same location
+    queue on the sequence row, and a rollback returns the numbers. Larger
+    blocks are reserved and committed up front on a separate connection and
+    handed out from memory; numbers left in a block when the worker exits
+    are skipped.
+    """
+    if not LOCATION_CODE.match(location_code or ''):
+        raise ValueError('Location code must be 1-10 letters or digits')
+
+    block_size = current_app.config['CLIENT_NUMBER_BLOCK_SIZE']
+    if block_size <= 1:
+        # One statement reserves the whole run
+        last = query_db(_ALLOCATE, (location_code, count, count), commit=True)
+        return [format_client_number(location_code, value)
+                for value in range(last - count + 1, last + 1)]
+
+    values = []
+    with _blocks_lock:
+        while len(values) < count:
+            block = _blocks.get(location_code)
+            if block is None or block[0] > block[1]:
+                last = _reserve_block(location_code, block_size)
+                block = _blocks[location_code] = [last - block_size + 1, last]
+            values.append(block[0])
+            block[0] += 1
+    return [format_client_number(location_code, value) for value in values]
+
+def _reserve_block(location_code, block_size):
+    """Commit a block of block_size numbers on its own connection; returns the last one"""
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(_ALLOCATE, (location_code, block_size, block_size))
+            last = cursor.lastrowid
+        conn.commit()
+    finally:
+        pool.release(conn)
+    return last
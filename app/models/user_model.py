@@ -2,7 +2,11 @@
 User Model
 User CRUD operations
 """
+from app import async_database
 from app.database import query_db
+from app.utils.pagination import keyset_page
+from app.models.client_model import invalidate_client
+from app.utils.client_index import reindex_clients
 
 def get_user_by_id(user_id):
     """Get user by ID"""
@@ -20,6 +24,14 @@ def get_user_by_email(email):
         one=True
     )
 
+async def get_user_by_email_async(email):
+    """get_user_by_email on the async pool"""
+    return await async_database.query_db(
+        'SELECT * FROM users WHERE email = %s',
+        (email,),
+        one=True
+    )
+
 def create_user(email, password_hash, full_name, phone, role, is_active=False):
     """Create a new user"""
     return query_db(
@@ -45,15 +57,31 @@ def update_user(user_id, **kwargs):
     
     values.append(user_id)
     query = f"UPDATE users SET {', '.join(updates)} WHERE user_id = %s"
-    return query_db(query, tuple(values), commit=True)
-
-def get_all_users(role=None):
-    """Get all users, optionally filtered by role"""
-    if role:
-        return query_db(
-            'SELECT * FROM users WHERE role = %s ORDER BY created_at DESC',
-            (role,)
-        )
-    return query_db('SELECT * FROM users ORDER BY created_at DESC')
+    result = query_db(query, tuple(values), commit=True)
+    invalidate_client(user_id=user_id)
+    reindex_clients(user_ids=[user_id])
+    return result
+
+def get_all_users(role=None, after=None, before=None, per_page=None):
+    """Get one page of users, newest first, optionally filtered by role"""
+    return keyset_page(
+        'SELECT * FROM users',
+        'role = %s' if role else '', (role,) if role else (),
+        ('created_at', 'user_id'),
+        after=after, before=before, per_page=per_page
+    )
+
+def get_users_with_client_status(after=None, before=None, per_page=None):
+    """Get one page of users with client number/verification status, newest first"""
+    return keyset_page(
+        '''SELECT u.*, 
+                  CASE WHEN u.role = 'client' THEN c.verification_status ELSE NULL END as verification_status,
+                  CASE WHEN u.role = 'client' THEN c.client_number ELSE NULL END as client_number
+           FROM users u
+           LEFT JOIN clients c ON u.user_id = c.user_id''',
+        '', (),
+        ('u.created_at', 'u.user_id'),
+        after=after, before=before, per_page=per_page
+    )
 
 
@@ -2,7 +2,12 @@
 Volunteer Model
 Volunteer activity tracking
 """
-from app.database import query_db
+import pymysql
+
+from app import async_database
+from app.database import query_db, transaction
+from app.models import rollup_model
+from app.utils.helpers import day_range
 
 def get_volunteer_stats(volunteer_id, start_date=None, end_date=None):
     """Get volunteer statistics"""
@@ -14,9 +19,9 @@ def get_volunteer_stats(volunteer_id, start_date=None, end_date=None):
                    COUNT(DISTINCT DATE(d.donation_date)) as active_days
                FROM users u
                LEFT JOIN donations d ON u.user_id = d.volunteer_id
-                  AND DATE(d.donation_date) BETWEEN %s AND %s
+                  AND d.donation_date >= %s AND d.donation_date < %s
                WHERE u.user_id = %s AND u.role = "volunteer"''',
-            (start_date, end_date, volunteer_id),
+            day_range(start_date, end_date) + (volunteer_id,),
             one=True
         )
     else:
@@ -35,33 +40,27 @@ def get_volunteer_stats(volunteer_id, start_date=None, end_date=None):
 def get_all_volunteers_activity(start_date=None, end_date=None):
     """Get activity for all volunteers"""
     if start_date and end_date:
-        return query_db(
-            '''SELECT 
-                   u.user_id,
-                   u.full_name,
-                   COUNT(d.donation_id) as num_pickups,
-                   COALESCE(SUM(d.weight_kg), 0) as total_rescued
-               FROM users u
-               LEFT JOIN donations d ON u.user_id = d.volunteer_id
-                  AND DATE(d.donation_date) BETWEEN %s AND %s
-               WHERE u.role = "volunteer"
-               GROUP BY u.user_id
-               ORDER BY total_rescued DESC''',
-            (start_date, end_date)
-        )
+        date_filter, args = 'WHERE donation_date >= %s AND donation_date < %s', day_range(start_date, end_date)
     else:
-        return query_db(
-            '''SELECT 
-                   u.user_id,
-                   u.full_name,
-                   COUNT(d.donation_id) as num_pickups,
-                   COALESCE(SUM(d.weight_kg), 0) as total_rescued
-               FROM users u
-               LEFT JOIN donations d ON u.user_id = d.volunteer_id
-               WHERE u.role = "volunteer"
-               GROUP BY u.user_id
-               ORDER BY total_rescued DESC'''
-        )
+        date_filter, args = '', ()
+    # Aggregate donations per volunteer first, then attach names
+    return query_db(
+        f'''SELECT 
+               u.user_id,
+               u.full_name,
+               COALESCE(d.num_pickups, 0) as num_pickups,
+               COALESCE(d.total_rescued, 0) as total_rescued
+           FROM users u
+           LEFT JOIN (SELECT volunteer_id,
+                             COUNT(*) as num_pickups,
+                             SUM(weight_kg) as total_rescued
+                      FROM donations
+                      {date_filter}
+                      GROUP BY volunteer_id) d ON d.volunteer_id = u.user_id
+           WHERE u.role = "volunteer"
+           ORDER BY total_rescued DESC''',
+        args
+    )
 
 def create_volunteer_schedule(volunteer_id, schedule_date, start_time, end_time, status='scheduled', notes=''):
     """Create a volunteer schedule"""
@@ -90,16 +89,84 @@ def get_volunteer_schedules(volunteer_id, start_date=None, end_date=None):
             (volunteer_id,)
         )
 
+_INSERT_DISTRIBUTION = '''INSERT INTO distributions (client_id, volunteer_id, distribution_date, weight_kg,
+                                                   items_description, client_signature, notes)
+                          VALUES (%s, %s, %s, %s, %s, %s, %s)'''
+
 def create_distribution(client_id, volunteer_id, distribution_date, weight_kg, 
                        items_description, client_signature=False, notes=''):
     """Create a distribution record"""
-    return query_db(
-        '''INSERT INTO distributions (client_id, volunteer_id, distribution_date, weight_kg, 
-                                     items_description, client_signature, notes)
-           VALUES (%s, %s, %s, %s, %s, %s, %s)''',
-        (client_id, volunteer_id, distribution_date, weight_kg, items_description, 
-         client_signature, notes),
-        commit=True
+    with transaction() as tx:
+        distribution_id = query_db(
+            _INSERT_DISTRIBUTION,
+            (client_id, volunteer_id, distribution_date, weight_kg, items_description, 
+             client_signature, notes),
+            commit=True
+        )
+        rollup_model.record_distribution(tx, distribution_id)
+    return distribution_id
+
+async def create_distribution_async(client_id, volunteer_id, distribution_date, weight_kg,
+                                    items_description, client_signature=False, notes=''):
+    """create_distribution on the async pool"""
+    async with async_database.transaction() as tx:
+        await tx.execute(
+            _INSERT_DISTRIBUTION,
+            (client_id, volunteer_id, distribution_date, weight_kg, items_description,
+             client_signature, notes)
+        )
+        distribution_id = tx.lastrowid
+        await rollup_model.record_distribution_async(tx, distribution_id)
+    return distribution_id
+
+def _synced_keys(volunteer_id, keys):
+    """{sync_key: distribution_id} for keys this volunteer already recorded"""
+    rows = query_db(
+        f'''SELECT sync_key, distribution_id FROM distributions
+            WHERE volunteer_id = %s AND sync_key IN ({', '.join(['%s'] * len(keys))})''',
+        (volunteer_id,) + tuple(keys),
+        primary=True
     )
+    return {row['sync_key']: row['distribution_id'] for row in rows}
+
+def record_synced_distributions(volunteer_id, distributions):
+    """
+    Record sign-ins queued offline by a volunteer's device, in one
+    transaction with one multi-row INSERT. Each dict carries a client
+    generated sync_key plus client_id, distribution_date, weight_kg,
+    items_description and notes; keys already recorded are skipped, so a
+    device can resend a batch safely.
+
+    Returns {sync_key: (distribution_id, created)}.
+    """
+    if not distributions:
+        return {}
+    keys = [row['sync_key'] for row in distributions]
+    for attempt in (1, 2):
+        try:
+            with transaction() as tx:
+                existing = _synced_keys(volunteer_id, keys)
+                new = [row for row in distributions if row['sync_key'] not in existing]
+                tx.executemany(
+                    '''INSERT INTO distributions (client_id, volunteer_id, distribution_date, weight_kg,
+                                                items_description, client_signature, notes, sync_key)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s)''',
+                    [(row['client_id'], volunteer_id, row['distribution_date'], row['weight_kg'],
+                      row['items_description'], True, row['notes'], row['sync_key']) for row in new]
+                )
+                if new:
+                    rollup_model.record_distributions(tx, new)
+                    created = _synced_keys(volunteer_id, [row['sync_key'] for row in new])
+                else:
+                    created = {}
+            break
+        except pymysql.err.IntegrityError as exc:
+            # The same batch arriving twice at once: the retry sees the
+            # other request's rows as already recorded
+            if attempt == 2 or exc.args[0] != 1062:
+                raise
+    results = {key: (distribution_id, False) for key, distribution_id in existing.items()}
+    results.update((key, (distribution_id, True)) for key, distribution_id in created.items())
+    return results
 
 
@@ -0,0 +1,31 @@
+"""
+Utility to rebuild (or backfill) the daily rollup tables from raw rows.
+Run after loading data outside the app, or once after upgrading:
+
+    python -m app.rebuild_rollups                          # everything
+    python -m app.rebuild_rollups 2025-01-01 2025-12-31    # only these days
+"""
+import sys
+
+from app import create_app
+from app.models.rollup_model import rebuild_rollups
+from app.models.report_job_model import clear_report_results
+
+
+def main(argv):
+    if len(argv) not in (0, 2):
+        print(__doc__)
+        return 1
+
+    app = create_app()
+    with app.app_context():
+        print("Rebuilding daily rollups" + (f" for {argv[0]}..{argv[1]}" if argv else "") + "...")
+        rebuild_rollups(*argv)
+        # Cached report results may have been computed from the old rollups
+        clear_report_results()
+    print("Rollups rebuilt successfully.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
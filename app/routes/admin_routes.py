@@ -2,13 +2,25 @@
 Admin Routes
 Dashboard, user management, verification, and reports
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
-from app.database import query_db
+import json
+import uuid
+
+from flask import Blueprint, Response, stream_with_context, render_template, request, redirect, url_for, flash, jsonify, session, current_app
+from app.database import query_db, get_pool, get_replicas
 from app.utils.decorators import admin_required
-from app.models.report_model import get_dashboard_stats, get_donation_summary, get_volunteer_performance_report
-from app.models.client_model import get_pending_clients
-from datetime import datetime
-from app.models import pickup_model
+from app.utils.helpers import local_today, day_range
+from app.utils.pagination import page_args
+from app.models.report_model import (get_dashboard_stats, get_donation_summary, get_volunteer_performance_report,
+                                     REPORT_EXPORTS)
+from app.models.client_model import (get_pending_clients, get_clients_for_cards,
+                                     approve_clients, reject_clients)
+from app.models.user_model import get_users_with_client_status
+from app.models import pickup_model, reservation_model, report_job_model
+from app.models.sequence_model import LOCATION_CODE
+from app.utils.query_stats import get_query_stats
+from app.utils.cache import cache_stats
+from app.utils.qr_cards import attach_qr_data, stream_pdf, stream_zip, track_export, get_export_progress
+from app.utils.report_export import EXPORT_FORMATS, stream_export
 
 
 admin_bp = Blueprint('admin', __name__)
@@ -34,7 +46,7 @@ def dashboard():
 @admin_required
 def verify_clients():
     """List pending client verifications"""
-    pending_clients = get_pending_clients()
+    pending_clients = get_pending_clients(**page_args())
     return render_template('admin/verify_clients.html', clients=pending_clients)
 
 @admin_bp.route('/verify-client/<int:client_id>', methods=['GET', 'POST'])
@@ -46,56 +58,25 @@ def verify_client(client_id):
         
         if action == 'approve':
             # Get location for client number
-            location_code = request.form.get('location_code', 'FL')
-            
-            # Get next client number for this location
-            last_client = query_db(
-                'SELECT client_number FROM clients WHERE client_number LIKE %s ORDER BY client_number DESC LIMIT 1',
-                (f'{location_code}-%',),
-                one=True
-            )
+            location_code = (request.form.get('location_code') or current_app.config['CLIENT_NUMBER_PREFIX']).strip().upper()
+            if not LOCATION_CODE.match(location_code):
+                flash('Location code must be 1-10 letters or digits', 'danger')
+                return redirect(url_for('admin.verify_clients'))
             
-            if last_client:
-                try:
-                    last_num = int(last_client['client_number'].split('-')[1])
-                    next_num = last_num + 1
-                except:
-                    next_num = 1
+            # Number the client from this location's sequence and activate the account
+            client_number = approve_clients([client_id], location_code, session.get('user_id'))[client_id]
+            if isinstance(client_number, Exception):
+                flash(f'Client not verified: {client_number}', 'danger')
             else:
-                next_num = 1
-            
-            client_number = f'{location_code}-{next_num:03d}'
-            
-            # Get user_id for this client
-            client = query_db('SELECT user_id FROM clients WHERE client_id = %s', (client_id,), one=True)
-            
-            if client:
-                # Update client
-                query_db(
-                    '''UPDATE clients SET verification_status = "verified", 
-                       client_number = %s, verified_date = NOW(), verified_by = %s
-                       WHERE client_id = %s''',
-                    (client_number, session.get('user_id'), client_id),
-                    commit=True
-                )
-                
-                # Activate user account
-                query_db(
-                    'UPDATE users SET is_active = 1 WHERE user_id = %s',
-                    (client['user_id'],),
-                    commit=True
-                )
-                
                 flash(f'Client verified successfully! Client Number: {client_number}', 'success')
         
         elif action == 'reject':
             reason = request.form.get('reason', 'Incomplete information')
-            query_db(
-                'UPDATE clients SET verification_status = "rejected", notes = %s WHERE client_id = %s',
-                (reason, client_id),
-                commit=True
-            )
-            flash(f'Client verification rejected: {reason}', 'info')
+            result = reject_clients([client_id], reason)[client_id]
+            if isinstance(result, Exception):
+                flash(f'Client not rejected: {result}', 'danger')
+            else:
+                flash(f'Client verification rejected: {reason}', 'info')
         
         return redirect(url_for('admin.verify_clients'))
     
@@ -115,18 +96,31 @@ def verify_client(client_id):
     
     return render_template('admin/verify_clients.html', client=client)
 
+@admin_bp.route('/verify-clients/bulk', methods=['POST'])
+@admin_required
+def bulk_verify_clients():
+    """Approve or reject many pending clients in one transaction"""
+    client_ids, data = _bulk_request('client_ids')
+    if client_ids is None:
+        return _bulk_error('Select between 1 and {limit} clients', 'admin.verify_clients')
+
+    action = data.get('action')
+    if action == 'approve':
+        location_code = (data.get('location_code') or current_app.config['CLIENT_NUMBER_PREFIX']).strip().upper()
+        if not LOCATION_CODE.match(location_code):
+            return _bulk_error('Location code must be 1-10 letters or digits', 'admin.verify_clients')
+        results = approve_clients(client_ids, location_code, session.get('user_id'))
+        return _bulk_response(results, 'Verified', 'client', 'admin.verify_clients', value_key='client_number')
+    if action == 'reject':
+        results = reject_clients(client_ids, data.get('reason') or 'Incomplete information')
+        return _bulk_response(results, 'Rejected', 'client', 'admin.verify_clients')
+    return _bulk_error('Unknown action', 'admin.verify_clients')
+
 @admin_bp.route('/manage-users')
 @admin_required
 def manage_users():
     """Manage all users"""
-    users = query_db(
-        '''SELECT u.*, 
-                  CASE WHEN u.role = 'client' THEN c.verification_status ELSE NULL END as verification_status,
-                  CASE WHEN u.role = 'client' THEN c.client_number ELSE NULL END as client_number
-           FROM users u
-           LEFT JOIN clients c ON u.user_id = c.user_id
-           ORDER BY u.created_at DESC'''
-    )
+    users = get_users_with_client_status(**page_args())
     return render_template('admin/manage_users.html', users=users)
 
 @admin_bp.route('/reports')
@@ -134,58 +128,174 @@ def manage_users():
 def reports():
     """Generate and view reports"""
     # Get date range from query params
-    start_date = request.args.get('start_date', datetime.now().strftime('%Y-%m-%d'))
-    end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
-    
-    # Donation summary
-    donation_summary = get_donation_summary(start_date, end_date)
-    
-    # Volunteer activity
-    volunteer_activity = get_volunteer_performance_report(start_date, end_date)
-    
+    start_date = request.args.get('start_date', local_today().strftime('%Y-%m-%d'))
+    end_date = request.args.get('end_date', local_today().strftime('%Y-%m-%d'))
+    try:
+        start, end = day_range(start_date, end_date)
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format', 'danger')
+        return redirect(url_for('admin.reports'))
+    pending_jobs, finished_jobs = [], []
+
+    if (end - start).days <= current_app.config['REPORT_INLINE_MAX_DAYS']:
+        # Donation summary
+        donation_summary = get_donation_summary(start_date, end_date)
+
+        # Volunteer activity
+        volunteer_activity = get_volunteer_performance_report(start_date, end_date)
+    else:
+        # Long ranges are computed by background jobs; the page polls them
+        # and reloads with ?job=<id> once they have finished
+        results = {}
+        job_ids = request.args.getlist('job', type=int)[:10]
+        for report in ('donation-summary', 'volunteer-performance'):
+            job = (report_job_model.get_finished_job(job_ids, report, start_date, end_date)
+                   or report_job_model.submit_report_job(report, start_date, end_date, session.get('user_id')))
+            rows = report_job_model.load_report_result(job['job_id']) if job['status'] == 'done' else None
+            if rows is None:
+                pending_jobs.append(job)
+            else:
+                results[report] = rows
+                finished_jobs.append(job)
+        donation_summary = results.get('donation-summary')
+        volunteer_activity = results.get('volunteer-performance')
+
     return render_template('admin/reports.html',
                           donation_summary=donation_summary,
                           volunteer_activity=volunteer_activity,
+                          pending_jobs=pending_jobs,
+                          finished_jobs=finished_jobs,
+                          export_reports=REPORT_EXPORTS,
                           start_date=start_date,
                           end_date=end_date)
 
+@admin_bp.route('/reports/<report>/export')
+@admin_required
+def export_report(report):
+    """
+    Download a report as CSV (or ?format=xlsx). Rows are streamed from a
+    server-side cursor into the chunked response, so long date ranges are
+    never held in memory.
+    """
+    today = local_today().strftime('%Y-%m-%d')
+    start_date = request.args.get('start_date', today)
+    end_date = request.args.get('end_date', today)
+    export_format = request.args.get('format', 'csv')
+    if report not in REPORT_EXPORTS or export_format not in EXPORT_FORMATS:
+        flash('Unknown report or export format', 'danger')
+        return redirect(url_for('admin.reports', start_date=start_date, end_date=end_date))
+    try:
+        day_range(start_date, end_date)
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format', 'danger')
+        return redirect(url_for('admin.reports'))
+
+    rows, columns, dated = REPORT_EXPORTS[report]
+    title = report.replace('-', ' ').title()
+    body = stream_export(export_format, columns, rows(start_date, end_date), title=title)
+    filename = f'{report}_{start_date}_{end_date}' if dated else f'{report}_{today}'
+
+    # No Content-Length: the body goes out with chunked transfer encoding
+    response = Response(stream_with_context(body), content_type=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{export_format}'
+    return response
+
+@admin_bp.route('/reports/jobs', methods=['POST'])
+@admin_required
+def submit_report_job():
+    """
+    Start (or reuse) a background job for a report, posted as a form or
+    JSON with report, start_date and end_date. Poll the returned status_url
+    until the job is done, then fetch a download_url.
+    """
+    data = request.get_json(silent=True) if request.is_json else request.form
+    if not hasattr(data, 'get'):
+        data = {}
+    report = data.get('report')
+    today = local_today().strftime('%Y-%m-%d')
+    start_date = data.get('start_date') or today
+    end_date = data.get('end_date') or today
+    if report not in REPORT_EXPORTS:
+        return jsonify({'success': False, 'message': 'Unknown report'}), 400
+    try:
+        day_range(start_date, end_date)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Dates must be in YYYY-MM-DD format'}), 400
+    if not REPORT_EXPORTS[report][2]:
+        start_date = end_date = today
+
+    job = report_job_model.submit_report_job(report, start_date, end_date, session.get('user_id'))
+    return jsonify(_report_job_json(job)), 200 if job['status'] == 'done' else 202
+
+
+@admin_bp.route('/reports/jobs/<int:job_id>')
+@admin_required
+def report_job_status(job_id):
+    """Status of a background report job"""
+    job = report_job_model.get_report_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown report job'}), 404
+    return jsonify(_report_job_json(job)), 200
+
+
+@admin_bp.route('/reports/jobs/<int:job_id>/download')
+@admin_required
+def download_report_job(job_id):
+    """Download a finished job's result as CSV (or ?format=xlsx)"""
+    job = report_job_model.get_report_job(job_id)
+    export_format = request.args.get('format', 'csv')
+    rows = report_job_model.load_report_result(job_id) if job else None
+    if rows is None or export_format not in EXPORT_FORMATS:
+        flash('That report is not ready, or the format is unknown', 'warning')
+        return redirect(url_for('admin.reports'))
+
+    _, columns, _ = REPORT_EXPORTS[job['report']]
+    params = json.loads(job['params'])
+    title = job['report'].replace('-', ' ').title()
+    response = Response(stream_export(export_format, columns, rows, title=title),
+                        content_type=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = (f"attachment; filename={job['report']}_{params['start_date']}"
+                                               f"_{params['end_date']}.{export_format}")
+    return response
+
+
+def _report_job_json(job):
+    """API view of a report job row"""
+    body = {
+        'success': True,
+        'job_id': job['job_id'],
+        'report': job['report'],
+        'params': json.loads(job['params']),
+        'status': job['status'],
+        'row_count': job['row_count'],
+        'error': job['error'],
+        'status_url': url_for('admin.report_job_status', job_id=job['job_id']),
+    }
+    if job['status'] == 'done':
+        body['download_urls'] = {export_format: url_for('admin.download_report_job', job_id=job['job_id'],
+                                                        format=export_format)
+                                 for export_format in EXPORT_FORMATS}
+    return body
+
 
 @admin_bp.route('/pickups')
 @admin_required
 def manage_pickups():
     """View all pickup requests"""
-    pickups = query_db(
-        '''SELECT p.*, u.full_name as user_name, f.food_category
-           FROM pickups p
-           JOIN users u ON p.user_id = u.user_id
-           JOIN food_inventory f ON p.inventory_id = f.inventory_id
-           ORDER BY p.created_at DESC'''
-    )
+    pickups = pickup_model.get_all_pickups(**page_args())
     return render_template('admin/manage_pickups.html', pickups=pickups)
 
 
 @admin_bp.route('/pickup/<int:pickup_id>/approve', methods=['POST'])
 @admin_required
 def approve_pickup(pickup_id):
-    """Approve a pickup request and deduct inventory"""
-    # get pickup record
-    pickup = pickup_model.get_pickup_by_id(pickup_id)
-    if not pickup:
-        flash('Pickup not found', 'danger')
-        return redirect(url_for('admin.manage_pickups'))
-
-    # delete in inventory 
-    query_db(
-        '''UPDATE food_inventory 
-           SET quantity_kg = quantity_kg - %s 
-           WHERE inventory_id = %s AND quantity_kg >= %s''',
-        (pickup['quantity'], pickup['inventory_id'], pickup['quantity']),
-        commit=True
-    )
-
-    # update status
-    pickup_model.update_pickup_status(pickup_id, 'approved')
-    flash('Pickup approved and inventory updated!', 'success')
+    """Approve a pickup request, consuming its inventory hold"""
+    try:
+        reservation_model.approve_pickup(pickup_id)
+    except reservation_model.ReservationError as e:
+        flash(f'Pickup not approved: {e}', 'danger')
+    else:
+        flash('Pickup approved and inventory updated!', 'success')
     return redirect(url_for('admin.manage_pickups'))
 
 
@@ -194,6 +304,157 @@ def approve_pickup(pickup_id):
 def reject_pickup(pickup_id):
     """Reject a pickup request"""
     reason = request.form.get('reason', 'Not specified')
-    pickup_model.update_pickup_status(pickup_id, 'rejected')
-    flash(f'Pickup request rejected: {reason}', 'info')
+    try:
+        reservation_model.reject_pickup(pickup_id)
+    except reservation_model.ReservationError as e:
+        flash(f'Pickup not rejected: {e}', 'danger')
+    else:
+        flash(f'Pickup request rejected: {reason}', 'info')
     return redirect(url_for('admin.manage_pickups'))
+
+
+@admin_bp.route('/pickups/bulk', methods=['POST'])
+@admin_required
+def bulk_pickups():
+    """Approve or reject many pickup requests in one transaction"""
+    pickup_ids, data = _bulk_request('pickup_ids')
+    if pickup_ids is None:
+        return _bulk_error('Select between 1 and {limit} pickups', 'admin.manage_pickups')
+
+    action = data.get('action')
+    if action == 'approve':
+        return _bulk_response(reservation_model.approve_pickups(pickup_ids),
+                              'Approved', 'pickup', 'admin.manage_pickups')
+    if action == 'reject':
+        return _bulk_response(reservation_model.reject_pickups(pickup_ids),
+                              'Rejected', 'pickup', 'admin.manage_pickups')
+    return _bulk_error('Unknown action', 'admin.manage_pickups')
+
+
+def _bulk_request(field):
+    """
+    Selected ids and the other fields of a bulk action, posted as a form
+    (checkboxes named ``field``) or as JSON. ids is None when missing,
+    malformed or over BULK_ACTION_MAX.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        raw_ids = data.get(field) if isinstance(data, dict) else None
+    else:
+        data = request.form
+        raw_ids = request.form.getlist(field)
+    if not isinstance(raw_ids, list) or not 0 < len(raw_ids) <= current_app.config['BULK_ACTION_MAX']:
+        return None, data
+    try:
+        return [int(item_id) for item_id in raw_ids], data
+    except (TypeError, ValueError):
+        return None, data
+
+def _bulk_error(message, endpoint):
+    message = message.format(limit=current_app.config['BULK_ACTION_MAX'])
+    if request.is_json:
+        return jsonify({'success': False, 'message': message}), 400
+    flash(message, 'danger')
+    return redirect(url_for(endpoint))
+
+def _bulk_response(results, verb, noun, endpoint, value_key=None):
+    """
+    Report {id: value or exception} from a bulk action: per-item JSON for API
+    callers, or a summary plus one flash per failure on the admin pages.
+    """
+    items = []
+    for item_id, result in sorted(results.items()):
+        item = {'id': item_id, 'success': not isinstance(result, Exception)}
+        if not item['success']:
+            item['message'] = str(result)
+        elif value_key:
+            item[value_key] = result
+        items.append(item)
+    succeeded = sum(item['success'] for item in items)
+
+    if request.is_json:
+        return jsonify({'success': True, 'succeeded': succeeded,
+                        'failed': len(items) - succeeded, 'results': items}), 200
+
+    flash(f'{verb} {succeeded} of {len(items)} {noun}(s)',
+          'success' if succeeded == len(items) else 'warning')
+    failures = [item for item in items if not item['success']]
+    for item in failures[:10]:
+        flash(f"{noun.capitalize()} #{item['id']}: {item['message']}", 'danger')
+    if len(failures) > 10:
+        flash(f'...and {len(failures) - 10} more', 'danger')
+    return redirect(url_for(endpoint))
+
+
+@admin_bp.route('/query-stats')
+@admin_required
+def query_stats():
+    """Aggregated per-route and per-statement query timings since startup (this worker)"""
+    if 'query_stats' not in current_app.extensions:
+        return jsonify({'success': False, 'message': 'Query instrumentation is disabled'}), 404
+
+    stats = get_query_stats().snapshot()
+    stats['pool'] = get_pool().stats()
+    replicas = get_replicas()
+    if replicas is not None:
+        stats['replicas'] = replicas.stats()
+    return jsonify(stats), 200
+
+
+@admin_bp.route('/cache-stats')
+@admin_required
+def cache_statistics():
+    """Size and hit/miss counters of every in-process cache (this worker)"""
+    return jsonify(cache_stats()), 200
+
+
+@admin_bp.route('/qr-cards', methods=['GET', 'POST'])
+@admin_required
+def qr_cards():
+    """Export printable QR cards for verified clients as a ZIP of PNGs or a PDF sheet"""
+    if request.method == 'GET':
+        return render_template('admin/qr_cards.html')
+
+    client_numbers = [n.strip() for n in request.form.get('client_numbers', '').replace(',', ' ').split() if n.strip()]
+    verified_from = request.form.get('verified_from') or None
+    verified_to = request.form.get('verified_to') or None
+    if verified_from or verified_to:
+        try:
+            day_range(verified_from or verified_to, verified_to or verified_from)
+        except ValueError:
+            flash('Dates must be in YYYY-MM-DD format', 'danger')
+            return redirect(url_for('admin.qr_cards'))
+    clients = get_clients_for_cards(
+        location=request.form.get('location', '').strip() or None,
+        verified_from=verified_from,
+        verified_to=verified_to,
+        client_numbers=client_numbers or None,
+    )
+    if not clients:
+        flash('No verified clients match those filters', 'warning')
+        return redirect(url_for('admin.qr_cards'))
+    attach_qr_data(clients)
+
+    export_id = request.form.get('export_id') or uuid.uuid4().hex
+    progress = track_export(export_id, len(clients))
+    processes = current_app.config['QR_EXPORT_PROCESSES']
+    if request.form.get('format') == 'pdf':
+        body, mimetype, filename = stream_pdf(clients, progress, processes), 'application/pdf', 'qr-cards.pdf'
+    else:
+        body, mimetype, filename = stream_zip(clients, progress, processes), 'application/zip', 'qr-cards.zip'
+
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Export-Id'] = export_id
+    response.headers['X-Total-Cards'] = str(len(clients))
+    return response
+
+
+@admin_bp.route('/qr-cards/progress/<export_id>')
+@admin_required
+def qr_cards_progress(export_id):
+    """Cards rendered so far for an export running in this worker"""
+    progress = get_export_progress(export_id)
+    if progress is None:
+        return jsonify({'success': False, 'message': 'Unknown export'}), 404
+    return jsonify({'success': True, **progress}), 200
@@ -3,7 +3,9 @@ Authentication Routes
 Handles login, logout, and registration
 """
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from app.database import query_db
+from app.database import query_db, transaction
+from app.models.user_model import create_user, get_user_by_email_async
+from app.models.client_model import create_client
 from app.utils.security import hash_password, verify_password, validate_password, validate_email, validate_phone
 
 auth_bp = Blueprint('auth', __name__)
@@ -21,31 +23,43 @@ def login():
             (email,),
             one=True
         )
+        return _log_in(user, password)
+    
+    return render_template('auth/login.html')
+
+async def login_async():
+    """login on the async pool; installed in place of it under ASGI (app/asgi.py)"""
+    if request.method == 'POST':
+        user = await get_user_by_email_async(request.form.get('email'))
+        return _log_in(user, request.form.get('password'))
+    
+    return render_template('auth/login.html')
+
+def _log_in(user, password):
+    """Start a session for user if the password matches; response for the login POST"""
+    if user and verify_password(password, user['password_hash']):
+        if not user['is_active']:
+            flash('Your account is inactive. Please contact an administrator.', 'warning')
+            return render_template('auth/login.html')
         
-        if user and verify_password(password, user['password_hash']):
-            if not user['is_active']:
-                flash('Your account is inactive. Please contact an administrator.', 'warning')
-                return render_template('auth/login.html')
-            
-            # Set session variables
-            session.permanent = True
-            session['user_id'] = user['user_id']
-            session['email'] = user['email']
-            session['role'] = user['role']
-            session['full_name'] = user['full_name']
-            
-            flash(f'Welcome back, {user["full_name"]}!', 'success')
-            
-            # Redirect based on role
-            if user['role'] == 'admin':
-                return redirect(url_for('admin.dashboard'))
-            elif user['role'] == 'volunteer':
-                return redirect(url_for('volunteer.dashboard'))
-            else:
-                return redirect(url_for('client.dashboard'))
+        # Set session variables
+        session.permanent = True
+        session['user_id'] = user['user_id']
+        session['email'] = user['email']
+        session['role'] = user['role']
+        session['full_name'] = user['full_name']
+        
+        flash(f'Welcome back, {user["full_name"]}!', 'success')
+        
+        # Redirect based on role
+        if user['role'] == 'admin':
+            return redirect(url_for('admin.dashboard'))
+        elif user['role'] == 'volunteer':
+            return redirect(url_for('volunteer.dashboard'))
         else:
-            flash('Invalid email or password', 'danger')
+            return redirect(url_for('client.dashboard'))
     
+    flash('Invalid email or password', 'danger')
     return render_template('auth/login.html')
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
@@ -83,21 +97,10 @@ def register():
             return render_template('auth/register.html')
         
         try:
-            # Insert user
-            user_id = query_db(
-                '''INSERT INTO users (email, password_hash, full_name, phone, role, is_active)
-                   VALUES (%s, %s, %s, %s, %s, %s)''',
-                (email, hash_password(password), full_name, phone, 'client', 0),
-                commit=True
-            )
-            
-            # Insert client details
-            query_db(
-                '''INSERT INTO clients (user_id, address, family_size, allergies, food_preferences, verification_status)
-                   VALUES (%s, %s, %s, %s, %s, %s)''',
-                (user_id, address, family_size, allergies, food_preferences, 'pending'),
-                commit=True
-            )
+            # User and client rows are committed together
+            with transaction():
+                user_id = create_user(email, hash_password(password), full_name, phone, 'client', is_active=0)
+                create_client(user_id, address, family_size, allergies, food_preferences, 'pending')
             
             flash('Registration successful! Please wait for admin verification.', 'success')
             return redirect(url_for('auth.login'))
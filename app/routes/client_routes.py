@@ -2,12 +2,13 @@
 Client Routes
 Client portal and dashboard
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file
-from app.database import query_db
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app.utils.decorators import client_required
-from app.models.client_model import get_client_by_user_id, get_client_distributions
-from app.utils.qrcode_utils import generate_qr_code_bytes, get_client_qr_data
+from app.models.client_model import get_client_by_user_id, get_client_distributions, update_client
+from app.utils.qrcode_utils import qr_png_response, get_client_qr_data
 from app.models import pickup_model
+from app.models.reservation_model import InsufficientStock
+from app.utils.pagination import page_args
 
 client_bp = Blueprint('client', __name__)
 
@@ -23,7 +24,7 @@ def dashboard():
         return redirect(url_for('auth.logout'))
     
     # Get recent distributions
-    distributions = get_client_distributions(client['client_id'])
+    distributions = get_client_distributions(client['client_id'], per_page=10)
     
     # Get next pickup info (if any)
     next_pickup = None
@@ -64,13 +65,8 @@ def update_profile():
     food_preferences = request.form.get('food_preferences', '')
     
     try:
-        query_db(
-            '''UPDATE clients SET address = %s, family_size = %s, 
-               allergies = %s, food_preferences = %s
-               WHERE client_id = %s''',
-            (address, family_size, allergies, food_preferences, client['client_id']),
-            commit=True
-        )
+        update_client(client['client_id'], address=address, family_size=family_size,
+                      allergies=allergies, food_preferences=food_preferences)
         flash('Profile updated successfully!', 'success')
     except Exception as e:
         flash(f'Error updating profile: {str(e)}', 'danger')
@@ -89,7 +85,7 @@ def history():
         flash('Client information not found', 'danger')
         return redirect(url_for('auth.logout'))
     
-    distributions = get_client_distributions(client['client_id'])
+    distributions = get_client_distributions(client['client_id'], **page_args())
     
     return render_template('client/history.html', distributions=distributions)
 
@@ -104,10 +100,8 @@ def qr_code():
         flash('Client number not available', 'danger')
         return redirect(url_for('client.dashboard'))
     
-    qr_data = get_client_qr_data(client['client_number'])
-    img_bytes = generate_qr_code_bytes(qr_data, size=8, border=2)
-    
-    return send_file(img_bytes, mimetype='image/png')
+    qr_data = get_client_qr_data(client['client_number'], client['client_id'], client.get('verified_date'))
+    return qr_png_response(qr_data, size=8, border=2)
 
 
 @client_bp.route('/pickup', methods=['POST'])
@@ -127,6 +121,8 @@ def create_pickup():
     try:
         pickup_model.create_pickup(user_id, inventory_id, quantity)
         flash('Pickup request submitted successfully!', 'success')
+    except InsufficientStock:
+        flash('Sorry, there is not enough of that item left for this request', 'warning')
     except Exception as e:
         flash(f'Error submitting pickup request: {str(e)}', 'danger')
 
@@ -144,7 +140,7 @@ def view_pickups():
         flash('Client information not found', 'danger')
         return redirect(url_for('auth.logout'))
 
-    pickups = pickup_model.get_pickups_by_user(user_id)
+    pickups = pickup_model.get_pickups_by_user(user_id, **page_args())
 
     return render_template('client/pickups.html', pickups=pickups)
 
@@ -2,17 +2,28 @@
 Volunteer Routes
 Volunteer operations and dashboard
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from app.database import query_db
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+import pymysql
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, session, jsonify
 from app.utils.decorators import volunteer_required
-from app.models.donation_model import create_donation, get_donations_by_volunteer
-from app.models.volunteer_model import get_volunteer_stats, create_distribution
+from app.models.donation_model import create_donation, get_donations_by_volunteer, get_todays_donations_by_volunteer
+from app.models.volunteer_model import (get_volunteer_stats, create_distribution, create_distribution_async,
+                                        record_synced_distributions)
 from app.models.client_model import get_verified_clients, get_client_by_id
-from app.utils.qrcode_utils import parse_qr_data
-from datetime import datetime
+from app.utils.qrcode_utils import qr_matches_client, read_client_qr
+from app.utils.client_index import (find_verified_client, find_verified_client_async, find_verified_clients,
+                                    index_loaded, indexed_client)
+from app.utils.helpers import local_now, to_local
+from app.utils.pagination import page_args
 
 volunteer_bp = Blueprint('volunteer', __name__)
 
+# Idempotency keys generated by volunteer devices (UUIDs in practice)
+SYNC_KEY = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
 @volunteer_bp.route('/dashboard')
 @volunteer_required
 def dashboard():
@@ -23,15 +34,10 @@ def dashboard():
     stats = get_volunteer_stats(volunteer_id)
     
     # Recent donations
-    recent_donations = get_donations_by_volunteer(volunteer_id, limit=10)
+    recent_donations = get_donations_by_volunteer(volunteer_id, per_page=10)
     
     # Today's pickups
-    today_donations = query_db(
-        '''SELECT * FROM donations 
-           WHERE volunteer_id = %s AND DATE(donation_date) = CURDATE()
-           ORDER BY donation_date DESC''',
-        (volunteer_id,)
-    )
+    today_donations = get_todays_donations_by_volunteer(volunteer_id)
     
     return render_template('volunteer/dashboard.html', 
                           stats=stats, 
@@ -44,7 +50,7 @@ def log_pickup():
     """Log a food pickup/donation"""
     if request.method == 'POST':
         volunteer_id = session.get('user_id')
-        donation_date = request.form.get('donation_date') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        donation_date = request.form.get('donation_date') or local_now().strftime('%Y-%m-%d %H:%M:%S')
         weight_kg = request.form.get('weight_kg')
         food_type = request.form.get('food_type', '')
         source = request.form.get('source', '')
@@ -79,20 +85,14 @@ def client_signin():
         notes = request.form.get('notes', '')
         
         # If QR code data was sent, parse it
-        if client_number:
-            parsed = parse_qr_data(client_number)
-            if parsed:
-                client_number = parsed
+        client_number, claims = _read_signin(client_number)
         
-        # Find client by client number
-        client = query_db(
-            'SELECT client_id, client_number FROM clients WHERE client_number = %s AND verification_status = "verified"',
-            (client_number,),
-            one=True
-        )
+        # Find client by client number (in-process index, DB on a miss)
+        client = find_verified_client(client_number)
         
-        if not client:
-            flash('Client number not found or not verified', 'danger')
+        error = _client_error(client, claims)
+        if error:
+            flash(error, 'danger')
             return render_template('volunteer/client_signin.html')
         
         try:
@@ -100,7 +100,43 @@ def client_signin():
             create_distribution(
                 client_id=client['client_id'],
                 volunteer_id=volunteer_id,
-                distribution_date=datetime.now(),
+                distribution_date=local_now(),
+                weight_kg=float(weight_kg),
+                items_description=items_description,
+                client_signature=True,
+                notes=notes
+            )
+            flash(f'Client {client["client_number"]} signed in successfully!', 'success')
+            return redirect(url_for('volunteer.dashboard'))
+        except Exception as e:
+            flash(f'Error signing in client: {str(e)}', 'danger')
+            print(f"Distribution error: {e}")
+    
+    return render_template('volunteer/client_signin.html')
+
+@volunteer_required
+async def client_signin_async():
+    """client_signin on the async pool; installed in place of it under ASGI (app/asgi.py)"""
+    if request.method == 'POST':
+        client_number = request.form.get('client_number')
+        weight_kg = request.form.get('weight_kg')
+        items_description = request.form.get('items_description', '')
+        notes = request.form.get('notes', '')
+        
+        client_number, claims = _read_signin(client_number)
+        
+        client = await find_verified_client_async(client_number)
+        
+        error = _client_error(client, claims)
+        if error:
+            flash(error, 'danger')
+            return render_template('volunteer/client_signin.html')
+        
+        try:
+            await create_distribution_async(
+                client_id=client['client_id'],
+                volunteer_id=session.get('user_id'),
+                distribution_date=local_now(),
                 weight_kg=float(weight_kg),
                 items_description=items_description,
                 client_signature=True,
@@ -114,50 +150,234 @@ def client_signin():
     
     return render_template('volunteer/client_signin.html')
 
+@volunteer_bp.route('/signins/sync', methods=['POST'])
+@volunteer_required
+def sync_signins():
+    """
+    Record client sign-ins queued on a volunteer's device while offline.
+    Body: {"signins": [{"key", "client_number", "weight_kg", "signed_in_at",
+    "items_description", "notes"}, ...]}. Each result reports "created",
+    "duplicate" (key already recorded; safe to drop) or "invalid" (will
+    never succeed; drop and tell the volunteer).
+    """
+    limit = current_app.config['SIGNIN_SYNC_MAX']
+    data = request.get_json(silent=True)
+    items = data.get('signins') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not 0 < len(items) <= limit:
+        return jsonify({'success': False, 'message': f'Send between 1 and {limit} sign-ins'}), 400
+
+    # Resolve every client number up front in one lookup
+    clients = find_verified_clients(
+        _read_signin(item.get('client_number'))[0] for item in items if isinstance(item, dict))
+
+    results, valid, first = [], [], {}
+    for item in items:
+        entry = {'key': item.get('key') if isinstance(item, dict) else None}
+        try:
+            signin = _parse_signin(item, clients)
+        except ValueError as e:
+            entry.update(success=False, status='invalid', message=str(e))
+        else:
+            # A key repeated within the batch is recorded once
+            if signin['sync_key'] not in first:
+                first[signin['sync_key']] = entry
+                valid.append(signin)
+        results.append(entry)
+
+    recorded = record_synced_distributions(session.get('user_id'), valid)
+    for entry in results:
+        if 'status' not in entry:
+            distribution_id, created = recorded[entry['key']]
+            created = created and first[entry['key']] is entry
+            entry.update(success=True, status='created' if created else 'duplicate',
+                         distribution_id=distribution_id)
+    return jsonify({'success': True, 'results': results}), 200
+
+
+def _read_signin(raw):
+    """
+    (client_number, claims) for a client number typed or scanned (QR
+    payload) into a sign-in; unparsed input is looked up as typed
+    """
+    raw = str(raw or '').strip()
+    client_number, claims = read_client_qr(raw)
+    return client_number or raw, claims
+
+def _client_error(client, claims, not_found='Client number not found or not verified'):
+    """
+    Why a scanned or typed client may not be admitted, or None. A signed
+    code must match the client it was issued to and their current
+    verification, so codes from before a re-verification stop working.
+    """
+    if not client:
+        return not_found
+    if not qr_matches_client(claims, client):
+        return 'QR code is no longer valid; please issue a new one'
+    return None
+
+def _parse_signin(item, clients):
+    """
+    Validate one queued sign-in against {client_number: verified client};
+    raises ValueError with a message for the volunteer
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Malformed sign-in')
+    key = item.get('key')
+    if not isinstance(key, str) or not SYNC_KEY.match(key):
+        raise ValueError('Missing or malformed key')
+
+    client_number, claims = _read_signin(item.get('client_number'))
+    client = clients.get(client_number)
+    error = _client_error(client, claims)
+    if error:
+        raise ValueError(error)
+
+    try:
+        weight_kg = Decimal(str(item.get('weight_kg')))
+    except InvalidOperation:
+        weight_kg = None
+    if weight_kg is None or not weight_kg.is_finite() or weight_kg <= 0:
+        raise ValueError('Weight must be a positive number')
+
+    now = local_now()
+    signed_in_at = now
+    if item.get('signed_in_at'):
+        try:
+            signed_in_at = to_local(datetime.fromisoformat(str(item['signed_in_at'])))
+        except ValueError:
+            raise ValueError('Malformed signed_in_at')
+        # Device clocks drift; reject only what is clearly in the future
+        if signed_in_at > now + timedelta(minutes=5):
+            raise ValueError('signed_in_at is in the future')
+
+    return {
+        'sync_key': key,
+        'client_id': client['client_id'],
+        'distribution_date': signed_in_at,
+        'weight_kg': weight_kg,
+        'items_description': str(item.get('items_description') or ''),
+        'notes': str(item.get('notes') or ''),
+    }
+
+
 @volunteer_bp.route('/verify-qr', methods=['POST'])
 @volunteer_required
 def verify_qr():
-    """API endpoint to verify QR code and return client info"""
+    """
+    API endpoint to verify QR code and return client info. A signed code
+    is still admitted (marked offline) when the database is unreachable.
+    """
     data = request.get_json()
     qr_data = data.get('qr_data', '')
     
     if not qr_data:
         return jsonify({'success': False, 'message': 'No QR data provided'}), 400
     
-    # Parse QR code data
-    client_number = parse_qr_data(qr_data)
+    # Parse QR code data; signed payloads are checked locally
+    client_number, claims = read_client_qr(qr_data)
     
     if not client_number:
         return jsonify({'success': False, 'message': 'Invalid QR code format'}), 400
     
     # Get client information
-    client = query_db(
-        '''SELECT c.client_id, c.client_number, u.full_name, u.email
-           FROM clients c
-           JOIN users u ON c.user_id = u.user_id
-           WHERE c.client_number = %s AND c.verification_status = "verified"''',
-        (client_number,),
-        one=True
-    )
+    try:
+        client = find_verified_client(client_number)
+    except pymysql.err.OperationalError:
+        result = _qr_result(client_number, claims, None, offline=True)
+        return jsonify(result), 200 if result['success'] else 503
     
-    if not client:
-        return jsonify({'success': False, 'message': 'Client not found or not verified'}), 404
+    result = _qr_result(client_number, claims, client)
+    return jsonify(result), 200 if result['success'] else 404
+
+@volunteer_required
+async def verify_qr_async():
+    """verify_qr on the async pool; installed in place of it under ASGI (app/asgi.py)"""
+    data = request.get_json()
+    qr_data = data.get('qr_data', '')
+    
+    if not qr_data:
+        return jsonify({'success': False, 'message': 'No QR data provided'}), 400
+    
+    client_number, claims = read_client_qr(qr_data)
     
-    return jsonify({
-        'success': True,
-        'client': {
+    if not client_number:
+        return jsonify({'success': False, 'message': 'Invalid QR code format'}), 400
+    
+    try:
+        client = await find_verified_client_async(client_number)
+    except pymysql.err.OperationalError:
+        result = _qr_result(client_number, claims, None, offline=True)
+        return jsonify(result), 200 if result['success'] else 503
+    
+    result = _qr_result(client_number, claims, client)
+    return jsonify(result), 200 if result['success'] else 404
+
+@volunteer_bp.route('/verify-qr/batch', methods=['POST'])
+@volunteer_required
+def verify_qr_batch():
+    """
+    verify_qr for a queue of scans: {"qr_data": [payload, ...]} returns
+    {"results": {payload: {"success", "client" or "message"}}}, resolved
+    with one lookup however many payloads are sent
+    """
+    limit = current_app.config['QR_VERIFY_BATCH_MAX']
+    data = request.get_json(silent=True)
+    payloads = data.get('qr_data') if isinstance(data, dict) else None
+    if (not isinstance(payloads, list) or not 0 < len(payloads) <= limit
+            or not all(isinstance(payload, str) for payload in payloads)):
+        return jsonify({'success': False, 'message': f'Send between 1 and {limit} QR payloads'}), 400
+
+    parsed = {payload: read_client_qr(payload) for payload in payloads if payload}
+    numbers = {payload: client_number for payload, (client_number, _) in parsed.items()}
+    try:
+        clients, offline = find_verified_clients(numbers.values()), False
+    except pymysql.err.OperationalError:
+        clients, offline = {}, True
+
+    results = {}
+    for payload in payloads:
+        client_number = numbers.get(payload)
+        if not client_number:
+            results[payload] = {'success': False, 'message': 'Invalid QR code format'}
+        else:
+            results[payload] = _qr_result(client_number, parsed[payload][1],
+                                          clients.get(client_number), offline)
+    return jsonify({'success': True, 'results': results}), 200
+
+def _qr_result(client_number, claims, client, offline=False):
+    """
+    verify_qr response body for one parsed code, checked like a sign-in
+    (see _client_error). Offline, only a signed code (claims) is admitted,
+    checked against the client index when this worker has loaded it.
+    """
+    if offline:
+        if not claims:
+            return {'success': False, 'message': 'Database unavailable; only signed QR codes can be checked'}
+        if not index_loaded():
+            return {'success': True, 'offline': True,
+                    'client': {'client_number': client_number, 'full_name': None, 'email': None}}
+        client = indexed_client(client_number)
+    error = _client_error(client, claims, not_found='Client not found or not verified')
+    if error:
+        return {'success': False, 'message': error}
+    if offline:
+        return {'success': True, 'offline': True, 'client': {
             'client_number': client['client_number'],
             'full_name': client['full_name'],
-            'email': client['email']
-        }
-    }), 200
+            'email': client['email'],
+        }}
+    return {'success': True, 'client': {
+        'client_number': client['client_number'],
+        'full_name': client['full_name'],
+        'email': client['email'],
+    }}
 
 @volunteer_bp.route('/my-pickups')
 @volunteer_required
 def my_pickups():
     """View all pickups by this volunteer"""
     volunteer_id = session.get('user_id')
-    donations = get_donations_by_volunteer(volunteer_id)
+    donations = get_donations_by_volunteer(volunteer_id, **page_args())
     
     return render_template('volunteer/my_pickups.html', donations=donations)
 
@@ -0,0 +1,135 @@
+"""
+Production Server
+Run the app on pre-forked gunicorn workers (gthread) sized from the CPU
+count and Config, instead of the single-process debug server:
+
+    python run.py --production
+    python -m app.serving --bind 0.0.0.0:8000 --workers 4
+
+Each worker builds its own app after the fork (its own DB pool, reservation
+expirer and client index) and warms up before taking requests: it opens
+its pool connections, compiles every template and renders one QR code.
+Workers are recycled after WEB_MAX_REQUESTS requests (with jitter) to cap
+memory growth. `kill -HUP <master pid>` reloads code and config gracefully:
+new workers start before the old ones finish their in-flight requests.
+
+Without os.fork (Windows) this falls back to one threaded process.
+"""
+import argparse
+import os
+import sys
+import time
+
+from app.config import Config
+
+
+def worker_settings(config=Config):
+    """gunicorn settings derived from Config and the CPU count"""
+    cpus = os.cpu_count() or 1
+    workers = config.WEB_WORKERS or 2 * cpus + 1
+    # A request holds at most one primary connection, so more threads than
+    # pooled connections would only queue on the pool
+    threads = min(config.WEB_THREADS, config.DB_POOL_SIZE)
+    return {
+        'bind': config.WEB_BIND,
+        'workers': workers,
+        'worker_class': 'gthread',
+        'threads': threads,
+        'max_requests': config.WEB_MAX_REQUESTS,
+        'max_requests_jitter': config.WEB_MAX_REQUESTS_JITTER,
+        'timeout': config.WEB_TIMEOUT,
+        'graceful_timeout': config.WEB_GRACEFUL_TIMEOUT,
+        'preload_app': False,
+    }
+
+
+def warm_worker(app, connections):
+    """
+    Get a freshly started worker ready to serve: open ``connections`` pool
+    connections, compile every template, render one QR code (loads the PNG
+    encoder) and wait briefly for the client index load.
+    """
+    from app.database import get_pool
+    from app.utils.qrcode_utils import generate_qr_code_bytes
+
+    started = time.perf_counter()
+    with app.app_context():
+        pool = get_pool()
+        held = []
+        try:
+            for _ in range(min(connections, pool.size)):
+                held.append(pool.acquire())
+        except Exception as exc:
+            print("Pool warmup stopped early:", exc)
+        for conn in held:
+            pool.release(conn)
+
+    try:
+        templates = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    except TypeError:       # precompiled templates (ModuleLoader) are already compiled
+        templates = []
+    for name in templates:
+        app.jinja_env.get_template(name)
+
+    generate_qr_code_bytes('CLIENT:WARMUP')
+
+    loader = app.extensions.get('client_index_loader')
+    if loader is not None:
+        loader.join(timeout=app.config['WEB_WARMUP_TIMEOUT'])
+
+    print(f"Worker {os.getpid()} warm in {time.perf_counter() - started:.2f}s "
+          f"({len(held)} connections, {len(templates)} templates)")
+
+
+def _post_worker_init(worker):
+    warm_worker(worker.wsgi, worker.cfg.threads)
+
+
+def serve(options=None):
+    """Run the pre-forked production server until it is stopped"""
+    from gunicorn.app.base import BaseApplication
+
+    settings = dict(worker_settings(), **(options or {}))
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+            self.cfg.set('post_worker_init', _post_worker_init)
+
+        def load(self):
+            from app import create_app
+            return create_app()
+
+    ProductionServer().run()
+
+
+def serve_single_process(bind):
+    """Threaded single-process server for hosts without os.fork"""
+    from werkzeug.serving import run_simple
+    from app import create_app
+
+    app = create_app()
+    warm_worker(app, app.config['WEB_THREADS'])
+    host, _, port = bind.rpartition(':')
+    print("os.fork is unavailable; serving from one threaded process")
+    run_simple(host or '0.0.0.0', int(port), app, threaded=True)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bind', help=f'host:port (default: WEB_BIND, {Config.WEB_BIND})')
+    parser.add_argument('--workers', type=int, help='worker processes (default: WEB_WORKERS or 2 x CPUs + 1)')
+    parser.add_argument('--threads', type=int, help='threads per worker (default: WEB_THREADS)')
+    args = parser.parse_args(argv)
+
+    options = {key: value for key, value in vars(args).items() if value is not None}
+    if not hasattr(os, 'fork'):
+        serve_single_process(options.get('bind', Config.WEB_BIND))
+    else:
+        serve(options)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -51,5 +51,139 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     updateTodayTotal();
+
+    // Offline sign-in queue
+    const signinForm = document.getElementById('signin-form');
+    if (signinForm && signinForm.dataset.syncUrl) {
+        const queue = new SigninQueue(signinForm.dataset.syncUrl);
+        queue.render();
+
+        // Offline: keep the sign-in on this device and sync it later
+        signinForm.addEventListener('submit', function(e) {
+            if (navigator.onLine) {
+                return;
+            }
+            e.preventDefault();
+            queue.add({
+                client_number: signinForm.elements.client_number.value.trim().toUpperCase(),
+                weight_kg: signinForm.elements.weight_kg.value,
+                items_description: signinForm.elements.items_description.value,
+                notes: signinForm.elements.notes.value
+            });
+            signinForm.reset();
+            signinForm.elements.client_number.focus();
+        });
+
+        window.addEventListener('online', function() { queue.flush(); });
+        setInterval(function() { queue.flush(); }, 30000);
+        queue.flush();
+    }
 });
 
+/**
+ * Sign-ins recorded while offline, kept in localStorage until the server
+ * confirms them. Each carries a random key so a batch resent after a
+ * dropped response is recorded only once.
+ */
+function SigninQueue(syncUrl) {
+    this.syncUrl = syncUrl;
+    this.storageKey = 'foodlink.signinQueue';
+    this.batchSize = 50;
+    this.flushing = false;
+}
+
+SigninQueue.prototype.load = function() {
+    try {
+        return JSON.parse(localStorage.getItem(this.storageKey)) || [];
+    } catch (e) {
+        return [];
+    }
+};
+
+SigninQueue.prototype.save = function(items) {
+    localStorage.setItem(this.storageKey, JSON.stringify(items));
+    this.render();
+};
+
+SigninQueue.prototype.newKey = function() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+};
+
+SigninQueue.prototype.add = function(signin) {
+    const items = this.load();
+    signin.key = this.newKey();
+    signin.signed_in_at = new Date().toISOString();
+    items.push(signin);
+    this.save(items);
+};
+
+SigninQueue.prototype.flush = function() {
+    const self = this;
+    const pending = this.load();
+    if (this.flushing || !navigator.onLine || pending.length === 0) {
+        return Promise.resolve();
+    }
+    this.flushing = true;
+    const batch = pending.slice(0, this.batchSize);
+
+    return fetch(this.syncUrl, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'same-origin',
+        body: JSON.stringify({ signins: batch })
+    })
+    .then(function(response) {
+        if (!response.ok) {
+            throw new Error('Sync failed with status ' + response.status);
+        }
+        return response.json();
+    })
+    .then(function(data) {
+        // Created and duplicate entries are done; invalid ones never will be
+        const settled = {};
+        const rejected = [];
+        data.results.forEach(function(result) {
+            settled[result.key] = true;
+            if (result.status === 'invalid') {
+                rejected.push(result);
+            }
+        });
+        self.save(self.load().filter(function(item) { return !settled[item.key]; }));
+        self.reportRejected(batch, rejected);
+        self.flushing = false;
+        if (self.load().length > 0) {
+            return self.flush();
+        }
+    })
+    .catch(function(error) {
+        // Network or server trouble: keep everything for the next attempt
+        console.warn('Offline sign-in sync:', error);
+        self.flushing = false;
+    });
+};
+
+SigninQueue.prototype.reportRejected = function(batch, rejected) {
+    if (rejected.length === 0) {
+        return;
+    }
+    const byKey = {};
+    batch.forEach(function(item) { byKey[item.key] = item; });
+    alert('Some offline sign-ins could not be recorded:\n' + rejected.map(function(result) {
+        const item = byKey[result.key] || {};
+        return (item.client_number || '?') + ': ' + result.message;
+    }).join('\n'));
+};
+
+SigninQueue.prototype.render = function() {
+    const status = document.getElementById('offline-queue-status');
+    if (!status) {
+        return;
+    }
+    const count = this.load().length;
+    status.style.display = count ? 'block' : 'none';
+    status.textContent = count + ' sign-in(s) saved on this device, waiting to sync';
+};
+
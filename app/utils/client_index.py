@@ -0,0 +1,283 @@
+"""
+Verified Client Index
+In-process map from client_number to (client_id, full_name, email,
+verified_date) for verified clients, so door sign-ins and QR checks skip
+the database.
+
+The index is loaded once per process (start_client_index), patched by this
+worker's own verify/reject/update events, and caught up with other
+workers' writes by polling clients/users.updated_at at most every
+CLIENT_INDEX_POLL_SECONDS. Lookups that miss fall back to the database.
+Rows deleted outside the app stay indexed until the worker restarts.
+"""
+import threading
+import time
+
+from flask import current_app
+from app import async_database
+from app.database import after_commit, query_db
+from app.utils.cache import register_cache
+
+# Rows whose updated_at falls this many seconds before the watermark are
+# re-read on every poll, covering transactions that committed late
+_POLL_OVERLAP = 5
+
+INDEX_QUERY = '''SELECT c.client_id, c.client_number, c.verification_status, c.verified_date,
+                        u.full_name, u.email
+                 FROM clients c
+                 JOIN users u ON c.user_id = u.user_id'''
+
+
+def _entry(row):
+    return (row['client_id'], row['full_name'], row['email'], row['verified_date'])
+
+def _client(client_number, entry):
+    client_id, full_name, email, verified_date = entry
+    return {'client_id': client_id, 'client_number': client_number,
+            'full_name': full_name, 'email': email, 'verified_date': verified_date}
+
+
+class ClientIndex:
+    """
+    client_number -> (client_id, full_name, email, verified_date). Reads
+    take no lock; writers swap or patch the dicts under one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_number = {}
+        self._number_by_id = {}
+        self.loaded = False
+        self.watermark = None      # DB time the last load/poll covers
+        self.polled_at = 0.0       # time.monotonic() of the last load/poll
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, client_number):
+        """(client_id, full_name, email, verified_date) or None"""
+        entry = self._by_number.get(client_number)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def replace(self, rows, watermark):
+        """Swap in a full load"""
+        by_number, number_by_id = {}, {}
+        for row in rows:
+            if row['verification_status'] == 'verified' and row['client_number']:
+                by_number[row['client_number']] = _entry(row)
+                number_by_id[row['client_id']] = row['client_number']
+        with self._lock:
+            self._by_number, self._number_by_id = by_number, number_by_id
+            self.watermark = watermark
+            self.polled_at = time.monotonic()
+            self.loaded = True
+
+    def apply(self, rows, watermark=None):
+        """Patch in changed rows: verified ones are (re)indexed, the rest dropped"""
+        with self._lock:
+            for row in rows:
+                self._discard(row['client_id'])
+                if row['verification_status'] == 'verified' and row['client_number']:
+                    self._by_number[row['client_number']] = _entry(row)
+                    self._number_by_id[row['client_id']] = row['client_number']
+            if watermark is not None:
+                self.watermark = watermark
+                self.polled_at = time.monotonic()
+
+    def discard(self, client_ids):
+        with self._lock:
+            for client_id in client_ids:
+                self._discard(client_id)
+
+    def _discard(self, client_id):
+        number = self._number_by_id.pop(client_id, None)
+        if number is not None:
+            self._by_number.pop(number, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._by_number),
+            'loaded': self.loaded,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def __len__(self):
+        return len(self._by_number)
+
+
+_index = ClientIndex()
+register_cache('verified_client_index', _index)
+_poll_lock = threading.Lock()
+
+
+def _db_now():
+    return query_db('SELECT NOW() as now', one=True, primary=True)['now']
+
+def load_client_index():
+    """(Re)load every verified client"""
+    watermark = _db_now()
+    rows = query_db(INDEX_QUERY + ' WHERE c.verification_status = "verified"', primary=True)
+    _index.replace(rows, watermark)
+    return len(_index)
+
+def _poll_due():
+    return time.monotonic() - _index.polled_at >= current_app.config['CLIENT_INDEX_POLL_SECONDS']
+
+def poll_client_index(force=False):
+    """
+    Apply other workers' changes since the watermark, at most once per
+    CLIENT_INDEX_POLL_SECONDS (or now with force=True). One poller at a
+    time; others keep serving the current index.
+    """
+    if not _index.loaded or not (force or _poll_due()):
+        return
+    if not _poll_lock.acquire(blocking=False):
+        return
+    try:
+        watermark = _db_now()
+        rows = query_db(
+            INDEX_QUERY + ''' WHERE c.updated_at >= %s - INTERVAL %s SECOND
+                              UNION
+                              ''' + INDEX_QUERY + ''' WHERE u.updated_at >= %s - INTERVAL %s SECOND''',
+            (_index.watermark, _POLL_OVERLAP, _index.watermark, _POLL_OVERLAP),
+            primary=True
+        )
+        _index.apply(rows, watermark)
+    finally:
+        _poll_lock.release()
+
+def find_verified_client(client_number):
+    """
+    {client_id, client_number, full_name, email, verified_date} for a
+    verified client, or None. Served from the index; misses are checked
+    against the database (and indexed) so a client verified by another
+    worker is found at once.
+    """
+    if not client_number:
+        return None
+    poll_client_index()
+    entry = _index.get(client_number)
+    if entry is None:
+        row = query_db(INDEX_QUERY + ' WHERE c.client_number = %s', (client_number,), one=True)
+        if row is None or row['verification_status'] != 'verified':
+            return None
+        if _index.loaded:
+            _index.apply([row])
+        entry = _entry(row)
+    return _client(client_number, entry)
+
+async def find_verified_client_async(client_number):
+    """
+    find_verified_client for the async views: a miss is checked on the
+    async pool, and a due poll runs on a thread so the event loop never
+    waits on the sync pool.
+    """
+    if not client_number:
+        return None
+    if _index.loaded and _poll_due():
+        import asyncio
+        await asyncio.to_thread(poll_client_index)
+    entry = _index.get(client_number)
+    if entry is None:
+        row = await async_database.query_db(INDEX_QUERY + ' WHERE c.client_number = %s',
+                                            (client_number,), one=True)
+        if row is None or row['verification_status'] != 'verified':
+            return None
+        if _index.loaded:
+            _index.apply([row])
+        entry = _entry(row)
+    return _client(client_number, entry)
+
+def find_verified_clients(client_numbers):
+    """
+    find_verified_client for many numbers: {client_number: client} for the
+    verified ones. Index misses are resolved with one IN (...) query.
+    """
+    client_numbers = {number for number in client_numbers if number}
+    if not client_numbers:
+        return {}
+    poll_client_index()
+    found, missing = {}, []
+    for number in client_numbers:
+        entry = _index.get(number)
+        if entry is None:
+            missing.append(number)
+        else:
+            found[number] = entry
+    if missing:
+        rows = query_db(
+            INDEX_QUERY + f''' WHERE c.client_number IN ({', '.join(['%s'] * len(missing))})
+                              AND c.verification_status = "verified"''',
+            tuple(missing)
+        )
+        if _index.loaded:
+            _index.apply(rows)
+        found.update((row['client_number'], _entry(row)) for row in rows)
+    return {number: _client(number, entry) for number, entry in found.items()}
+
+def index_loaded():
+    """True once this worker's index has been loaded"""
+    return _index.loaded
+
+def indexed_client(client_number):
+    """
+    The index's last view of a verified client, without touching the
+    database (for checks while it is down): a client dict, or None.
+    """
+    entry = _index.get(client_number) if client_number else None
+    return _client(client_number, entry) if entry else None
+
+def reindex_clients(client_ids=(), user_ids=()):
+    """
+    Re-read these clients into the index once the current transaction
+    commits (one query for the batch). Called by the client/user write paths.
+    """
+    client_ids, user_ids = list(client_ids), list(user_ids)
+    if not (client_ids or user_ids) or not _index.loaded:
+        return
+
+    def reindex():
+        conditions, args = [], []
+        if client_ids:
+            conditions.append(f"c.client_id IN ({', '.join(['%s'] * len(client_ids))})")
+            args += client_ids
+        if user_ids:
+            conditions.append(f"c.user_id IN ({', '.join(['%s'] * len(user_ids))})")
+            args += user_ids
+        rows = query_db(INDEX_QUERY + ' WHERE ' + ' OR '.join(conditions), tuple(args), primary=True)
+        _index.discard(int(client_id) for client_id in client_ids)
+        _index.apply(rows)
+    after_commit(reindex)
+
+def discard_clients(client_ids):
+    """Drop clients from the index once the current transaction commits"""
+    client_ids = [int(client_id) for client_id in client_ids]
+    after_commit(lambda: _index.discard(client_ids))
+
+def start_client_index(app):
+    """
+    Load the index on a background thread so startup does not wait on the
+    database; lookups fall back to queries until it is ready. Disabled with
+    CLIENT_INDEX_ENABLED = False.
+    """
+    if not app.config.get('CLIENT_INDEX_ENABLED'):
+        return None
+
+    def load():
+        try:
+            with app.app_context():
+                load_client_index()
+        except Exception as exc:
+            print("Client index load failed, using database lookups:", exc)
+
+    thread = threading.Thread(target=load, name='client-index-loader', daemon=True)
+    thread.start()
+    app.extensions['client_index_loader'] = thread
+    return thread
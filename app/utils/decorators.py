@@ -2,34 +2,50 @@
 Custom Decorators
 Role-based access control and authentication decorators
 """
+import inspect
 from functools import wraps
 from flask import session, redirect, url_for, flash
 
-def login_required(f):
-    """Require user to be logged in"""
+def _guard(f, check):
+    """
+    Wrap view f so check() runs first; a non-None result is returned
+    instead of calling f. Keeps async views async.
+    """
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def async_decorated_function(*args, **kwargs):
+            return check() or await f(*args, **kwargs)
+        return async_decorated_function
+
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Please log in to access this page', 'warning')
-            return redirect(url_for('auth.login'))
-        return f(*args, **kwargs)
+        return check() or f(*args, **kwargs)
     return decorated_function
 
+def _check_login():
+    if 'user_id' not in session:
+        flash('Please log in to access this page', 'warning')
+        return redirect(url_for('auth.login'))
+    return None
+
+def login_required(f):
+    """Require user to be logged in"""
+    return _guard(f, _check_login)
+
 def role_required(*roles):
     """Require user to have specific role(s)"""
+    def check():
+        if 'user_id' not in session:
+            flash('Please log in to access this page', 'warning')
+            return redirect(url_for('auth.login'))
+        
+        if session.get('role') not in roles:
+            flash('You do not have permission to access this page', 'danger')
+            return redirect(url_for('index'))
+        return None
+
     def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            if 'user_id' not in session:
-                flash('Please log in to access this page', 'warning')
-                return redirect(url_for('auth.login'))
-            
-            if session.get('role') not in roles:
-                flash('You do not have permission to access this page', 'danger')
-                return redirect(url_for('index'))
-            
-            return f(*args, **kwargs)
-        return decorated_function
+        return _guard(f, check)
     return decorator
 
 def admin_required(f):
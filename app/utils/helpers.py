@@ -2,8 +2,8 @@
 General Utility Functions
 Helper functions for common operations
 """
-from datetime import datetime, date
-from flask import current_app
+from datetime import datetime, date, timedelta
+from flask import current_app, has_app_context
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -28,9 +28,84 @@ def format_datetime(datetime_obj, format_string='%Y-%m-%d %H:%M:%S'):
 
 def is_within_pickup_window():
     """Check if current time is within food pickup window"""
-    now = datetime.now().time()
+    now = local_now().time()
     start = datetime.strptime(current_app.config['PICKUP_START_TIME'], '%H:%M').time()
     end = datetime.strptime(current_app.config['PICKUP_END_TIME'], '%H:%M').time()
     return start <= now <= end
 
 
+class ChunkSink:
+    """Write-only file object whose buffered bytes are drained by the caller"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _app_timezone():
+    """ZoneInfo for APP_TIMEZONE, or None to use the server's local time"""
+    name = current_app.config.get('APP_TIMEZONE') if has_app_context() else None
+    if not name:
+        return None
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(name)
+
+def local_now():
+    """
+    Current wall-clock time in APP_TIMEZONE as a naive datetime, matching
+    how DATETIME columns are stored
+    """
+    tz = _app_timezone()
+    if tz is None:
+        return datetime.now()
+    return datetime.now(tz).replace(tzinfo=None)
+
+def local_today():
+    """Today's date in APP_TIMEZONE"""
+    return local_now().date()
+
+def to_local(value):
+    """A timezone-aware datetime as naive APP_TIMEZONE wall-clock time; naive ones pass through"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(_app_timezone()).replace(tzinfo=None)
+
+def _to_day(value):
+    """Coerce a date, datetime or 'YYYY-MM-DD' string to a date"""
+    if isinstance(value, datetime):
+        tz = _app_timezone()
+        if value.tzinfo is not None and tz is not None:
+            value = value.astimezone(tz)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+def day_range(start_day, end_day=None):
+    """
+    Turn inclusive day bounds into a half-open datetime range
+    (start 00:00, day after end 00:00), bound as "col >= %s AND col < %s".
+    end_day defaults to start_day (a single day).
+
+    Comparing the raw column against a range keeps the predicate sargable,
+    unlike DATE(col) BETWEEN ..., which forces a full scan.
+    """
+    start = _to_day(start_day)
+    end = _to_day(end_day) if end_day is not None else start
+    return (datetime.combine(start, datetime.min.time()),
+            datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+def today_range():
+    """Half-open range covering today in APP_TIMEZONE"""
+    return day_range(local_today())
@@ -0,0 +1,122 @@
+"""
+Keyset Pagination
+Cursor-based paging on (timestamp, id) so deep pages cost the same as the first
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, has_app_context, request
+
+from app.database import query_db
+
+
+class Page(list):
+    """
+    One page of rows, newest first. Behaves like a list so templates can
+    iterate, slice and test it; next_cursor/prev_cursor are opaque tokens
+    for the neighbouring pages (None at either end).
+    """
+
+    def __init__(self, rows, per_page, next_cursor=None, prev_cursor=None):
+        super().__init__(rows)
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(ts, row_id):
+    """Opaque URL-safe token for a (timestamp, id) position"""
+    raw = json.dumps([ts.isoformat() if ts is not None else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """(timestamp, id) from encode_cursor(), or None if missing or malformed"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        ts, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+def page_size(per_page=None):
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE, defaulting to PAGE_SIZE"""
+    config = current_app.config if has_app_context() else {}
+    default = config.get('PAGE_SIZE', 25)
+    maximum = config.get('MAX_PAGE_SIZE', 100)
+    try:
+        per_page = int(per_page) if per_page else default
+    except (TypeError, ValueError):
+        per_page = default
+    return max(1, min(per_page, maximum))
+
+def page_args():
+    """Cursor and page size from the current request's query string"""
+    return {
+        'after': request.args.get('after'),
+        'before': request.args.get('before'),
+        'per_page': request.args.get('per_page'),
+    }
+
+
+def keyset_page(select, where, args, order, after=None, before=None, per_page=None):
+    """
+    Fetch one page of ``select`` ordered by ``order`` = (timestamp_col, id_col)
+    descending. ``where`` is an SQL condition (or '') bound with ``args``;
+    pass the token from a Page's next_cursor as ``after`` or its prev_cursor
+    as ``before``.
+
+    The position is compared with ``ts < x OR (ts = x AND id < y)`` so an
+    index on (..., timestamp_col, id_col) serves every page as a range scan.
+    """
+    ts_col, id_col = order
+    ts_key, id_key = ts_col.split('.')[-1], id_col.split('.')[-1]
+    per_page = page_size(per_page)
+
+    conditions = [f'({where})'] if where else []
+    params = list(args)
+    backwards = False
+    position = decode_cursor(after)
+    if position is None:
+        position = decode_cursor(before)
+        backwards = position is not None
+    if position is not None:
+        op = '>' if backwards else '<'
+        conditions.append(f'({ts_col} {op} %s OR ({ts_col} = %s AND {id_col} {op} %s))')
+        params += [position[0], position[0], position[1]]
+
+    direction = 'ASC' if backwards else 'DESC'
+    query = select
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {ts_col} {direction}, {id_col} {direction} LIMIT %s'
+    params.append(per_page + 1)
+
+    rows = query_db(query, tuple(params))
+    more = len(rows) > per_page
+    rows = list(rows[:per_page])
+    if backwards:
+        rows.reverse()
+
+    def cursor(row):
+        return encode_cursor(row[ts_key], row[id_key])
+
+    if not rows:
+        return Page([], per_page)
+    # Paging forward from a cursor there is always a newer (prev) page, and
+    # paging backward there is always an older (next) one: the page we came from
+    has_next = True if backwards else more
+    has_prev = more if backwards else position is not None
+    return Page(rows, per_page,
+                next_cursor=cursor(rows[-1]) if has_next else None,
+                prev_cursor=cursor(rows[0]) if has_prev else None)
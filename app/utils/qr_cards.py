@@ -0,0 +1,187 @@
+"""
+QR Card Export
+Render printable QR cards for many clients in a process pool and stream
+them out as a ZIP of PNGs or a multi-page PDF sheet
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+import zlib
+
+from app.utils.cache import TTLCache
+from app.utils.helpers import ChunkSink
+from app.utils.qrcode_utils import generate_qr_code, get_client_qr_data
+
+# Card and sheet geometry in pixels at SHEET_DPI (US Letter, 3 x 4 cards)
+SHEET_DPI = 150
+SHEET_SIZE = (1275, 1650)
+SHEET_COLUMNS, SHEET_ROWS = 3, 4
+CARDS_PER_SHEET = SHEET_COLUMNS * SHEET_ROWS
+CARD_SIZE = (SHEET_SIZE[0] // SHEET_COLUMNS, SHEET_SIZE[1] // SHEET_ROWS)
+QR_BOX_SIZE = 8
+
+# export id -> {'done', 'total'}; polled by the admin page while it downloads
+_export_progress = TTLCache('qr_card_exports', maxsize=64, ttl=3600)
+
+
+def track_export(export_id, total):
+    """Start tracking an export; returns a progress(done, total) callback"""
+    def progress(done, total):
+        _export_progress.set(export_id, {'done': done, 'total': total})
+    progress(0, total)
+    return progress
+
+def get_export_progress(export_id):
+    """{'done', 'total'} for an export started in this worker, or None"""
+    return _export_progress.get(export_id)
+
+
+def _font(size):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:     # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+def attach_qr_data(clients):
+    """
+    Sign each client's QR payload up front (needs the app context, which
+    the pool workers do not have); clients need client_id and verified_date
+    """
+    for client in clients:
+        client['qr_data'] = get_client_qr_data(client['client_number'], client['client_id'],
+                                               client.get('verified_date'))
+    return clients
+
+def draw_card(client):
+    """
+    One bilevel card: QR code with the client number and name below it.
+    ``client`` needs client_number and full_name, and qr_data if it was
+    prepared by attach_qr_data.
+    """
+    from PIL import Image, ImageDraw    # imported on first card, not at startup
+
+    card = Image.new('1', CARD_SIZE, 1)
+    qr_data = client.get('qr_data') or get_client_qr_data(client['client_number'])
+    qr = generate_qr_code(qr_data, size=QR_BOX_SIZE, border=2)
+    qr = qr.get_image().convert('1')
+    card.paste(qr, ((CARD_SIZE[0] - qr.width) // 2, 20))
+
+    draw = ImageDraw.Draw(card)
+    draw.rectangle([0, 0, CARD_SIZE[0] - 1, CARD_SIZE[1] - 1], outline=0)
+    y = 30 + qr.height
+    for text, size in ((client['client_number'], 28), (client.get('full_name') or '', 20)):
+        font = _font(size)
+        width = draw.textlength(text, font=font)
+        draw.text(((CARD_SIZE[0] - width) / 2, y), text, font=font, fill=0)
+        y += size + 10
+    return card
+
+def render_card_png(client):
+    """Worker: one card as PNG bytes"""
+    out = io.BytesIO()
+    draw_card(client).save(out, 'PNG')
+    return out.getvalue()
+
+def render_sheet(clients):
+    """Worker: up to CARDS_PER_SHEET cards on one page, as zlib-compressed 1-bit rows"""
+    from PIL import Image
+
+    sheet = Image.new('1', SHEET_SIZE, 1)
+    for index, client in enumerate(clients):
+        column, row = index % SHEET_COLUMNS, index // SHEET_COLUMNS
+        sheet.paste(draw_card(client), (column * CARD_SIZE[0], row * CARD_SIZE[1]))
+    return zlib.compress(sheet.tobytes(), 6)
+
+
+def render_in_pool(function, items, processes=None, chunksize=16):
+    """
+    Yield function(item) for every item, in order, computed in a pool of
+    worker processes. Workers are spawned fresh so they never inherit the
+    parent's database connections; the pool is torn down when the
+    generator finishes or is closed (e.g. the client disconnects).
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(items) <= chunksize:
+        yield from map(function, items)
+        return
+    pool = multiprocessing.get_context('spawn').Pool(processes)
+    try:
+        yield from pool.imap(function, items, chunksize=chunksize)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def stream_zip(clients, progress=None, processes=None):
+    """
+    Yield a ZIP archive of one PNG card per client, as it is produced.
+    progress(done, total) is called after each card.
+    """
+    sink = ChunkSink()
+    total = len(clients)
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        pngs = render_in_pool(render_card_png, clients, processes)
+        for done, (client, png) in enumerate(zip(clients, pngs), start=1):
+            archive.writestr(f"{client['client_number']}.png", png)
+            if progress:
+                progress(done, total)
+            yield sink.drain()
+    yield sink.drain()
+
+def stream_pdf(clients, progress=None, processes=None):
+    """
+    Yield a printable PDF, CARDS_PER_SHEET cards per page, as pages are
+    rendered. Pages are written as they arrive and the page tree last, so
+    memory stays flat however many clients there are.
+    """
+    total = len(clients)
+    sheets = [clients[i:i + CARDS_PER_SHEET] for i in range(0, total, CARDS_PER_SHEET)]
+    width_pt = SHEET_SIZE[0] * 72 // SHEET_DPI
+    height_pt = SHEET_SIZE[1] * 72 // SHEET_DPI
+
+    offsets = {}
+    position = 0
+
+    def emit(number, body):
+        nonlocal position
+        chunk = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        offsets[number] = position
+        position += len(chunk)
+        return chunk
+
+    def stream_object(number, header, data):
+        return emit(number, b'<< %s /Length %d >>\nstream\n' % (header, len(data)) + data + b'\nendstream')
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    position = len(header)
+    yield header
+
+    # Objects 1 and 2 are the catalog and page tree; each page uses 3 more
+    page_numbers = []
+    done = 0
+    for index, pixels in enumerate(render_in_pool(render_sheet, sheets, processes, chunksize=2)):
+        image, content, page = 3 + index * 3, 4 + index * 3, 5 + index * 3
+        draw = b'q %d 0 0 %d 0 0 cm /Im0 Do Q' % (width_pt, height_pt)
+        yield stream_object(image, b'/Type /XObject /Subtype /Image /Width %d /Height %d '
+                                   b'/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /FlateDecode'
+                            % SHEET_SIZE, pixels)
+        yield stream_object(content, b'', draw)
+        yield emit(page, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                         b'/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>'
+                   % (width_pt, height_pt, image, content))
+        page_numbers.append(page)
+        done = min(total, done + CARDS_PER_SHEET)
+        if progress:
+            progress(done, total)
+
+    kids = b' '.join(b'%d 0 R' % number for number in page_numbers)
+    yield emit(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_numbers)))
+    yield emit(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+    count = 3 + len(page_numbers) * 3
+    xref = [b'xref\n0 %d\n' % count, b'0000000000 65535 f \n']
+    xref += [b'%010d 00000 n \n' % offsets[number] for number in range(1, count)]
+    yield b''.join(xref) + b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (count, position)
@@ -2,10 +2,27 @@
 QR Code Utility Functions
 Generate and manage QR codes for client numbers
 """
-import qrcode
+import base64
+import calendar
+import hashlib
+import hmac
+import os
 import io
-from flask import send_file
+import time
+from flask import send_file, current_app, has_app_context, make_response, request
 from app.database import query_db
+from app.utils.cache import TTLCache
+
+# Rendered PNGs keyed by (data, size, border); a client's payload never
+# changes, so entries only fall out when the cache is full
+_png_cache = TTLCache('qr_png', maxsize=2048)
+
+# Signed payload: FB1:<client_id>.<client_number>.<epoch>.<expires>.<signature>
+# Numbers are base 36 and the signature base 32, all upper case, so the
+# whole code fits QR alphanumeric mode
+SIGNED_PREFIX = 'FB1:'
+_SIGNATURE_BYTES = 10
+_DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
 def generate_qr_code(data, size=10, border=4):
     """
@@ -19,6 +36,10 @@ def generate_qr_code(data, size=10, border=4):
     Returns:
         PIL Image object
     """
+    # Imported on first render: qrcode pulls in Pillow, which most requests
+    # (and serverless cold starts) never need
+    import qrcode
+
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -49,33 +70,197 @@ def generate_qr_code_bytes(data, size=10, border=4):
     img_io.seek(0)
     return img_io
 
-def get_client_qr_data(client_number):
+def _disk_cache_path(data, size, border):
+    """
+    File under app/static/qr_cache for this PNG, or None if QR_DISK_CACHE is
+    off. The name is keyed with SECRET_KEY so it cannot be guessed from a
+    client number.
+    """
+    if not has_app_context() or not current_app.config.get('QR_DISK_CACHE'):
+        return None
+    key = f"{current_app.config['SECRET_KEY']}|{size}|{border}|{data}"
+    name = hashlib.sha256(key.encode()).hexdigest() + '.png'
+    return os.path.join(current_app.static_folder, 'qr_cache', name)
+
+def get_qr_png(data, size=10, border=4):
+    """
+    Rendered QR code PNG, cached in memory (and optionally on disk)
+
+    Returns:
+        (png_bytes, etag) where etag is a hash of the bytes
+    """
+    key = (data, size, border)
+    cached = _png_cache.get(key)
+    if cached is not None:
+        return cached
+
+    path = _disk_cache_path(data, size, border)
+    png = None
+    if path and os.path.exists(path):
+        with open(path, 'rb') as png_file:
+            png = png_file.read()
+    if not png:
+        png = generate_qr_code_bytes(data, size, border).getvalue()
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as png_file:
+                png_file.write(png)
+            os.replace(tmp_path, path)
+
+    cached = (png, hashlib.sha256(png).hexdigest()[:32])
+    _png_cache.set(key, cached)
+    return cached
+
+def qr_png_response(data, size=10, border=4):
+    """
+    PNG response with a strong ETag; answers If-None-Match with 304.
+    Marked private and revalidate-on-use since QR pages sit behind login.
+    """
+    png, etag = get_qr_png(data, size, border)
+    response = make_response(png)
+    response.mimetype = 'image/png'
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def _base36(number):
+    digits = ''
+    while True:
+        number, digit = divmod(number, 36)
+        digits = _DIGITS[digit] + digits
+        if not number:
+            return digits
+
+def _signing_key(key=None):
+    if key is None:
+        if not has_app_context():
+            return None
+        key = current_app.config.get('QR_SIGNING_KEY') or current_app.config['SECRET_KEY']
+    return key.encode() if isinstance(key, str) else key
+
+def _signature(message, key):
+    digest = hmac.new(key, message.encode(), hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+    return base64.b32encode(digest).decode().rstrip('=')
+
+def verification_epoch(verified_date):
+    """Seconds since 1970 of a client's verified_date (0 if unknown)"""
+    return calendar.timegm(verified_date.timetuple()) if verified_date else 0
+
+def sign_client_qr(client_id, client_number, epoch, expires=None, key=None):
+    """
+    Signed QR payload for a verified client.
+
+    Args:
+        client_id: clients.client_id
+        client_number: Client number (e.g., FL-001)
+        epoch: verification_epoch of the client's verified_date
+        expires: Unix time the code stops verifying (default: the end of the
+            QR_TOKEN_TTL_DAYS period after the current one, so the payload
+            and its cached PNG stay the same for a whole period)
+        key: HMAC key (default: QR_SIGNING_KEY, else SECRET_KEY)
+
+    Returns:
+        String data to encode in QR code
+    """
+    key = _signing_key(key)
+    if expires is None:
+        period = current_app.config['QR_TOKEN_TTL_DAYS'] * 86400
+        expires = (int(time.time()) // period + 2) * period
+    message = f"{SIGNED_PREFIX}{_base36(int(client_id))}.{client_number}.{_base36(int(epoch))}.{_base36(int(expires))}"
+    return f"{message}.{_signature(message, key)}"
+
+def verify_client_qr(qr_data, key=None, now=None):
+    """
+    Check a signed payload locally, with no database access.
+
+    Returns:
+        {'client_id', 'client_number', 'epoch', 'expires'}, or None if the
+        data is not a signed payload, is malformed, forged or expired
+    """
+    if not qr_data.startswith(SIGNED_PREFIX):
+        return None
+    key = _signing_key(key)
+    message, _, signature = qr_data.rpartition('.')
+    parts = message[len(SIGNED_PREFIX):].split('.')
+    if key is None or len(parts) != 4:
+        return None
+    if not hmac.compare_digest(signature, _signature(message, key)):
+        return None
+    client_id, client_number, epoch, expires = parts
+    try:
+        claims = {'client_id': int(client_id, 36), 'client_number': client_number,
+                  'epoch': int(epoch, 36), 'expires': int(expires, 36)}
+    except ValueError:
+        return None
+    if claims['expires'] <= (time.time() if now is None else now):
+        return None
+    return claims
+
+def get_client_qr_data(client_number, client_id=None, verified_date=None):
     """
     Get QR code data for a client
-    Format: CLIENT:FL-001 (can be extended with more info)
+    Format: a signed payload (see sign_client_qr) when the client_id is
+    given and QR_SIGNED_PAYLOADS is on, else CLIENT:FL-001
     
     Args:
         client_number: Client number (e.g., FL-001)
+        client_id: clients.client_id
+        verified_date: clients.verified_date
     
     Returns:
         String data to encode in QR code
     """
+    if client_id is not None and has_app_context() and current_app.config.get('QR_SIGNED_PAYLOADS'):
+        return sign_client_qr(client_id, client_number, verification_epoch(verified_date))
     return f"CLIENT:{client_number}"
 
-def parse_qr_data(qr_data):
+def read_client_qr(qr_data):
     """
-    Parse QR code data and extract client number
-    
+    Parse scanned QR code data into its client number and, for a signed
+    payload, its verified claims.
+
     Args:
-        qr_data: QR code scanned data
-    
+        qr_data: QR code scanned data (signed payload, CLIENT:FL-001 or FL-001)
+
     Returns:
-        Client number or None if invalid
+        (client_number, claims): claims is None for unsigned formats; both
+        are None if the data is invalid (including a forged or expired
+        signed payload). Check claims against the client found with
+        qr_matches_client before admitting them.
     """
+    if qr_data.startswith(SIGNED_PREFIX):
+        claims = verify_client_qr(qr_data)
+        return (claims['client_number'], claims) if claims else (None, None)
     if qr_data.startswith("CLIENT:"):
-        return qr_data.replace("CLIENT:", "")
+        return qr_data.replace("CLIENT:", ""), None
     # Also accept raw client numbers
     if "-" in qr_data and len(qr_data.split("-")) == 2:
-        return qr_data
-    return None
+        return qr_data, None
+    return None, None
+
+def qr_matches_client(claims, client):
+    """
+    True if a signed payload's claims (None for unsigned codes) were issued
+    to ``client`` for its current verification: a code from before a
+    re-verification carries an older epoch and no longer matches.
+    """
+    if claims is None:
+        return True
+    return (claims['client_id'] == client['client_id']
+            and claims['epoch'] == verification_epoch(client['verified_date']))
 
+def parse_qr_data(qr_data):
+    """
+    Parse QR code data and extract client number. A signed payload's
+    client_id and epoch claims are dropped, so this alone must not admit a
+    client; use read_client_qr and qr_matches_client for that.
+    
+    Args:
+        qr_data: QR code scanned data (signed payload, CLIENT:FL-001 or FL-001)
+    
+    Returns:
+        Client number or None if invalid
+    """
+    return read_client_qr(qr_data)[0]
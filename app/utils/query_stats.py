@@ -0,0 +1,190 @@
+"""
+Query Instrumentation
+Per-request query counts and timings, slow-query logging, and
+process-wide per-route / per-statement aggregates
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_app_context, has_request_context, request
+
+slow_query_logger = logging.getLogger('foodlink.slow_query')
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape so identical queries aggregate together.
+    Literals and %s placeholders become ?, and IN lists collapse to (...).
+    """
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _PLACEHOLDER_LIST.sub('(...)', sql)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sequence of numbers"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class _Series:
+    """Exact count/total/max plus a bounded window of recent samples for percentiles"""
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'avg_ms': round(self.total / self.count, 3) if self.count else None,
+            'p50_ms': _round(percentile(self.samples, 50)),
+            'p95_ms': _round(percentile(self.samples, 95)),
+            'p99_ms': _round(percentile(self.samples, 99)),
+            'max_ms': round(self.max, 3),
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+class QueryStats:
+    """Thread-safe aggregate of query timings since process start"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._routes = {}
+
+    def record_statement(self, statement, elapsed_ms):
+        with self._lock:
+            series = self._statements.get(statement)
+            if series is None:
+                series = self._statements[statement] = _Series(self.window)
+            series.add(elapsed_ms)
+
+    def record_request(self, route, num_queries, db_ms):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = (_Series(self.window), _Series(self.window))
+            entry[0].add(db_ms)
+            entry[1].add(num_queries)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {}
+            for route, (db_time, num_queries) in self._routes.items():
+                summary = db_time.summary()
+                summary['requests'] = summary.pop('count')
+                summary['queries_per_request'] = {
+                    'avg': round(num_queries.total / num_queries.count, 2),
+                    'p95': percentile(num_queries.samples, 95),
+                    'max': int(num_queries.max),
+                }
+                routes[route] = summary
+            statements = {sql: series.summary() for sql, series in self._statements.items()}
+
+        return {
+            'since': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'routes': dict(sorted(routes.items(), key=lambda kv: -kv[1]['total_ms'])),
+            'statements': dict(sorted(statements.items(), key=lambda kv: -kv[1]['total_ms'])),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._routes.clear()
+            self.started_at = time.time()
+
+
+def get_query_stats():
+    """Returns the QueryStats instance for the current app"""
+    return current_app.extensions['query_stats']
+
+
+def record_query(query, elapsed):
+    """
+    Record one executed statement. Called by query_db for every query.
+
+    Args:
+        query: SQL text as passed to cursor.execute
+        elapsed: Wall time in seconds
+    """
+    if not has_app_context() or 'query_stats' not in current_app.extensions:
+        return
+
+    elapsed_ms = elapsed * 1000.0
+    statement = normalize_sql(query)
+    get_query_stats().record_statement(statement, elapsed_ms)
+
+    if has_request_context():
+        log = g.setdefault('query_log', [])
+        log.append((statement, elapsed_ms))
+
+    threshold = current_app.config['SLOW_QUERY_THRESHOLD_MS']
+    if threshold is not None and elapsed_ms >= threshold:
+        slow_query_logger.warning(
+            '%.1f ms [%s] %s',
+            elapsed_ms,
+            request.endpoint if has_request_context() else '-',
+            statement,
+        )
+
+
+def _after_request(response):
+    log = g.get('query_log', [])
+    db_ms = sum(elapsed_ms for _, elapsed_ms in log)
+
+    if request.endpoint and request.endpoint != 'static':
+        get_query_stats().record_request(request.endpoint, len(log), db_ms)
+
+    timing = f'db;dur={db_ms:.2f};desc="{len(log)} queries"'
+    existing = response.headers.get('Server-Timing')
+    response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+    return response
+
+
+def init_query_stats(app):
+    """
+    Enable query instrumentation for an app: aggregates, the Server-Timing
+    header, and the slow-query log.
+    """
+    if not app.config['QUERY_STATS_ENABLED']:
+        return
+
+    app.extensions['query_stats'] = QueryStats(window=app.config['QUERY_STATS_WINDOW'])
+    app.after_request(_after_request)
+
+    log_path = app.config['SLOW_QUERY_LOG']
+    if log_path and not slow_query_logger.handlers:
+        handler = logging.FileHandler(log_path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.WARNING)
@@ -0,0 +1,60 @@
+"""
+Admin dashboard statistics: seven queries vs one consolidated query vs cached snapshot.
+
+Usage: python -m benchmarks.bench_dashboard_stats [--donations N] [--distributions N]
+"""
+import argparse
+
+from app.database import query_db
+from app.models import report_model
+from benchmarks.common import bench_app, report, reset_bench_database, seed, timeit
+
+
+def legacy_dashboard_stats():
+    """The original implementation: seven round trips, DATE() predicates"""
+    return {
+        'total_clients': query_db('SELECT COUNT(*) as count FROM clients', one=True)['count'],
+        'pending_verifications': query_db(
+            'SELECT COUNT(*) as count FROM clients WHERE verification_status = "pending"', one=True)['count'],
+        'verified_clients': query_db(
+            'SELECT COUNT(*) as count FROM clients WHERE verification_status = "verified"', one=True)['count'],
+        'active_volunteers': query_db(
+            'SELECT COUNT(*) as count FROM users WHERE role = "volunteer" AND is_active = 1', one=True)['count'],
+        'today_donations': query_db(
+            'SELECT COALESCE(SUM(weight_kg), 0) as total FROM donations WHERE DATE(donation_date) = CURDATE()',
+            one=True)['total'],
+        'total_donations': query_db('SELECT COALESCE(SUM(weight_kg), 0) as total FROM donations', one=True)['total'],
+        'today_distributions': query_db(
+            'SELECT COALESCE(SUM(weight_kg), 0) as total FROM distributions '
+            'WHERE DATE(distribution_date) = CURDATE()', one=True)['total'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--donations', type=int, default=200000)
+    parser.add_argument('--distributions', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    reset_bench_database()
+    seed(donations=args.donations, distributions=args.distributions)
+    app = bench_app()
+
+    with app.app_context():
+        legacy = legacy_dashboard_stats()
+        consolidated = report_model.compute_dashboard_stats()
+        for key, value in legacy.items():
+            assert float(value) == float(consolidated[key]), (key, value, consolidated[key])
+
+        results = {
+            'before (7 queries)': timeit(legacy_dashboard_stats, repeat=args.repeat),
+            'after (1 query)': timeit(report_model.compute_dashboard_stats, repeat=args.repeat),
+            'after (cached)': timeit(report_model.get_dashboard_stats, repeat=args.repeat),
+        }
+
+    report(f'get_dashboard_stats, {args.donations} donations / {args.distributions} distributions', results)
+
+
+if __name__ == '__main__':
+    main()
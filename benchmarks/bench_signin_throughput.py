@@ -0,0 +1,147 @@
+"""
+Concurrent client sign-ins: the threaded WSGI dev server (run.py) vs ASGI
+mode (uvicorn + app/asgi.py with the async sign-in view).
+
+Each server runs in its own subprocess against the scratch database. For
+every concurrency level, that many client threads log in as a volunteer
+and POST /volunteer/client-signin back to back for --seconds.
+
+Usage: python -m benchmarks.bench_signin_throughput [--concurrency 1 8 32] [--seconds N]
+       (needs uvicorn, asgiref and aiomysql for the ASGI side)
+"""
+import argparse
+import http.client
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+from app.utils.security import hash_password
+from benchmarks.common import BenchConfig, _server_connection, BENCH_DATABASE, reset_bench_database, seed
+
+PASSWORD = 'bench-password'
+
+
+def serve(mode, port):
+    """Subprocess entry point: run one server until killed"""
+    if mode == 'wsgi':
+        from werkzeug.serving import run_simple
+        from benchmarks.common import bench_app
+        run_simple('127.0.0.1', port, bench_app(), threaded=True)
+    else:
+        import uvicorn
+        from app.asgi import create_asgi_app
+        uvicorn.run(create_asgi_app(BenchConfig), host='127.0.0.1', port=port, log_level='warning')
+
+
+def _wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/auth/login')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def _log_in(conn, email):
+    body = urllib.parse.urlencode({'email': email, 'password': PASSWORD})
+    conn.request('POST', '/auth/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie', '').split(';')[0]
+    if response.status != 302 or not cookie:
+        raise RuntimeError(f'login failed for {email}: {response.status}')
+    return cookie
+
+
+def load(port, email, client_numbers, concurrency, seconds):
+    """Sign-ins per second and latency stats (ms) for one concurrency level"""
+    samples, errors = [], []
+    stop = time.monotonic() + seconds
+    lock = threading.Lock()
+
+    def worker(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        headers = {'Content-Type': 'application/x-www-form-urlencoded', 'Cookie': _log_in(conn, email)}
+        mine, n = [], offset
+        while time.monotonic() < stop:
+            body = urllib.parse.urlencode({'client_number': client_numbers[n % len(client_numbers)],
+                                           'weight_kg': '2.5'})
+            started = time.perf_counter()
+            conn.request('POST', '/volunteer/client-signin', body, headers)
+            response = conn.getresponse()
+            response.read()
+            mine.append((time.perf_counter() - started) * 1000)
+            if response.status != 302:
+                errors.append(response.status)
+            n += concurrency
+        with lock:
+            samples.extend(mine)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    samples.sort()
+    return {
+        'rps': len(samples) / elapsed,
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[max(0, int(len(samples) * 0.95) - 1)],
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--port', type=int, default=5090)
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.port)
+
+    reset_bench_database()
+    seed(donations=1000, distributions=1000)
+    conn = _server_connection(database=BENCH_DATABASE)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE users SET password_hash = %s WHERE email = 'vol0@bench.local'",
+                           (hash_password(PASSWORD),))
+            cursor.execute("SELECT client_number FROM clients WHERE verification_status = 'verified'")
+            client_numbers = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+    finally:
+        conn.close()
+
+    results = {}
+    for mode in ('wsgi', 'asgi'):
+        server = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_signin_throughput',
+                                   '--serve', mode, '--port', str(args.port)])
+        try:
+            _wait_for(args.port)
+            for concurrency in args.concurrency:
+                results[(mode, concurrency)] = load(args.port, 'vol0@bench.local', client_numbers,
+                                                    concurrency, args.seconds)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f'POST /volunteer/client-signin, {args.seconds:g}s per run')
+    for (mode, concurrency), stats in results.items():
+        print(f"  {mode} x{concurrency:<4}  {stats['rps']:>8.1f} sign-ins/s   "
+              f"median {stats['median_ms']:>8.2f} ms   p95 {stats['p95_ms']:>8.2f} ms   "
+              f"errors {stats['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Cold start: how long a fresh process takes to import the app (api/server.py,
+the Vercel entry point) and to serve its first response, with and without
+FAST_START.
+
+Every run is a new Python process, so nothing is cached between runs.
+Before the fast-start runs the templates are precompiled
+(python -m app.compile_templates).
+
+Usage: python -m benchmarks.bench_startup [--runs N] [--path /]
+       (the default mode probes the configured MySQL database at startup)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def child(path):
+    """Subprocess entry point: time the import and the first response"""
+    started = time.perf_counter()
+    from api.server import app
+    imported = time.perf_counter()
+    response = app.test_client().get(path)
+    response.get_data()
+    first_byte = time.perf_counter()
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000,
+        'first_byte_ms': (first_byte - imported) * 1000,
+        'status': response.status_code,
+    }))
+
+
+def run(path, env):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', '--path', path],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.path)
+
+    from app.compile_templates import main as compile_templates
+    compile_templates([])
+
+    modes = {
+        'default': dict(os.environ, FAST_START='0'),
+        'fast start': dict(os.environ, FAST_START='1'),
+    }
+    print(f'GET {args.path} from a fresh process, median of {args.runs} runs')
+    for name, env in modes.items():
+        results = [run(args.path, env) for _ in range(args.runs)]
+        print(f"  {name:<11} import {statistics.median(r['import_ms'] for r in results):>8.1f} ms   "
+              f"first byte {statistics.median(r['first_byte_ms'] for r in results):>8.1f} ms   "
+              f"process {statistics.median(r['process_ms'] for r in results):>8.1f} ms   "
+              f"status {results[-1]['status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Volunteer performance report: joined raw tables (fan-out) vs per-volunteer aggregates.
+
+Few volunteers with thousands of donations and distributions each is the case
+the old query handled worst: every volunteer's donations were multiplied by
+their distributions before GROUP BY.
+
+Usage: python -m benchmarks.bench_volunteer_report [--volunteers N] [--rows-per-volunteer N]
+"""
+import argparse
+from datetime import date, timedelta
+
+from app.database import query_db
+from app.models import report_model, volunteer_model
+from app.utils.helpers import day_range
+from benchmarks.common import bench_app, report, reset_bench_database, seed, timeit
+
+
+def legacy_volunteer_performance_report(start_date, end_date):
+    """The original implementation: both raw tables LEFT JOINed to users"""
+    return query_db(
+        '''SELECT 
+               u.user_id,
+               COUNT(DISTINCT DATE(d.donation_date)) as active_days,
+               COUNT(d.donation_id) as num_pickups,
+               COALESCE(SUM(d.weight_kg), 0) as total_rescued,
+               COUNT(dist.distribution_id) as num_distributions,
+               COALESCE(SUM(dist.weight_kg), 0) as total_distributed
+           FROM users u
+           LEFT JOIN donations d ON u.user_id = d.volunteer_id
+              AND d.donation_date >= %s AND d.donation_date < %s
+           LEFT JOIN distributions dist ON u.user_id = dist.volunteer_id
+              AND dist.distribution_date >= %s AND dist.distribution_date < %s
+           WHERE u.role = "volunteer"
+           GROUP BY u.user_id
+           ORDER BY total_rescued DESC''',
+        day_range(start_date, end_date) * 2
+    )
+
+
+def expected_totals(start_date, end_date):
+    """Per-volunteer counts computed one table at a time"""
+    args = day_range(start_date, end_date)
+    donations = query_db(
+        '''SELECT volunteer_id, COUNT(*) as n, SUM(weight_kg) as kg FROM donations
+           WHERE donation_date >= %s AND donation_date < %s GROUP BY volunteer_id''', args)
+    distributions = query_db(
+        '''SELECT volunteer_id, COUNT(*) as n, SUM(weight_kg) as kg FROM distributions
+           WHERE distribution_date >= %s AND distribution_date < %s GROUP BY volunteer_id''', args)
+    return ({row['volunteer_id']: (row['n'], float(row['kg'])) for row in donations},
+            {row['volunteer_id']: (row['n'], float(row['kg'])) for row in distributions})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--volunteers', type=int, default=10)
+    parser.add_argument('--rows-per-volunteer', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = args.volunteers * args.rows_per_volunteer
+    reset_bench_database()
+    seed(volunteers=args.volunteers, clients=500, donations=rows, distributions=rows, days=365)
+    app = bench_app()
+    end = date.today()
+    start = end - timedelta(days=364)
+
+    with app.app_context():
+        donations, distributions = expected_totals(start, end)
+        for row in report_model.get_volunteer_performance_report(start, end):
+            assert (row['num_pickups'], float(row['total_rescued'])) == donations.get(row['user_id'], (0, 0.0))
+            assert (row['num_distributions'], float(row['total_distributed'])) == \
+                distributions.get(row['user_id'], (0, 0.0))
+        for row in volunteer_model.get_all_volunteers_activity(start, end):
+            assert (row['num_pickups'], float(row['total_rescued'])) == donations.get(row['user_id'], (0, 0.0))
+
+        results = {
+            'before (fan-out join)': timeit(lambda: legacy_volunteer_performance_report(start, end),
+                                            repeat=args.repeat, warmup=1),
+            'after (pre-aggregated)': timeit(lambda: report_model.get_volunteer_performance_report(start, end),
+                                             repeat=args.repeat, warmup=1),
+            'all volunteers activity': timeit(lambda: volunteer_model.get_all_volunteers_activity(start, end),
+                                              repeat=args.repeat, warmup=1),
+        }
+
+    report(f'get_volunteer_performance_report, {args.volunteers} volunteers x '
+           f'{args.rows_per_volunteer} donations + distributions each', results)
+
+
+if __name__ == '__main__':
+    main()
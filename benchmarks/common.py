@@ -0,0 +1,128 @@
+"""
+Benchmark Helpers
+Scratch database setup, seeding and timing shared by the benchmark scripts.
+
+Benchmarks run against a separate database (BENCH_MYSQL_DATABASE, default
+foodlink_bench) on the configured MySQL server, never the app database.
+"""
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pymysql
+
+from app import create_app
+from app.config import Config
+from app.init_schema import create_database_from_schema
+
+BENCH_DATABASE = os.environ.get('BENCH_MYSQL_DATABASE') or 'foodlink_bench'
+
+
+class BenchConfig(Config):
+    """App config pointed at the scratch benchmark database"""
+    MYSQL_DATABASE = BENCH_DATABASE
+    MYSQL_REPLICAS = []
+    QUERY_STATS_ENABLED = False
+
+
+def _server_connection(**kwargs):
+    return pymysql.connect(
+        host=Config.MYSQL_HOST,
+        port=Config.MYSQL_PORT,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        charset='utf8mb4',
+        **kwargs
+    )
+
+
+def reset_bench_database():
+    """Drop and recreate the scratch database from migrations/schema.sql"""
+    create_database_from_schema(BENCH_DATABASE)
+
+
+def bench_app():
+    """Flask app bound to the scratch database"""
+    app = create_app(BenchConfig)
+    app.config['TESTING'] = True
+    return app
+
+
+def _insert_many(cursor, query, rows, batch=5000):
+    for start in range(0, len(rows), batch):
+        cursor.executemany(query, rows[start:start + batch])
+
+
+def seed(volunteers=20, clients=2000, donations=100000, distributions=100000, days=365, seed_value=42):
+    """
+    Fill the scratch database with synthetic activity spread over ``days``.
+    Returns the seeded volunteer and client ids.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.now()
+    conn = _server_connection(database=BENCH_DATABASE)
+    try:
+        with conn.cursor() as cursor:
+            _insert_many(cursor,
+                '''INSERT INTO users (email, password_hash, full_name, phone, role, is_active)
+                   VALUES (%s, 'x', %s, '0000000000', %s, 1)''',
+                [(f'vol{i}@bench.local', f'Volunteer {i}', 'volunteer') for i in range(volunteers)]
+                + [(f'client{i}@bench.local', f'Client {i}', 'client') for i in range(clients)])
+            cursor.execute("SELECT user_id, role FROM users WHERE email LIKE '%@bench.local' ORDER BY user_id")
+            users = cursor.fetchall()
+            volunteer_ids = [u[0] for u in users if u[1] == 'volunteer']
+            client_user_ids = [u[0] for u in users if u[1] == 'client']
+
+            _insert_many(cursor,
+                '''INSERT INTO clients (user_id, client_number, address, family_size, verification_status, verified_date)
+                   VALUES (%s, %s, 'Bench St', %s, %s, %s)''',
+                [(user_id, f'FL-{i + 1:03d}', rng.randint(1, 8),
+                  'verified' if i % 10 else 'pending', now - timedelta(days=rng.randint(0, days)))
+                 for i, user_id in enumerate(client_user_ids)])
+            cursor.execute('SELECT client_id FROM clients ORDER BY client_id')
+            client_ids = [row[0] for row in cursor.fetchall()]
+
+            def when():
+                return now - timedelta(days=rng.randint(0, days - 1), minutes=rng.randint(0, 24 * 60 - 1))
+
+            _insert_many(cursor,
+                '''INSERT INTO donations (volunteer_id, donation_date, weight_kg, food_type, source, status)
+                   VALUES (%s, %s, %s, 'Produce', 'Bench Grocer', 'collected')''',
+                [(rng.choice(volunteer_ids), when(), round(rng.uniform(1, 50), 2)) for _ in range(donations)])
+            _insert_many(cursor,
+                '''INSERT INTO distributions (client_id, volunteer_id, distribution_date, weight_kg, items_description)
+                   VALUES (%s, %s, %s, %s, 'Bench box')''',
+                [(rng.choice(client_ids), rng.choice(volunteer_ids), when(), round(rng.uniform(1, 20), 2))
+                 for _ in range(distributions)])
+        conn.commit()
+    finally:
+        conn.close()
+    return volunteer_ids, client_ids
+
+
+def timeit(fn, repeat=50, warmup=3):
+    """Run fn repeatedly; returns a dict of latency stats in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(samples[max(0, int(len(samples) * 0.95) - 1)], 2),
+        'min_ms': round(samples[0], 2),
+    }
+
+
+def report(title, results):
+    """Print a small aligned table of timeit() results"""
+    print(title)
+    width = max(len(name) for name in results)
+    for name, stats in results.items():
+        print(f"  {name:<{width}}  median {stats['median_ms']:>9.2f} ms   "
+              f"p95 {stats['p95_ms']:>9.2f} ms   min {stats['min_ms']:>9.2f} ms")
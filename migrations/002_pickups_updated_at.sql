@@ -0,0 +1,5 @@
+-- Upgrade for databases created before pickups.updated_at existed.
+-- pickup_model.update_pickup_status writes this column.
+-- Run with: python -m app.init_schema migrations/002_pickups_updated_at.sql
+ALTER TABLE pickups
+    ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
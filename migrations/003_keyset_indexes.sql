@@ -0,0 +1,20 @@
+-- Composite indexes for keyset pagination: each list is ordered by
+-- (timestamp, id) DESC within its filter, so every page is one range scan.
+-- Run with: python -m app.init_schema migrations/003_keyset_indexes.sql
+ALTER TABLE users
+    ADD INDEX idx_created (created_at, user_id),
+    ADD INDEX idx_role_created (role, created_at, user_id);
+
+ALTER TABLE clients
+    ADD INDEX idx_status_created (verification_status, created_at, client_id),
+    ADD INDEX idx_status_verified (verification_status, verified_date, client_id);
+
+ALTER TABLE donations
+    ADD INDEX idx_volunteer_date (volunteer_id, donation_date, donation_id);
+
+ALTER TABLE distributions
+    ADD INDEX idx_client_date (client_id, distribution_date, distribution_id);
+
+ALTER TABLE pickups
+    ADD INDEX idx_created (created_at, pickup_id),
+    ADD INDEX idx_user_created (user_id, created_at, pickup_id);
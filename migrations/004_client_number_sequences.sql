@@ -0,0 +1,16 @@
+-- Per-location client number sequences, seeded from the numbers already
+-- assigned so new verifications continue after the highest existing one.
+-- Safe to re-run: seeding never moves a sequence backwards.
+-- Run with: python -m app.init_schema migrations/004_client_number_sequences.sql
+CREATE TABLE IF NOT EXISTS client_number_sequences (
+    location_code VARCHAR(10) NOT NULL PRIMARY KEY,
+    last_value INT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO client_number_sequences (location_code, last_value)
+SELECT UPPER(SUBSTRING_INDEX(client_number, '-', 1)),
+       MAX(CAST(SUBSTRING_INDEX(client_number, '-', -1) AS UNSIGNED))
+FROM clients
+WHERE client_number REGEXP '^[A-Za-z0-9]{1,10}-[0-9]+$'
+GROUP BY UPPER(SUBSTRING_INDEX(client_number, '-', 1))
+ON DUPLICATE KEY UPDATE last_value = GREATEST(last_value, VALUES(last_value));
@@ -0,0 +1,13 @@
+-- Stock held by pending pickup requests until they are approved, rejected
+-- or expire. Pickups requested before this table existed have no hold and
+-- take their stock when approved.
+-- Run with: python -m app.init_schema migrations/005_inventory_reservations.sql
+CREATE TABLE IF NOT EXISTS inventory_reservations (
+    pickup_id INT NOT NULL PRIMARY KEY,
+    inventory_id INT NOT NULL,
+    quantity DECIMAL(10,2) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    FOREIGN KEY (pickup_id) REFERENCES pickups(pickup_id) ON DELETE CASCADE,
+    FOREIGN KEY (inventory_id) REFERENCES food_inventory(inventory_id),
+    INDEX idx_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,8 @@
+-- Indexes for the verified-client index's watermark poll, which reads the
+-- clients and users changed since its last look (see app/utils/client_index.py).
+-- Run with: python -m app.init_schema migrations/006_updated_at_indexes.sql
+ALTER TABLE users
+    ADD INDEX idx_updated (updated_at);
+
+ALTER TABLE clients
+    ADD INDEX idx_updated (updated_at);
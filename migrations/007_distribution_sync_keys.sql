@@ -0,0 +1,6 @@
+-- Idempotency keys for sign-ins synced from volunteer devices: a batch
+-- resent after a dropped connection is recorded only once.
+-- Run with: python -m app.init_schema migrations/007_distribution_sync_keys.sql
+ALTER TABLE distributions
+    ADD COLUMN sync_key VARCHAR(64) NULL AFTER notes,
+    ADD UNIQUE KEY uq_volunteer_sync (volunteer_id, sync_key);
@@ -0,0 +1,25 @@
+-- Background report jobs and their cached results (see
+-- app/models/report_job_model.py). Results are reused while the data
+-- watermark (newest id / updated_at of the report's source tables) is
+-- unchanged; donations.updated_at gets an index so that lookup stays cheap.
+-- Run with: python -m app.init_schema migrations/008_report_jobs.sql
+ALTER TABLE donations
+    ADD INDEX idx_updated (updated_at);
+
+CREATE TABLE IF NOT EXISTS report_jobs (
+    job_id INT AUTO_INCREMENT PRIMARY KEY,
+    report VARCHAR(50) NOT NULL,
+    params VARCHAR(255) NOT NULL,
+    params_key CHAR(64) NOT NULL,
+    status ENUM('queued', 'running', 'done', 'failed') NOT NULL DEFAULT 'queued',
+    watermark VARCHAR(255) NULL,
+    result LONGBLOB NULL,
+    row_count INT NULL,
+    error VARCHAR(255) NULL,
+    requested_by INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    FOREIGN KEY (requested_by) REFERENCES users(user_id) ON DELETE SET NULL,
+    INDEX idx_params_status (params_key, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,34 @@
+-- Daily rollup tables the reports read (see app/models/rollup_model.py).
+-- They are kept up to date by every new donation, distribution and pickup;
+-- after creating them, backfill the existing rows once:
+--     python -m app.rebuild_rollups
+-- Run with: python -m app.init_schema migrations/009_daily_rollups.sql
+CREATE TABLE IF NOT EXISTS daily_donation_rollup (
+    day DATE NOT NULL,
+    status ENUM('collected', 'in_storage', 'distributed') NOT NULL,
+    num_donations INT NOT NULL DEFAULT 0,
+    total_weight DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS daily_distribution_rollup (
+    day DATE NOT NULL PRIMARY KEY,
+    num_distributions INT NOT NULL DEFAULT 0,
+    total_weight DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    unique_clients INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- One row per client served per day, so unique_clients can be maintained incrementally
+CREATE TABLE IF NOT EXISTS daily_distribution_clients (
+    day DATE NOT NULL,
+    client_id INT NOT NULL,
+    PRIMARY KEY (day, client_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS daily_pickup_rollup (
+    day DATE NOT NULL,
+    status ENUM('pending', 'approved', 'completed', 'rejected') NOT NULL,
+    num_pickups INT NOT NULL DEFAULT 0,
+    total_quantity DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -17,7 +17,10 @@ CREATE TABLE IF NOT EXISTS users (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_email (email),
-    INDEX idx_role (role)
+    INDEX idx_role (role),
+    INDEX idx_created (created_at, user_id),
+    INDEX idx_role_created (role, created_at, user_id),
+    INDEX idx_updated (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Clients table (Extended information for registered families)
@@ -39,7 +42,10 @@ CREATE TABLE IF NOT EXISTS clients (
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (verified_by) REFERENCES users(user_id),
     INDEX idx_client_number (client_number),
-    INDEX idx_verification_status (verification_status)
+    INDEX idx_verification_status (verification_status),
+    INDEX idx_status_created (verification_status, created_at, client_id),
+    INDEX idx_status_verified (verification_status, verified_date, client_id),
+    INDEX idx_updated (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Donations table (Food rescue/pickup records)
@@ -57,7 +63,9 @@ CREATE TABLE IF NOT EXISTS donations (
     FOREIGN KEY (volunteer_id) REFERENCES users(user_id),
     INDEX idx_volunteer (volunteer_id),
     INDEX idx_date (donation_date),
-    INDEX idx_status (status)
+    INDEX idx_status (status),
+    INDEX idx_volunteer_date (volunteer_id, donation_date, donation_id),
+    INDEX idx_updated (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Food inventory table (Current food stock)
@@ -84,11 +92,14 @@ CREATE TABLE IF NOT EXISTS distributions (
     items_description TEXT,
     client_signature BOOLEAN DEFAULT FALSE,
     notes TEXT,
+    sync_key VARCHAR(64) NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (client_id) REFERENCES clients(client_id),
     FOREIGN KEY (volunteer_id) REFERENCES users(user_id),
     INDEX idx_client (client_id),
-    INDEX idx_date (distribution_date)
+    INDEX idx_date (distribution_date),
+    INDEX idx_client_date (client_id, distribution_date, distribution_id),
+    UNIQUE KEY uq_volunteer_sync (volunteer_id, sync_key)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Volunteer schedules (Shift management)
@@ -154,7 +165,78 @@ CREATE TABLE IF NOT EXISTS pickups (
     status ENUM('pending','approved','completed','rejected') DEFAULT 'pending',
     pickup_time DATETIME,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id),
-    FOREIGN KEY (inventory_id) REFERENCES food_inventory(inventory_id)
+    FOREIGN KEY (inventory_id) REFERENCES food_inventory(inventory_id),
+    INDEX idx_created (created_at, pickup_id),
+    INDEX idx_user_created (user_id, created_at, pickup_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Stock held by pending pickups (see reservation_model)
+CREATE TABLE IF NOT EXISTS inventory_reservations (
+    pickup_id INT NOT NULL PRIMARY KEY,
+    inventory_id INT NOT NULL,
+    quantity DECIMAL(10,2) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    FOREIGN KEY (pickup_id) REFERENCES pickups(pickup_id) ON DELETE CASCADE,
+    FOREIGN KEY (inventory_id) REFERENCES food_inventory(inventory_id),
+    INDEX idx_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Last client number handed out per location code (see sequence_model)
+CREATE TABLE IF NOT EXISTS client_number_sequences (
+    location_code VARCHAR(10) NOT NULL PRIMARY KEY,
+    last_value INT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Daily rollups (kept up to date by the model write paths;
+-- rebuild with: python -m app.rebuild_rollups)
+CREATE TABLE IF NOT EXISTS daily_donation_rollup (
+    day DATE NOT NULL,
+    status ENUM('collected', 'in_storage', 'distributed') NOT NULL,
+    num_donations INT NOT NULL DEFAULT 0,
+    total_weight DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+CREATE TABLE IF NOT EXISTS daily_distribution_rollup (
+    day DATE NOT NULL PRIMARY KEY,
+    num_distributions INT NOT NULL DEFAULT 0,
+    total_weight DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    unique_clients INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- One row per client served per day, so unique_clients can be maintained incrementally
+CREATE TABLE IF NOT EXISTS daily_distribution_clients (
+    day DATE NOT NULL,
+    client_id INT NOT NULL,
+    PRIMARY KEY (day, client_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS daily_pickup_rollup (
+    day DATE NOT NULL,
+    status ENUM('pending', 'approved', 'completed', 'rejected') NOT NULL,
+    num_pickups INT NOT NULL DEFAULT 0,
+    total_quantity DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Background report jobs; finished results are reused while the report's
+-- data watermark is unchanged (see app/models/report_job_model.py)
+CREATE TABLE IF NOT EXISTS report_jobs (
+    job_id INT AUTO_INCREMENT PRIMARY KEY,
+    report VARCHAR(50) NOT NULL,
+    params VARCHAR(255) NOT NULL,
+    params_key CHAR(64) NOT NULL,
+    status ENUM('queued', 'running', 'done', 'failed') NOT NULL DEFAULT 'queued',
+    watermark VARCHAR(255) NULL,
+    result LONGBLOB NULL,
+    row_count INT NULL,
+    error VARCHAR(255) NULL,
+    requested_by INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    FOREIGN KEY (requested_by) REFERENCES users(user_id) ON DELETE SET NULL,
+    INDEX idx_params_status (params_key, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -1,12 +1,19 @@
 """
 FoodLink Connect - Main Application Entry Point
-Run this file to start the Flask development server
+Run this file to start the Flask development server, or with --production
+to start the pre-forked production server (see app/serving.py):
+
+    python run.py                  # debug server
+    python run.py --production     # gunicorn workers, extra options go to app.serving
 """
-from dotenv import load_dotenv
 import os
+import sys
+
+# Environment variables from .env are loaded by the app package
 
-# Load environment variables from .env file
-load_dotenv()
+if __name__ == '__main__' and '--production' in sys.argv[1:]:
+    from app.serving import main
+    sys.exit(main([arg for arg in sys.argv[1:] if arg != '--production']))
 
 from app import create_app
 
@@ -17,5 +24,3 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     # Run in debug mode for development
     app.run(host='0.0.0.0', port=port, debug=True)
-
-
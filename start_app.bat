@@ -3,7 +3,7 @@ echo Activating virtual environment...
 call venv\Scripts\activate.bat
 
 echo Starting FoodLink Connect...
-python run.py
+python run.py %*
 
 pause
 
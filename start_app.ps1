@@ -4,5 +4,5 @@ Write-Host "Activating virtual environment..." -ForegroundColor Green
 
 Write-Host "Starting FoodLink Connect..." -ForegroundColor Green
 $env:PYTHONIOENCODING = 'utf-8'
-python run.py
+python run.py @args
 
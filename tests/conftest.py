@@ -0,0 +1,51 @@
+"""
+Shared Test Fixtures
+Tests that need a real MySQL server use ``mysql_app`` (or ``plans`` for
+EXPLAIN checks); they are skipped when the configured server is unreachable.
+"""
+import os
+
+import pymysql
+import pytest
+
+import app.database
+from app import create_app
+from app.config import Config
+from app.init_schema import create_database_from_schema
+
+TEST_DATABASE = os.environ.get('TEST_MYSQL_DATABASE') or 'foodlink_test_db'
+
+
+class MySQLTestConfig(Config):
+    """App config pointed at the scratch test database"""
+    TESTING = True
+    MYSQL_DATABASE = TEST_DATABASE
+    MYSQL_REPLICAS = []
+    QUERY_STATS_ENABLED = False
+    RESERVATION_SWEEP_SECONDS = 0
+    CLIENT_INDEX_ENABLED = False
+
+
+@pytest.fixture(scope='session')
+def mysql_app():
+    """App bound to a freshly created test database loaded from schema.sql"""
+    try:
+        create_database_from_schema(TEST_DATABASE)
+    except pymysql.err.OperationalError as exc:
+        pytest.skip(f'MySQL not available: {exc}')
+    return create_app(MySQLTestConfig)
+
+
+@pytest.fixture
+def plans(mysql_app, monkeypatch):
+    """Run model queries as EXPLAIN and collect the plan rows"""
+    collected = []
+    execute = app.database._execute
+
+    def explain(db, query, args, one, commit):
+        collected.extend(execute(db, 'EXPLAIN ' + query, args, False, False))
+        return None if one else []
+
+    monkeypatch.setattr(app.database, '_execute', explain)
+    with mysql_app.app_context():
+        yield collected
@@ -0,0 +1,157 @@
+"""
+Unit Tests for the ASGI Serving Mode
+Run with: pytest tests/test_asgi.py
+
+The async pool test needs a MySQL server (see conftest.mysql_app) and is
+skipped without one.
+"""
+import asyncio
+import inspect
+import threading
+import time
+from importlib import import_module
+
+import pytest
+from flask import Flask, jsonify
+
+pytest.importorskip('asgiref')
+
+from app.asgi import ASYNC_VIEWS, FlaskASGI
+from app.routes import volunteer_routes
+from app.utils.decorators import volunteer_required
+
+
+def call(asgi_app, path, method='GET', body=b'', headers=()):
+    """
+    Build one request to the ASGI app; returns (run, sent) where run() is
+    the coroutine to await and sent collects the ASGI messages
+    """
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+             'root_path': '', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+             'headers': [(name.encode(), value.encode())
+                         for name, value in (*headers, ('content-length', str(len(body))))]}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await asgi_app(scope, receive, send)
+    return run, sent
+
+
+@pytest.fixture
+def served():
+    """Bare app with a slow sync view and async views, wrapped for ASGI"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    app.add_url_rule('/', 'index', lambda: '')
+    app.add_url_rule('/login', 'auth.login', lambda: '')
+    seen = {}
+
+    @app.route('/slow')
+    def slow():
+        time.sleep(0.3)
+        return threading.current_thread().name
+
+    @app.route('/loop')
+    async def loop():
+        await asyncio.sleep(0)
+        seen['loop'] = asyncio.get_running_loop()
+        return jsonify(ok=True)
+
+    @app.route('/guarded')
+    @volunteer_required
+    async def guarded():
+        return 'secret'
+
+    return FlaskASGI(app, threads=4), seen
+
+
+def test_sync_requests_run_in_parallel(served):
+    """Slow sync views overlap on the pool instead of queueing on one thread"""
+    asgi_app, _ = served
+    runs = [call(asgi_app, '/slow') for _ in range(4)]
+
+    async def main():
+        await asyncio.gather(*(run() for run, _ in runs))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - started < 0.9
+    threads = {sent[1]['body'] for _, sent in runs}
+    assert len(threads) == 4 and all(name.startswith(b'asgi-worker') for name in threads)
+
+def test_async_views_run_on_the_server_loop(served):
+    """Async views share the server's event loop (and so its async pools)"""
+    asgi_app, seen = served
+    run, sent = call(asgi_app, '/loop')
+
+    async def main():
+        await run()
+        return asyncio.get_running_loop()
+
+    assert asyncio.run(main()) is seen['loop']
+    assert sent[0]['status'] == 200
+
+def test_role_guard_wraps_async_views(served):
+    """Access decorators keep async views async and still redirect"""
+    asgi_app, _ = served
+    run, sent = call(asgi_app, '/guarded')
+    asyncio.run(run())
+    assert sent[0]['status'] == 302
+
+def test_async_views_resolve():
+    """Every ASYNC_VIEWS target exists and is a coroutine function"""
+    for target in ASYNC_VIEWS.values():
+        module, _, name = target.partition(':')
+        view = getattr(import_module(module), name)
+        assert inspect.iscoroutinefunction(view), target
+
+def test_async_signin_view(monkeypatch):
+    """The async client_signin records through the async model under ASGI"""
+    recorded = []
+
+    async def find(number):
+        return {'client_id': 11, 'client_number': number} if number == 'FL-001' else None
+
+    async def create(**fields):
+        recorded.append(fields)
+        return 1
+
+    monkeypatch.setattr(volunteer_routes, 'find_verified_client_async', find)
+    monkeypatch.setattr(volunteer_routes, 'create_distribution_async', create)
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    app.register_blueprint(volunteer_routes.volunteer_bp, url_prefix='/volunteer')
+    app.view_functions['volunteer.client_signin'] = volunteer_routes.client_signin_async
+    with app.test_client() as client:
+        with client.session_transaction() as session:
+            session.update(user_id=7, role='volunteer')
+        cookie = client.get_cookie('session').value
+
+    run, sent = call(FlaskASGI(app, threads=2), '/volunteer/client-signin', method='POST',
+                     body=b'client_number=CLIENT%3AFL-001&weight_kg=2.5',
+                     headers=[('content-type', 'application/x-www-form-urlencoded'),
+                              ('cookie', f'session={cookie}')])
+    asyncio.run(run())
+    assert sent[0]['status'] == 302
+    assert recorded[0]['client_id'] == 11 and recorded[0]['volunteer_id'] == 7
+
+
+def test_async_query_db(mysql_app):
+    """The aiomysql pool reads and writes like query_db"""
+    pytest.importorskip('aiomysql')
+    from app import async_database
+
+    async def main():
+        with mysql_app.app_context():
+            one = await async_database.query_db('SELECT 1 as n', one=True)
+            async with async_database.transaction() as tx:
+                await tx.execute('CREATE TEMPORARY TABLE async_probe (n INT)')
+            return one
+    assert asyncio.run(main())['n'] == 1
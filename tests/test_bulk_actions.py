@@ -0,0 +1,125 @@
+"""
+Unit Tests for Bulk Approve/Reject
+Run with: pytest tests/test_bulk_actions.py
+
+The model tests need a MySQL server (see conftest.mysql_app) and are
+skipped without one.
+"""
+import pytest
+from flask import Flask
+
+from app.database import query_db
+from app.models import client_model, pickup_model, reservation_model
+from app.routes import admin_routes
+
+
+@pytest.fixture
+def bare_app():
+    """Minimal app for exercising the bulk request/response helpers"""
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', BULK_ACTION_MAX=3)
+    app.add_url_rule('/pickups', 'admin.manage_pickups', lambda: '')
+    return app
+
+
+def test_bulk_request_reads_form_and_json(bare_app):
+    """Ids come from repeated form fields or a JSON list"""
+    with bare_app.test_request_context(method='POST', data={'pickup_ids': ['3', '1'], 'action': 'approve'}):
+        ids, data = admin_routes._bulk_request('pickup_ids')
+        assert ids == [3, 1] and data.get('action') == 'approve'
+    with bare_app.test_request_context(method='POST', json={'pickup_ids': [5], 'action': 'reject'}):
+        ids, data = admin_routes._bulk_request('pickup_ids')
+        assert ids == [5] and data['action'] == 'reject'
+
+@pytest.mark.parametrize('payload', [
+    {'pickup_ids': []},
+    {'pickup_ids': [1, 2, 3, 4]},          # over BULK_ACTION_MAX
+    {'pickup_ids': ['x']},
+    {'pickup_ids': '12'},
+    [1, 2],
+])
+def test_bulk_request_rejects_bad_selections(bare_app, payload):
+    """Empty, oversized or malformed selections are refused"""
+    with bare_app.test_request_context(method='POST', json=payload):
+        assert admin_routes._bulk_request('pickup_ids')[0] is None
+
+def test_bulk_response_reports_each_item(bare_app):
+    """JSON callers get one entry per id with its outcome"""
+    results = {2: reservation_model.InsufficientStock('Not enough stock left'), 1: 'FL-007'}
+    with bare_app.test_request_context(method='POST', json={}):
+        response, status = admin_routes._bulk_response(results, 'Verified', 'client',
+                                                       'admin.manage_pickups', value_key='client_number')
+    body = response.get_json()
+    assert status == 200
+    assert (body['succeeded'], body['failed']) == (1, 1)
+    assert body['results'] == [
+        {'id': 1, 'success': True, 'client_number': 'FL-007'},
+        {'id': 2, 'success': False, 'message': 'Not enough stock left'},
+    ]
+
+def test_bulk_response_flashes_for_forms(bare_app):
+    """Form posts get a summary flash and a redirect back to the list"""
+    from flask import get_flashed_messages
+    with bare_app.test_request_context(method='POST', data={}):
+        response = admin_routes._bulk_response({1: None, 2: None}, 'Approved', 'pickup',
+                                               'admin.manage_pickups')
+        assert response.status_code == 302
+        assert get_flashed_messages() == ['Approved 2 of 2 pickup(s)']
+
+
+@pytest.fixture
+def pending_clients(mysql_app):
+    """Factory for pending clients with their own user accounts"""
+    def make(count):
+        ids = []
+        with mysql_app.app_context():
+            start = query_db('SELECT COALESCE(MAX(user_id), 0) as n FROM users', one=True)['n']
+            for n in range(count):
+                user_id = query_db(
+                    '''INSERT INTO users (email, password_hash, full_name, role, is_active)
+                       VALUES (%s, 'x', %s, 'client', 0)''',
+                    (f'bulk{start + n}@example.com', f'Bulk {n}'), commit=True)
+                ids.append(client_model.create_client(user_id, 'Somewhere', 1))
+        return ids
+    return make
+
+def test_approve_clients_numbers_in_order(mysql_app, pending_clients):
+    """Pending clients are numbered consecutively; others are reported"""
+    client_ids = pending_clients(3)
+    mysql_app.config['CLIENT_NUMBER_BLOCK_SIZE'] = 1
+    with mysql_app.app_context():
+        query_db("DELETE FROM client_number_sequences WHERE location_code = 'BULK'", commit=True)
+        results = client_model.approve_clients(client_ids + [client_ids[0], 10 ** 9], 'BULK', None)
+        again = client_model.approve_clients(client_ids[:1], 'BULK', None)
+        active = query_db(
+            f'''SELECT COUNT(*) as n FROM users u JOIN clients c ON c.user_id = u.user_id
+                WHERE u.is_active = 1 AND c.client_id IN ({', '.join(['%s'] * 3)})''',
+            tuple(client_ids), one=True, primary=True)['n']
+    assert [results[client_id] for client_id in client_ids] == ['BULK-001', 'BULK-002', 'BULK-003']
+    assert isinstance(results[10 ** 9], client_model.VerificationError)
+    assert isinstance(again[client_ids[0]], client_model.VerificationError)
+    assert active == 3
+
+def test_reject_clients(mysql_app, pending_clients):
+    """Rejection records the reason on every selected pending client"""
+    client_ids = pending_clients(2)
+    with mysql_app.app_context():
+        results = client_model.reject_clients(client_ids, 'Duplicate')
+        notes = {row['notes'] for row in query_db(
+            'SELECT notes FROM clients WHERE client_id IN (%s, %s)', tuple(client_ids), primary=True)}
+    assert set(results.values()) == {None}
+    assert notes == {'Duplicate'}
+
+def test_reject_pickups_returns_stock(mysql_app):
+    """Bulk rejection puts every hold back in one transaction"""
+    with mysql_app.app_context():
+        user_id = query_db('SELECT user_id FROM users LIMIT 1', one=True)['user_id']
+        inventory_id = query_db(
+            "INSERT INTO food_inventory (food_category, quantity_kg) VALUES ('Bulk test', 6)",
+            commit=True)
+        pickup_ids = [pickup_model.create_pickup(user_id, inventory_id, 2) for _ in range(3)]
+        results = reservation_model.reject_pickups(pickup_ids)
+        left = query_db('SELECT quantity_kg FROM food_inventory WHERE inventory_id = %s',
+                        (inventory_id,), one=True, primary=True)['quantity_kg']
+    assert set(results.values()) == {None}
+    assert left == 6
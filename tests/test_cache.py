@@ -0,0 +1,35 @@
+"""
+Unit Tests for In-Process Caches
+Run with: pytest tests/test_cache.py
+"""
+import time
+from app.utils.cache import TTLCache, cache_stats
+
+def test_lru_eviction_and_counters():
+    """Least recently used entries go first; hits and misses are counted"""
+    cache = TTLCache('test_lru', maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache_stats()['test_lru']['hits'] == 3
+    assert cache_stats()['test_lru']['misses'] == 1
+
+def test_entries_expire_after_ttl():
+    """Entries past their TTL are treated as misses"""
+    cache = TTLCache('test_ttl', ttl=0.01)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=60)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+
+def test_get_or_set_computes_once():
+    """get_or_set only calls compute on a miss"""
+    cache = TTLCache('test_get_or_set')
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_set('k', lambda: calls.append(1) or 'v') == 'v'
+    assert len(calls) == 1
@@ -0,0 +1,61 @@
+"""
+Unit Tests for the Client Lookup Cache
+Run with: pytest tests/test_client_cache.py
+"""
+import pytest
+from flask import Flask
+
+from app.models import client_model
+from app.models.client_model import get_client_by_user_id, invalidate_client
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Count get_client_by_user_id's database round trips"""
+    calls = []
+
+    def query_db(query, args=(), one=False, commit=False, primary=False):
+        calls.append(args)
+        user_id = args[0]
+        return {'client_id': user_id + 100, 'user_id': user_id, 'full_name': f'Client {user_id}'}
+
+    monkeypatch.setattr(client_model, 'query_db', query_db)
+    client_model._client_cache.clear()
+    return calls
+
+@pytest.fixture
+def cache_app():
+    app = Flask(__name__)
+    app.config['CLIENT_CACHE_TTL'] = 60
+    return app
+
+
+def test_memoized_within_request(cache_app, lookups):
+    """Repeated lookups in one request hit the database once"""
+    with cache_app.app_context():
+        first = get_client_by_user_id(7)
+        assert get_client_by_user_id('7') is first
+    assert len(lookups) == 1
+
+def test_cached_across_requests(cache_app, lookups):
+    """A later request is served from the process cache"""
+    with cache_app.app_context():
+        get_client_by_user_id(7)
+    with cache_app.app_context():
+        client = get_client_by_user_id(7)
+        client['full_name'] = 'changed by caller'
+    with cache_app.app_context():
+        assert get_client_by_user_id(7)['full_name'] == 'Client 7'
+    assert len(lookups) == 1
+    assert client_model._client_cache.stats()['hits'] == 2
+
+def test_invalidate_by_user_or_client_id(cache_app, lookups):
+    """Either key drops the cached row and the request memo"""
+    with cache_app.app_context():
+        get_client_by_user_id(7)
+        get_client_by_user_id(8)
+        invalidate_client(user_id=7)
+        get_client_by_user_id(7)
+        invalidate_client(client_id=108)
+        get_client_by_user_id(8)
+    assert lookups == [(7,), (8,), (7,), (8,)]
@@ -0,0 +1,126 @@
+"""
+Unit Tests for the Verified Client Index
+Run with: pytest tests/test_client_index.py
+"""
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app.utils import client_index
+from app.utils.client_index import ClientIndex, find_verified_client, find_verified_clients
+
+VERIFIED = datetime(2025, 1, 1, 9, 0)
+
+
+def row(client_id, number, status='verified', name=None):
+    return {'client_id': client_id, 'client_number': number, 'verification_status': status,
+            'full_name': name or f'Client {client_id}', 'email': f'c{client_id}@example.com',
+            'verified_date': VERIFIED if status == 'verified' else None}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Fake clients table behind query_db; records every statement run"""
+    rows = {1: row(1, 'FL-001'), 2: row(2, 'FL-002'), 3: row(3, None, 'pending')}
+    calls = []
+
+    def query_db(query, args=(), one=False, commit=False, primary=False):
+        calls.append(query)
+        if 'NOW()' in query:
+            return {'now': datetime(2025, 1, 1)}
+        if 'c.client_number = %s' in query:
+            found = [r for r in rows.values() if r['client_number'] == args[0]]
+            return found[0] if found else None
+        if 'c.client_number IN' in query:
+            return [r for r in rows.values() if isinstance(r, dict)
+                    and r['client_number'] in args and r['verification_status'] == 'verified']
+        if 'updated_at' in query or 'IN (' in query:
+            return [rows[client_id] for client_id in sorted(rows.pop('_changed', []))]
+        return [r for r in rows.values() if isinstance(r, dict) and r['verification_status'] == 'verified']
+
+    monkeypatch.setattr(client_index, 'query_db', query_db)
+    monkeypatch.setattr(client_index, '_index', ClientIndex())
+    app = Flask(__name__)
+    app.config['CLIENT_INDEX_POLL_SECONDS'] = 60
+    with app.app_context():
+        yield rows, calls
+
+
+def test_index_patch_and_discard():
+    """Verified rows are indexed; any other status or a discard drops them"""
+    index = ClientIndex()
+    index.replace([row(1, 'FL-001'), row(2, 'FL-002', 'pending')], datetime(2025, 1, 1))
+    assert index.get('FL-001') == (1, 'Client 1', 'c1@example.com', VERIFIED)
+    assert index.get('FL-002') is None
+
+    index.apply([row(1, 'FL-009', name='Renamed'), row(2, 'FL-002')])
+    assert index.get('FL-001') is None
+    assert index.get('FL-009') == (1, 'Renamed', 'c1@example.com', VERIFIED)
+    index.apply([row(2, 'FL-002', 'rejected')])
+    index.discard([1])
+    assert len(index) == 0
+    assert index.stats()['misses'] == 2
+
+def test_hits_skip_the_database(db):
+    """Once loaded, sign-in lookups run no queries"""
+    rows, calls = db
+    client_index.load_client_index()
+    calls.clear()
+    for _ in range(3):
+        assert find_verified_client('FL-002')['client_id'] == 2
+    assert calls == []
+
+def test_miss_falls_back_and_indexes(db):
+    """A client verified elsewhere is found in the DB and indexed"""
+    rows, calls = db
+    client_index.load_client_index()
+    rows[4] = row(4, 'FL-004')
+    assert find_verified_client('FL-004')['full_name'] == 'Client 4'
+    calls.clear()
+    assert find_verified_client('FL-004') is not None
+    assert calls == []
+    assert find_verified_client('FL-999') is None
+
+def test_unloaded_index_uses_database(db):
+    """Before the startup load finishes every lookup is a query"""
+    rows, calls = db
+    assert find_verified_client('FL-001')['client_id'] == 1
+    assert find_verified_client('FL-003') is None
+    assert len(calls) == 2
+
+def test_batch_lookup_queries_misses_once(db):
+    """Index hits are served directly; every miss shares one IN (...) query"""
+    rows, calls = db
+    client_index.load_client_index()
+    rows[4], rows[5] = row(4, 'FL-004'), row(5, 'FL-005', 'pending')
+    calls.clear()
+    found = find_verified_clients(['FL-001', 'FL-004', 'FL-005', 'FL-999', '', 'FL-001'])
+    assert sorted(found) == ['FL-001', 'FL-004']
+    assert found['FL-004']['client_id'] == 4
+    assert len(calls) == 1
+    calls.clear()
+    assert 'FL-004' in find_verified_clients(['FL-004'])
+    assert calls == []
+
+def test_poll_applies_other_workers_changes(db):
+    """The watermark poll drops clients that lost verification elsewhere"""
+    rows, calls = db
+    client_index.load_client_index()
+    rows[1] = row(1, 'FL-001', 'rejected')
+    rows['_changed'] = [1]
+    assert find_verified_client('FL-001') is not None     # within the poll interval
+    client_index.poll_client_index(force=True)
+    assert find_verified_client('FL-001') is None
+
+def test_reindex_after_local_write(db):
+    """This worker's own writes re-read just the touched clients"""
+    rows, calls = db
+    client_index.load_client_index()
+    rows[2] = row(2, 'FL-002', name='New Name')
+    rows['_changed'] = [2]
+    client_index.reindex_clients(client_ids=[2])
+    assert find_verified_client('FL-002')['full_name'] == 'New Name'
+    client_index.discard_clients([2])
+    rows.pop(2)
+    assert find_verified_client('FL-002') is None
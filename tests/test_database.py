@@ -0,0 +1,312 @@
+"""
+Unit Tests for the Database Layer
+Run with: pytest tests/test_database.py
+"""
+import threading
+
+import pymysql
+import pytest
+from flask import Flask
+from app.database import (ConnectionPool, PoolTimeout, ReplicaSet, after_commit, on_table_write, query_db,
+                          stream_db, transaction)
+
+
+class FakeConnection:
+    """Minimal stand-in for a pymysql connection"""
+
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.pings = 0
+        self.healthy = True
+        self.log = []
+        self.lost = False
+        self.rows = []             # served by fetchmany
+        self.cursors_closed = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.healthy:
+            raise ConnectionError('gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    # Statement log used by the transaction tests
+    def begin(self):
+        self.log.append('BEGIN')
+
+    def commit(self):
+        self.log.append('COMMIT')
+
+    def cursor(self, cursorclass=None):
+        return FakeCursor(self)
+
+
+class FakeCursor:
+    """Records executed statements on its connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, query, args=()):
+        self.conn.log.append(query)
+        if query.startswith('FAIL'):
+            raise RuntimeError('statement failed')
+        if self.conn.lost:
+            raise pymysql.err.OperationalError(2013, 'Lost connection to MySQL server')
+        self.rowcount = 1
+        self.lastrowid = len(self.conn.log)
+
+    def executemany(self, query, seq_of_args):
+        self.conn.log.append(f'{query} x{len(seq_of_args)}')
+        self.rowcount = len(seq_of_args)
+
+    def fetchall(self):
+        return []
+
+    def fetchmany(self, size):
+        self.conn.log.append(f'FETCH {size}')
+        rows, self.conn.rows = self.conn.rows[:size], self.conn.rows[size:]
+        return rows
+
+    def close(self):
+        self.conn.cursors_closed += 1
+
+
+@pytest.fixture
+def opened():
+    """List of every connection the pool opened"""
+    return []
+
+
+def make_pool(opened, **kwargs):
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+    kwargs.setdefault('timeout', 0.05)
+    return ConnectionPool(connect, **kwargs)
+
+
+def test_pool_reuses_released_connection(opened):
+    """A released connection is handed out again instead of reconnecting"""
+    pool = make_pool(opened, size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert len(opened) == 1
+    assert conn.rollbacks == 1
+
+def test_pool_is_bounded(opened):
+    """Checkout blocks and then times out once every slot is in use"""
+    pool = make_pool(opened, size=2)
+    pool.acquire()
+    pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()['open'] == 2
+
+def test_pool_wakes_waiter_on_release(opened):
+    """A blocked checkout proceeds as soon as another thread releases"""
+    pool = make_pool(opened, size=1, timeout=2)
+    conn = pool.acquire()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(pool.acquire()))
+    waiter.start()
+    pool.release(conn)
+    waiter.join(timeout=2)
+    assert result == [conn]
+
+def test_pool_replaces_unhealthy_connection(opened):
+    """A connection that fails its checkout ping is closed and replaced"""
+    pool = make_pool(opened, size=1, ping_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.healthy = False
+    fresh = pool.acquire()
+    assert fresh is not conn
+    assert conn.closed
+    assert pool.stats()['open'] == 1
+
+def test_pool_evicts_idle_and_expired(opened):
+    """Idle-timeout and max-lifetime both retire pooled connections"""
+    pool = make_pool(opened, size=2, idle_timeout=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is not conn
+    assert conn.closed
+
+    pool = make_pool(opened, size=2, max_lifetime=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert conn.closed
+    assert pool.stats() == {'size': 2, 'open': 0, 'idle': 0, 'in_use': 0}
+
+def test_pool_frees_slot_when_connect_fails():
+    """A failed connect attempt does not leak a pool slot"""
+    def connect():
+        raise ConnectionError('refused')
+    pool = ConnectionPool(connect, size=1, timeout=0.05)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            pool.acquire()
+    assert pool.stats()['open'] == 0
+
+
+@pytest.fixture
+def db_app(opened):
+    """Flask app whose pool hands out FakeConnections"""
+    app = Flask(__name__)
+    app.extensions['db_pool'] = make_pool(opened, size=1)
+    return app
+
+def test_transaction_commits_once(db_app, opened):
+    """query_db(commit=True) inside a block defers to one COMMIT"""
+    with db_app.app_context():
+        with transaction() as tx:
+            query_db('INSERT a', commit=True)
+            query_db('INSERT b', commit=True)
+            assert tx.executemany('INSERT c', [(1,), (2,), (3,)]) == 3
+    assert opened[0].log == ['BEGIN', 'INSERT a', 'INSERT b', 'INSERT c x3', 'COMMIT']
+
+def test_transaction_rolls_back_on_error(db_app, opened):
+    """An exception rolls the whole unit of work back"""
+    with db_app.app_context():
+        with pytest.raises(RuntimeError):
+            with transaction() as tx:
+                tx.execute('UPDATE a')
+                tx.execute('FAIL b')
+        assert opened[0].rollbacks == 1
+        assert 'COMMIT' not in opened[0].log
+
+def test_nested_transaction_uses_savepoint(db_app, opened):
+    """A failing inner block rolls back to its savepoint only"""
+    with db_app.app_context():
+        with transaction() as tx:
+            tx.execute('UPDATE a')
+            with pytest.raises(RuntimeError):
+                with tx.savepoint():
+                    tx.execute('FAIL b')
+            tx.execute('UPDATE c')
+    assert opened[0].log == [
+        'BEGIN', 'UPDATE a', 'SAVEPOINT sp_1', 'FAIL b',
+        'ROLLBACK TO SAVEPOINT sp_1', 'UPDATE c', 'COMMIT',
+    ]
+
+
+def test_stream_db_fetches_in_chunks(db_app, opened):
+    """Rows come from fetchmany(chunk_size) until it runs dry, then the cursor is closed"""
+    with db_app.app_context():
+        query_db('SELECT 0')
+        conn = opened[0]
+        conn.rows = [{'n': n} for n in range(5)]
+        closed = conn.cursors_closed
+        assert list(stream_db('SELECT n', chunk_size=2)) == [{'n': n} for n in range(5)]
+        assert conn.log[1:] == ['SELECT n', 'FETCH 2', 'FETCH 2', 'FETCH 2', 'FETCH 2']
+        assert conn.cursors_closed == closed + 1
+
+def test_stream_db_closes_cursor_when_abandoned(db_app, opened):
+    """Closing the generator early closes the cursor without fetching further"""
+    with db_app.app_context():
+        query_db('SELECT 0')
+        conn = opened[0]
+        conn.rows = [{'n': n} for n in range(5)]
+        closed = conn.cursors_closed
+        rows = stream_db('SELECT n', chunk_size=2)
+        assert next(rows) == {'n': 0}
+        rows.close()
+        assert conn.cursors_closed == closed + 1
+        assert conn.log[1:] == ['SELECT n', 'FETCH 2']
+        assert conn.rollbacks == 0
+
+def test_stream_db_rolls_back_on_error(db_app, opened):
+    """A failing statement rolls the connection back, closes the cursor and re-raises"""
+    with db_app.app_context():
+        query_db('SELECT 0')
+        conn = opened[0]
+        closed = conn.cursors_closed
+        with pytest.raises(RuntimeError):
+            list(stream_db('FAIL n'))
+        assert conn.rollbacks == 1
+        assert conn.cursors_closed == closed + 1
+
+def test_stream_db_leaves_rollback_to_transaction(db_app, opened):
+    """Inside transaction() a failing stream does not roll back the block's earlier writes"""
+    with db_app.app_context():
+        with transaction() as tx:
+            tx.execute('UPDATE a')
+            with pytest.raises(RuntimeError):
+                list(stream_db('FAIL n'))
+            assert opened[0].rollbacks == 0
+    assert opened[0].log == ['BEGIN', 'UPDATE a', 'FAIL n', 'COMMIT']
+
+
+@pytest.fixture
+def replica_conns():
+    """List of every connection the replica pool opened"""
+    return []
+
+@pytest.fixture
+def replica_app(db_app, replica_conns):
+    """db_app plus one read replica"""
+    db_app.config['REPLICA_STICKY_SECONDS'] = 0
+    db_app.extensions['db_replicas'] = ReplicaSet([('replica', make_pool(replica_conns, size=1))])
+    return db_app
+
+def test_reads_go_to_replica_until_a_write(replica_app, opened, replica_conns):
+    """Reads use the replica; after a commit the request reads its own writes"""
+    with replica_app.app_context():
+        query_db('SELECT 1')
+        query_db('SELECT 2 FOR UPDATE')
+        query_db('SELECT 3', primary=True)
+        query_db('UPDATE t SET x = 1', commit=True)
+        query_db('SELECT 4')
+    assert replica_conns[0].log == ['SELECT 1']
+    assert opened[0].log == ['SELECT 2 FOR UPDATE', 'SELECT 3', 'UPDATE t SET x = 1', 'COMMIT', 'SELECT 4']
+
+def test_replica_failure_falls_back_to_primary(replica_app, opened, replica_conns):
+    """A dropped replica connection is retried on the primary and skipped afterwards"""
+    with replica_app.app_context():
+        query_db('SELECT 0')
+        replica_conns[0].lost = True
+        query_db('SELECT 1')
+        query_db('SELECT 2')
+        assert replica_app.extensions['db_replicas'].stats()['replica']['healthy'] is False
+    assert opened[0].log == ['SELECT 1', 'SELECT 2']
+
+
+def test_write_listeners_fire_after_commit_only(db_app):
+    """Table write listeners run on commit, not on rollback"""
+    seen = []
+    on_table_write(['test_listener_table'], seen.append)
+    with db_app.app_context():
+        with pytest.raises(RuntimeError):
+            with transaction() as tx:
+                tx.execute('UPDATE test_listener_table SET x = 1')
+                tx.execute('FAIL')
+        assert seen == []
+        with transaction() as tx:
+            tx.execute('INSERT INTO `test_listener_table` VALUES (1)')
+            assert seen == []
+        assert seen == ['test_listener_table']
+
+def test_after_commit_waits_for_commit(db_app):
+    """after_commit callbacks run after the outer COMMIT and are dropped on rollback"""
+    seen = []
+    with db_app.app_context():
+        after_commit(lambda: seen.append('now'))
+        with pytest.raises(RuntimeError):
+            with transaction() as tx:
+                after_commit(lambda: seen.append('rolled back'))
+                tx.execute('FAIL')
+        with transaction():
+            with transaction():
+                after_commit(lambda: seen.append('committed'))
+            assert seen == ['now']
+    assert seen == ['now', 'committed']
@@ -0,0 +1,128 @@
+"""
+Unit Tests for Date-Range Filters
+Run with: pytest tests/test_date_ranges.py
+
+The EXPLAIN tests need a MySQL server (see conftest.mysql_app) and are
+skipped without one. They check the index the optimizer actually chose,
+over enough seeded rows that a table scan is not the cheaper plan.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app.database import query_db, transaction
+from app.models import donation_model, report_model, volunteer_model
+from app.utils.helpers import day_range, local_now, today_range
+
+
+def test_day_range_is_half_open():
+    """Inclusive day bounds become [start 00:00, day after end 00:00)"""
+    assert day_range('2025-03-01', '2025-03-31') == (
+        datetime(2025, 3, 1), datetime(2025, 4, 1))
+
+def test_day_range_single_day_and_types():
+    """end_day defaults to start_day; dates and datetimes are accepted"""
+    expected = (datetime(2024, 12, 31), datetime(2025, 1, 1))
+    assert day_range('2024-12-31') == expected
+    assert day_range(date(2024, 12, 31)) == expected
+    assert day_range(datetime(2024, 12, 31, 23, 59), '2024-12-31') == expected
+
+def test_today_range_uses_app_timezone():
+    """today_range() follows APP_TIMEZONE rather than the server clock"""
+    tz_app = Flask(__name__)
+    tz_app.config['APP_TIMEZONE'] = 'Pacific/Kiritimati'   # UTC+14
+    with tz_app.app_context():
+        start, end = today_range()
+        now = local_now()
+    assert start <= now < end
+    assert (end - start).days == 1
+
+
+# Rows seeded so the optimizer prefers an index range over a table scan:
+# one every 7 hours across ~2 years, so January 2025 is about 4% of them
+SEED_ROWS = 2400
+SEED_START = datetime(2024, 1, 1)
+
+
+def chosen_access(plan_rows, table):
+    """(key, type) MySQL chose for ``table`` (by alias)"""
+    rows = [row for row in plan_rows if row['table'] == table]
+    assert rows, f'{table} not in plan'
+    return rows[0]['key'], rows[0]['type']
+
+def assert_range_scan(plan_rows, table, *keys):
+    """MySQL reads a range of one of ``keys`` (default idx_date) for ``table``"""
+    key, access = chosen_access(plan_rows, table)
+    assert access == 'range' and key in (keys or ('idx_date',)), (key, access)
+
+@pytest.fixture(scope='module')
+def seeded(mysql_app):
+    """Donations and distributions spread over two years, with fresh index statistics"""
+    with mysql_app.app_context():
+        volunteer_id = query_db("SELECT user_id FROM users WHERE role = 'volunteer' LIMIT 1",
+                                one=True)['user_id']
+        user_id = query_db(
+            '''INSERT INTO users (email, password_hash, full_name, role, is_active)
+               VALUES (CONCAT('ranges', UUID_SHORT(), '@example.com'), 'x', 'Range Client', 'client', 1)''',
+            commit=True)
+        client_id = query_db(
+            '''INSERT INTO clients (user_id, address, family_size, verification_status)
+               VALUES (%s, 'Somewhere', 2, 'verified')''',
+            (user_id,), commit=True)
+        days = [SEED_START + timedelta(hours=7 * n) for n in range(SEED_ROWS)]
+        with transaction() as tx:
+            tx.executemany('INSERT INTO donations (volunteer_id, donation_date, weight_kg) VALUES (%s, %s, 1)',
+                           [(volunteer_id, day) for day in days])
+            tx.executemany(
+                '''INSERT INTO distributions (client_id, volunteer_id, distribution_date, weight_kg)
+                   VALUES (%s, %s, %s, 1)''',
+                [(client_id, volunteer_id, day) for day in days])
+        query_db('ANALYZE TABLE donations, distributions')
+        return volunteer_id
+
+@pytest.fixture
+def volunteer_id(seeded):
+    """Id of the seeded volunteer account"""
+    return seeded
+
+
+def test_donations_by_date_range_uses_index(seeded, plans):
+    """Donation date-range listing reads a range of donations.idx_date"""
+    donation_model.get_donations_by_date_range('2025-01-01', '2025-01-31')
+    assert_range_scan(plans, 'd')
+
+def test_todays_donations_uses_index(volunteer_id, plans):
+    """The volunteer dashboard's today filter reads a date range of an index"""
+    donation_model.get_todays_donations_by_volunteer(volunteer_id)
+    assert_range_scan(plans, 'donations', 'idx_volunteer_date', 'idx_date')
+
+def test_volunteer_stats_use_index(volunteer_id, plans):
+    """Per-volunteer stats read a date range of an index, not DATE() over every row"""
+    volunteer_model.get_volunteer_stats(volunteer_id, '2025-01-01', '2025-01-31')
+    assert_range_scan(plans, 'd', 'idx_volunteer_date', 'idx_date')
+
+def test_all_volunteers_activity_uses_index(seeded, plans):
+    """Volunteer activity reads a range of donations.idx_date"""
+    volunteer_model.get_all_volunteers_activity('2025-01-01', '2025-01-31')
+    assert_range_scan(plans, 'donations')
+
+def test_volunteer_performance_report_uses_indexes(seeded, plans):
+    """Both aggregated tables in the performance report read a range of idx_date"""
+    report_model.get_volunteer_performance_report('2025-01-01', '2025-01-31')
+    assert_range_scan(plans, 'donations')
+    assert_range_scan(plans, 'distributions')
+
+def test_client_activity_report_uses_index(seeded, plans):
+    """
+    Client activity reads distributions through a date index: a range of
+    idx_date, or per client idx_client_date with the date checked in the index
+    """
+    report_model.get_client_activity_report('2025-01-01', '2025-01-31')
+    assert chosen_access(plans, 'dist') in {('idx_date', 'range'), ('idx_client_date', 'ref'),
+                                            ('idx_client_date', 'range')}
+
+def test_dashboard_today_uses_index(seeded, plans):
+    """Today's distributions on the dashboard read a range of idx_date"""
+    report_model.compute_dashboard_stats()
+    assert_range_scan(plans, 'distributions')
@@ -0,0 +1,79 @@
+"""
+Unit Tests for Fast Start Mode
+Run with: pytest tests/test_fast_start.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+from flask import Flask, render_template_string
+
+from app.compile_templates import compile_templates, use_compiled_templates
+from app.config import Config
+from app.database import init_db
+
+
+def _app(template_folder):
+    return Flask('fast_start_test', root_path=str(template_folder.parent), template_folder=template_folder.name)
+
+
+def test_compiled_templates_round_trip(tmp_path):
+    """Templates compiled ahead of time are served by a new app through the module loader"""
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+    (templates / 'base.html').write_text('<p>{% block body %}{% endblock %}</p>')
+    (templates / 'page.html').write_text('{% extends "base.html" %}{% block body %}Hi {{ name }}{% endblock %}')
+    compiled = tmp_path / 'compiled'
+
+    assert compile_templates(_app(templates), target=str(compiled)) == 2
+
+    app = _app(templates)
+    assert use_compiled_templates(app, target=str(compiled))
+    assert type(app.jinja_env.loader).__name__ == 'ModuleLoader'
+    with app.app_context():
+        assert app.jinja_env.get_template('page.html').render(name='Ana') == '<p>Hi Ana</p>'
+        assert render_template_string('{{ 1 + 1 }}') == '2'
+
+def test_stale_compiled_templates_are_ignored(tmp_path):
+    """Editing a template after compiling falls back to the source loader"""
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+    (templates / 'page.html').write_text('old')
+    compiled = tmp_path / 'compiled'
+    compile_templates(_app(templates), target=str(compiled))
+
+    (templates / 'page.html').write_text('new')
+    app = _app(templates)
+    assert not use_compiled_templates(app, target=str(compiled))
+    assert not use_compiled_templates(app, target=str(tmp_path / 'missing'))
+    assert app.jinja_env.get_template('page.html').render() == 'new'
+
+def test_vercel_build_compiles_templates():
+    """The deploy build produces the (gitignored) compiled templates and bundles them"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, 'vercel.json')) as config_file:
+        config = json.load(config_file)
+    assert 'python -m app.compile_templates' in config['buildCommand']
+    assert config['functions']['api/server.py']['includeFiles'] == 'app/templates_compiled/**'
+
+def test_init_db_skips_probe():
+    """With DB_CONNECT_ON_START off no connection is opened at startup"""
+    class NoProbeConfig(Config):
+        DB_CONNECT_ON_START = False
+        MYSQL_HOST = '127.0.0.1'
+        MYSQL_PORT = 1        # nothing listens here; a probe would raise
+        MYSQL_REPLICAS = ['127.0.0.1:2']
+
+    app = Flask(__name__)
+    app.config.from_object(NoProbeConfig)
+    init_db(app)
+    assert app.extensions['db_pool'].size == Config.DB_POOL_SIZE
+    assert 'db_replicas' in app.extensions
+
+def test_routes_import_without_image_libraries():
+    """PIL and qrcode load on first QR render, not when the app is imported"""
+    code = ("import sys, app.routes.client_routes, app.routes.volunteer_routes, app.routes.admin_routes; "
+            "print(sorted(m for m in ('PIL', 'qrcode', 'asyncio') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
@@ -0,0 +1,90 @@
+"""
+Unit Tests for Keyset Pagination
+Run with: pytest tests/test_pagination.py
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+import app.utils.pagination as pagination
+from app.models import pickup_model
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_page, page_size
+
+# Ten pickups, two per minute, so the id tie-break matters
+ROWS = [{'created_at': datetime(2025, 1, 1) + timedelta(minutes=i // 2), 'pickup_id': i}
+        for i in range(1, 11)]
+
+
+@pytest.fixture
+def fake_rows(monkeypatch):
+    """Serve keyset_page() from ROWS, honouring its cursor condition and LIMIT"""
+    queries = []
+
+    def query_db(query, args=()):
+        queries.append(query)
+        limit = args[-1]
+        rows = sorted(ROWS, key=lambda r: (r['created_at'], r['pickup_id']))
+        if 'created_at >' in query:
+            ts, _, row_id = args[-4:-1]
+            rows = [r for r in rows if (r['created_at'], r['pickup_id']) > (ts, row_id)]
+        elif 'created_at <' in query:
+            ts, _, row_id = args[-4:-1]
+            rows = [r for r in rows if (r['created_at'], r['pickup_id']) < (ts, row_id)]
+        if 'DESC' in query:
+            rows.reverse()
+        return rows[:limit]
+
+    monkeypatch.setattr(pagination, 'query_db', query_db)
+    return queries
+
+def fetch(**kwargs):
+    return keyset_page('SELECT * FROM pickups p', '', (), ('p.created_at', 'p.pickup_id'),
+                       per_page=3, **kwargs)
+
+
+def test_cursor_round_trip():
+    """Cursors decode to the position they encode; junk decodes to None"""
+    ts = datetime(2025, 3, 4, 5, 6, 7)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    assert decode_cursor('not-a-cursor') is None
+    assert decode_cursor(None) is None
+
+def test_page_size_is_clamped():
+    """per_page falls back to PAGE_SIZE and never exceeds MAX_PAGE_SIZE"""
+    app = Flask(__name__)
+    app.config.update(PAGE_SIZE=20, MAX_PAGE_SIZE=50)
+    with app.app_context():
+        assert page_size() == 20
+        assert page_size('abc') == 20
+        assert page_size('500') == 50
+        assert page_size(0) == 20
+        assert page_size(-3) == 1
+
+def test_walk_forward_and_back(fake_rows):
+    """Older pages cover every row once; newer links retrace the same pages"""
+    pages = [fetch()]
+    while pages[-1].has_next:
+        pages.append(fetch(after=pages[-1].next_cursor))
+    assert [[r['pickup_id'] for r in page] for page in pages] == [[10, 9, 8], [7, 6, 5], [4, 3, 2], [1]]
+    assert not pages[0].has_prev and not pages[-1].has_next
+
+    page = pages[-1]
+    for expected in reversed(pages[:-1]):
+        page = fetch(before=page.prev_cursor)
+        assert list(page) == list(expected)
+    assert not page.has_prev
+
+def test_query_uses_row_comparison_and_limit(fake_rows):
+    """Deep pages filter on the (timestamp, id) position instead of OFFSET"""
+    fetch(after=fetch().next_cursor)
+    assert 'OFFSET' not in fake_rows[-1]
+    assert '(p.created_at < %s OR (p.created_at = %s AND p.pickup_id < %s))' in fake_rows[-1]
+    assert fake_rows[-1].endswith('ORDER BY p.created_at DESC, p.pickup_id DESC LIMIT %s')
+
+
+def test_user_pickups_use_composite_index(plans):
+    """A deep page of a user's pickups can range-scan idx_user_created"""
+    pickup_model.get_pickups_by_user(1, after=encode_cursor(datetime(2025, 1, 1), 100))
+    keys = [row['possible_keys'] or '' for row in plans if row['table'] == 'p']
+    assert any('idx_user_created' in key for key in keys)
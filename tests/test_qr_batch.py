@@ -0,0 +1,62 @@
+"""
+Unit Tests for Batch QR Verification
+Run with: pytest tests/test_qr_batch.py
+"""
+import pytest
+from flask import Flask
+
+from app.routes import volunteer_routes
+
+
+@pytest.fixture
+def qr_client(monkeypatch):
+    """Test client for the batch endpoint with the client lookup faked"""
+    clients = {'FL-001': {'client_id': 11, 'client_number': 'FL-001',
+                          'full_name': 'Ada Client', 'email': 'ada@example.com'}}
+    lookups = []
+
+    def find(numbers):
+        numbers = set(numbers)
+        lookups.append(numbers)
+        return {n: clients[n] for n in numbers if n in clients}
+
+    monkeypatch.setattr(volunteer_routes, 'find_verified_clients', find)
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', QR_VERIFY_BATCH_MAX=3)
+    app.add_url_rule('/', 'index', lambda: '')
+    app.register_blueprint(volunteer_routes.volunteer_bp, url_prefix='/volunteer')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=7, role='volunteer')
+    return client, lookups
+
+
+def test_batch_reports_each_payload(qr_client):
+    """Every payload gets its own result from a single lookup"""
+    client, lookups = qr_client
+    response = client.post('/volunteer/verify-qr/batch',
+                           json={'qr_data': ['CLIENT:FL-001', 'CLIENT:FL-404', 'not a code']})
+    results = response.get_json()['results']
+    assert response.status_code == 200
+    assert results['CLIENT:FL-001'] == {'success': True, 'client': {
+        'client_number': 'FL-001', 'full_name': 'Ada Client', 'email': 'ada@example.com'}}
+    assert results['CLIENT:FL-404']['message'] == 'Client not found or not verified'
+    assert results['not a code']['message'] == 'Invalid QR code format'
+    assert len(lookups) == 1
+
+@pytest.mark.parametrize('body', [{}, {'qr_data': []}, {'qr_data': ['CLIENT:FL-001'] * 4},
+                                  {'qr_data': 'CLIENT:FL-001'}, {'qr_data': [1]}])
+def test_rejects_bad_batches(qr_client, body):
+    """Empty, oversized or malformed batches are refused without a lookup"""
+    client, lookups = qr_client
+    assert client.post('/volunteer/verify-qr/batch', json=body).status_code == 400
+    assert lookups == []
+
+def test_requires_volunteer(qr_client):
+    """Clients cannot use the batch endpoint"""
+    client, lookups = qr_client
+    with client.session_transaction() as session:
+        session['role'] = 'client'
+    response = client.post('/volunteer/verify-qr/batch', json={'qr_data': ['CLIENT:FL-001']})
+    assert response.status_code == 302
+    assert lookups == []
@@ -0,0 +1,64 @@
+"""
+Unit Tests for Bulk QR Card Export
+Run with: pytest tests/test_qr_cards.py
+"""
+import io
+import re
+import zipfile
+
+from PIL import Image
+
+from app.models import client_model
+from app.utils.qr_cards import CARDS_PER_SHEET, render_in_pool, stream_pdf, stream_zip
+
+CLIENTS = [{'client_number': f'FL-{i:03d}', 'full_name': f'Client {i}'} for i in range(1, 16)]
+
+
+def _square(n):
+    return n * n
+
+def test_pool_preserves_order():
+    """Results come back in input order from the worker pool"""
+    items = list(range(40))
+    assert list(render_in_pool(_square, items, processes=2, chunksize=4)) == [n * n for n in items]
+
+def test_zip_has_one_png_per_client():
+    """The ZIP holds a readable PNG card named after each client number"""
+    seen = []
+    data = b''.join(stream_zip(CLIENTS, progress=lambda done, total: seen.append((done, total)), processes=1))
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.namelist() == [f"{c['client_number']}.png" for c in CLIENTS]
+    assert Image.open(io.BytesIO(archive.read('FL-001.png'))).format == 'PNG'
+    assert seen[-1] == (15, 15)
+
+def test_pdf_pages_and_xref():
+    """The PDF has one page per CARDS_PER_SHEET cards and a consistent xref table"""
+    seen = []
+    pdf = b''.join(stream_pdf(CLIENTS, progress=lambda done, total: seen.append(done), processes=1))
+    pages = -(-len(CLIENTS) // CARDS_PER_SHEET)
+    assert pdf.startswith(b'%PDF-1.4') and pdf.endswith(b'%%EOF\n')
+    assert b'/Count %d' % pages in pdf
+    assert seen == [12, 15]
+
+    xref_at = int(re.search(rb'startxref\n(\d+)', pdf).group(1))
+    entries = pdf[xref_at:].split(b'\n')[3:]
+    for number in range(1, 3 + pages * 3):
+        offset = int(entries[number - 1][:10])
+        assert pdf[offset:].startswith(b'%d 0 obj' % number)
+
+def _like(pattern, value, escape='!'):
+    """MySQL LIKE semantics for the test (only % and _, with an escape character)"""
+    regex = re.sub(f'{re.escape(escape)}(.)|(%)|(_)|(.)',
+                   lambda m: (re.escape(m[1]) if m[1] else '.*' if m[2] else '.' if m[3] else re.escape(m[4])),
+                   pattern)
+    return re.fullmatch(regex, value, re.DOTALL) is not None
+
+def test_location_filter_matches_the_prefix_literally(monkeypatch):
+    """A % or _ in the location does not match other locations' clients"""
+    queries = []
+    monkeypatch.setattr(client_model, 'query_db', lambda query, args=(): queries.append((query, args)) or [])
+    client_model.get_clients_for_cards(location='5_%')
+    query, args = queries[0]
+    assert "LIKE %s ESCAPE '!'" in query
+    assert _like(args[0], '5_%-001')
+    assert not _like(args[0], '5A%-001') and not _like(args[0], '5_X-001')
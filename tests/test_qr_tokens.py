@@ -0,0 +1,178 @@
+"""
+Unit Tests for Signed QR Payloads
+Run with: pytest tests/test_qr_tokens.py
+"""
+import re
+import time
+from datetime import datetime
+
+import pymysql
+import pytest
+from flask import Flask
+
+from app.routes import volunteer_routes
+from app.utils.qrcode_utils import (get_client_qr_data, parse_qr_data, qr_matches_client, read_client_qr,
+                                    sign_client_qr, verification_epoch, verify_client_qr)
+
+VERIFIED = datetime(2025, 3, 1, 9, 30)
+EPOCH = verification_epoch(VERIFIED)
+CLIENT = {'client_id': 11, 'client_number': 'FL-001', 'full_name': 'Ada Client',
+          'email': 'ada@example.com', 'verified_date': VERIFIED}
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', QR_SIGNED_PAYLOADS=True, QR_SIGNING_KEY=None,
+                      QR_TOKEN_TTL_DAYS=365, QR_VERIFY_BATCH_MAX=10)
+    app.add_url_rule('/', 'index', lambda: '')
+    app.register_blueprint(volunteer_routes.volunteer_bp, url_prefix='/volunteer')
+    with app.app_context():
+        yield app
+
+
+def test_round_trip(app):
+    """A signed payload verifies locally and yields its claims"""
+    data = get_client_qr_data('FL-001', 11, VERIFIED)
+    assert re.fullmatch(r'[0-9A-Z$%*+\-./: ]+', data)     # QR alphanumeric mode
+    claims = verify_client_qr(data)
+    assert (claims['client_id'], claims['client_number']) == (11, 'FL-001')
+    assert claims['epoch'] == verification_epoch(VERIFIED)
+    assert claims['expires'] > time.time() + 365 * 86400
+    assert parse_qr_data(data) == 'FL-001'
+
+def test_payload_is_stable_within_a_period(app):
+    """Re-rendering a client's code gives the same data (and cached PNG)"""
+    assert get_client_qr_data('FL-001', 11, VERIFIED) == get_client_qr_data('FL-001', 11, VERIFIED)
+
+def test_tampered_expired_or_foreign_codes_fail(app):
+    """Edited claims, other keys and expired codes are rejected"""
+    data = sign_client_qr(11, 'FL-001', 0)
+    assert verify_client_qr(data.replace('FL-001', 'FL-002')) is None
+    assert parse_qr_data(data.replace('FL-001', 'FL-002')) is None
+    assert verify_client_qr(sign_client_qr(11, 'FL-001', 0, key='other')) is None
+    assert verify_client_qr(sign_client_qr(11, 'FL-001', 0, expires=int(time.time()) - 1)) is None
+    assert verify_client_qr('FB1:garbage') is None
+
+def test_signing_key_overrides_secret_key(app):
+    """QR_SIGNING_KEY, when set, is the key codes are signed with"""
+    app.config['QR_SIGNING_KEY'] = 'qr-only'
+    data = sign_client_qr(11, 'FL-001', 0)
+    assert verify_client_qr(data, key='qr-only') is not None
+    assert verify_client_qr(data, key='test') is None
+
+def test_legacy_format_still_accepted(app):
+    """Old printed cards keep working; without a client id codes stay unsigned"""
+    assert parse_qr_data('CLIENT:FL-001') == 'FL-001'
+    assert parse_qr_data('FL-001') == 'FL-001'
+    assert get_client_qr_data('FL-001') == 'CLIENT:FL-001'
+    app.config['QR_SIGNED_PAYLOADS'] = False
+    assert get_client_qr_data('FL-001', 11, VERIFIED) == 'CLIENT:FL-001'
+
+def test_read_client_qr_keeps_the_claims(app):
+    """Signed codes come back with claims that must match the client's current verification"""
+    number, claims = read_client_qr(sign_client_qr(11, 'FL-001', EPOCH))
+    assert number == 'FL-001' and qr_matches_client(claims, CLIENT)
+    _, stale = read_client_qr(sign_client_qr(11, 'FL-001', EPOCH - 86400))
+    assert not qr_matches_client(stale, CLIENT)
+    assert read_client_qr('CLIENT:FL-001') == ('FL-001', None)
+    assert qr_matches_client(None, CLIENT)
+    assert read_client_qr('FB1:garbage') == (None, None)
+
+
+@pytest.fixture
+def volunteer(app, monkeypatch):
+    """Volunteer test client whose lookups raise when `down` is set"""
+    state = {'down': False}
+
+    def lookup(number):
+        if state['down']:
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        return CLIENT if number == 'FL-001' else None
+
+    async def lookup_async(number):
+        return lookup(number)
+
+    monkeypatch.setattr(volunteer_routes, 'find_verified_client', lookup)
+    monkeypatch.setattr(volunteer_routes, 'find_verified_client_async', lookup_async)
+    monkeypatch.setattr(volunteer_routes, 'find_verified_clients',
+                        lambda numbers: {n: c for n in numbers if (c := lookup(n))})
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=7, role='volunteer')
+    return client, state
+
+def test_signed_code_admitted_while_database_down(app, volunteer):
+    """Offline, a signed code is admitted and an unsigned one refused"""
+    client, state = volunteer
+    signed = sign_client_qr(11, 'FL-001', EPOCH)
+    state['down'] = True
+    response = client.post('/volunteer/verify-qr', json={'qr_data': signed})
+    assert response.status_code == 200
+    assert response.get_json()['offline'] is True
+    assert client.post('/volunteer/verify-qr', json={'qr_data': 'CLIENT:FL-001'}).status_code == 503
+
+    results = client.post('/volunteer/verify-qr/batch',
+                          json={'qr_data': [signed, 'CLIENT:FL-001']}).get_json()['results']
+    assert results[signed]['success'] and results[signed]['offline']
+    assert not results['CLIENT:FL-001']['success']
+
+def test_signed_code_must_match_the_client(app, volunteer):
+    """Online, a code issued to another client id for this number is refused"""
+    client, state = volunteer
+    good = client.post('/volunteer/verify-qr', json={'qr_data': sign_client_qr(11, 'FL-001', EPOCH)})
+    assert good.get_json()['client']['full_name'] == 'Ada Client'
+    stale = client.post('/volunteer/verify-qr', json={'qr_data': sign_client_qr(12, 'FL-001', EPOCH)})
+    assert stale.status_code == 404
+
+def test_code_from_an_earlier_verification_is_refused(app, volunteer, monkeypatch):
+    """A code signed before the client's current verification stops working, online and offline"""
+    client, state = volunteer
+    old = sign_client_qr(11, 'FL-001', verification_epoch(datetime(2024, 6, 1, 12, 0)))
+    response = client.post('/volunteer/verify-qr', json={'qr_data': old})
+    assert response.status_code == 404
+    assert not response.get_json()['success']
+    results = client.post('/volunteer/verify-qr/batch', json={'qr_data': [old]}).get_json()['results']
+    assert not results[old]['success']
+
+    # Offline, the loaded index stands in for the database
+    state['down'] = True
+    monkeypatch.setattr(volunteer_routes, 'index_loaded', lambda: True)
+    monkeypatch.setattr(volunteer_routes, 'indexed_client',
+                        lambda number: CLIENT if number == 'FL-001' else None)
+    assert client.post('/volunteer/verify-qr', json={'qr_data': old}).status_code == 503
+    current = client.post('/volunteer/verify-qr', json={'qr_data': sign_client_qr(11, 'FL-001', EPOCH)})
+    assert current.status_code == 200
+    assert current.get_json()['client']['full_name'] == 'Ada Client'
+
+    # A client rejected since (no longer indexed) is refused too
+    monkeypatch.setattr(volunteer_routes, 'indexed_client', lambda number: None)
+    assert client.post('/volunteer/verify-qr', json={'qr_data': sign_client_qr(11, 'FL-001', EPOCH)}).status_code == 503
+
+@pytest.mark.parametrize('url', ['/volunteer/client-signin', '/async-signin'])
+def test_signin_refuses_code_from_an_earlier_verification(app, volunteer, monkeypatch, url):
+    """The sign-in forms check a signed code's client and epoch like verify_qr does"""
+    client, _ = volunteer
+    created = []
+
+    def create(**distribution):
+        created.append(distribution['client_id'])
+
+    async def create_async(**distribution):
+        create(**distribution)
+
+    app.add_url_rule('/async-signin', 'async_signin', volunteer_routes.client_signin_async,
+                     methods=['GET', 'POST'])
+    monkeypatch.setattr(volunteer_routes, 'create_distribution', create)
+    monkeypatch.setattr(volunteer_routes, 'create_distribution_async', create_async)
+    monkeypatch.setattr(volunteer_routes, 'render_template', lambda name, **context: name)
+
+    old = sign_client_qr(11, 'FL-001', verification_epoch(datetime(2024, 6, 1, 12, 0)))
+    response = client.post(url, data={'client_number': old, 'weight_kg': '2'})
+    assert response.status_code == 200 and created == []
+    with client.session_transaction() as session:
+        assert session['_flashes'][-1][1] == 'QR code is no longer valid; please issue a new one'
+
+    current = sign_client_qr(11, 'FL-001', EPOCH)
+    assert client.post(url, data={'client_number': current, 'weight_kg': '2'}).status_code == 302
+    assert created == [11]
@@ -0,0 +1,70 @@
+"""
+Unit Tests for QR Code PNG Caching
+Run with: pytest tests/test_qrcode_cache.py
+"""
+import os
+
+import pytest
+from flask import Flask
+
+from app.utils import qrcode_utils
+from app.utils.qrcode_utils import get_qr_png, qr_png_response
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Count real QR renders"""
+    calls = []
+    render = qrcode_utils.generate_qr_code_bytes
+
+    def counting(data, size=10, border=4):
+        calls.append((data, size, border))
+        return render(data, size, border)
+
+    monkeypatch.setattr(qrcode_utils, 'generate_qr_code_bytes', counting)
+    qrcode_utils._png_cache.clear()
+    return calls
+
+@pytest.fixture
+def qr_app(tmp_path):
+    app = Flask(__name__, static_folder=str(tmp_path))
+    app.config['SECRET_KEY'] = 'test'
+
+    @app.route('/qr')
+    def qr():
+        return qr_png_response('CLIENT:FL-001', size=8, border=2)
+    return app
+
+
+def test_png_rendered_once_per_key(renders):
+    """Same payload/size/border is served from memory; other sizes render separately"""
+    png, etag = get_qr_png('CLIENT:FL-001', 8, 2)
+    assert png.startswith(b'\x89PNG')
+    assert get_qr_png('CLIENT:FL-001', 8, 2) == (png, etag)
+    assert get_qr_png('CLIENT:FL-001', 10, 4)[1] != etag
+    assert len(renders) == 2
+
+def test_disk_cache_survives_memory_eviction(qr_app, renders):
+    """With QR_DISK_CACHE on, a cold process reads the PNG back from app/static/qr_cache"""
+    qr_app.config['QR_DISK_CACHE'] = True
+    with qr_app.app_context():
+        png, etag = get_qr_png('CLIENT:FL-001', 8, 2)
+        qrcode_utils._png_cache.clear()
+        assert get_qr_png('CLIENT:FL-001', 8, 2) == (png, etag)
+    files = os.listdir(os.path.join(qr_app.static_folder, 'qr_cache'))
+    assert len(files) == 1 and 'FL-001' not in files[0]
+    assert len(renders) == 1
+
+def test_conditional_get_returns_304(qr_app, renders):
+    """A matching If-None-Match gets 304 with no body"""
+    client = qr_app.test_client()
+    first = client.get('/qr')
+    assert first.status_code == 200
+    assert first.mimetype == 'image/png'
+    etag = first.headers['ETag']
+    assert not etag.startswith('W/')
+
+    again = client.get('/qr', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert client.get('/qr', headers={'If-None-Match': '"stale"'}).status_code == 200
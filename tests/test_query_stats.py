@@ -0,0 +1,41 @@
+"""
+Unit Tests for Query Instrumentation
+Run with: pytest tests/test_query_stats.py
+"""
+from flask import Flask
+from app.config import Config
+from app.utils.query_stats import init_query_stats, normalize_sql, percentile, record_query, get_query_stats
+
+def test_normalize_sql_groups_statement_shapes():
+    """Literals, placeholders and IN lists normalize to one shape"""
+    assert normalize_sql("SELECT *\n  FROM users WHERE email = %s") == 'SELECT * FROM users WHERE email = ?'
+    assert normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND s = 'x'") == \
+        normalize_sql("SELECT * FROM t WHERE id IN (1, 2) AND s = \"y\"")
+
+def test_percentile_nearest_rank():
+    """Percentiles use the nearest-rank method"""
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile([], 50) is None
+
+def test_request_sets_server_timing_and_aggregates():
+    """Queries recorded during a request show up in the header and the aggregates"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_query_stats(app)
+
+    @app.route('/probe')
+    def probe():
+        record_query('SELECT 1', 0.002)
+        record_query('SELECT 2', 0.003)
+        return 'ok'
+
+    response = app.test_client().get('/probe')
+    assert response.headers['Server-Timing'] == 'db;dur=5.00;desc="2 queries"'
+
+    with app.app_context():
+        stats = get_query_stats().snapshot()
+    assert stats['routes']['probe']['requests'] == 1
+    assert stats['routes']['probe']['queries_per_request']['max'] == 2
+    assert stats['statements']['SELECT ?']['count'] == 2
@@ -0,0 +1,156 @@
+"""
+Unit Tests for Report Exports
+Run with: pytest tests/test_report_export.py
+"""
+import csv
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from app.models import report_model
+from app.routes import admin_routes
+from app.utils.report_export import stream_csv, stream_xlsx
+
+COLUMNS = [('name', 'Name'), ('day', 'Day'), ('weight', 'Weight (kg)'), ('seen', 'Last Seen')]
+NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def _rows(count):
+    for n in range(count):
+        yield {'name': f'Client <{n}>, "A&B"', 'day': date(2025, 1, 2),
+               'weight': Decimal('2.50'), 'seen': datetime(2025, 1, 2, 13, 5) if n else None}
+
+
+def test_csv_streams_in_chunks():
+    """Rows are flushed every chunk_bytes and round-trip through csv"""
+    chunks = list(stream_csv(COLUMNS, _rows(500), chunk_bytes=1024))
+    assert len(chunks) > 10
+    assert all(len(chunk) < 2048 for chunk in chunks)
+
+    lines = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8-sig'))))
+    assert lines[0] == ['Name', 'Day', 'Weight (kg)', 'Last Seen']
+    assert lines[1] == ['Client <0>, "A&B"', '2025-01-02', '2.50', '']
+    assert lines[2][3] == '2025-01-02 13:05:00'
+    assert len(lines) == 501
+
+def test_csv_consumes_rows_lazily():
+    """Nothing is read past the chunk being written"""
+    consumed = []
+
+    def rows():
+        for row in _rows(1000):
+            consumed.append(row)
+            yield row
+
+    stream = stream_csv(COLUMNS, rows(), chunk_bytes=1024)
+    next(stream)
+    assert 0 < len(consumed) < 50
+    stream.close()
+
+def test_xlsx_is_a_valid_workbook():
+    """The streamed package has every part and one sheet row per row"""
+    chunks = list(stream_xlsx(COLUMNS, _rows(2000), sheet_name='Client Activity', chunk_bytes=4096))
+    assert len(chunks) > 5
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+    assert archive.testzip() is None
+    assert {'[Content_Types].xml', '_rels/.rels', 'xl/workbook.xml', 'xl/_rels/workbook.xml.rels',
+            'xl/styles.xml', 'xl/worksheets/sheet1.xml'} <= set(archive.namelist())
+    assert ET.fromstring(archive.read('xl/workbook.xml')).find('.//s:sheet', NS).get('name') == 'Client Activity'
+    ET.fromstring(archive.read('xl/styles.xml'))
+
+    rows = ET.fromstring(archive.read('xl/worksheets/sheet1.xml')).findall('.//s:row', NS)
+    assert len(rows) == 2001
+    header = [cell.find('.//s:t', NS).text for cell in rows[0]]
+    assert header == ['Name', 'Day', 'Weight (kg)', 'Last Seen']
+    first, second = rows[1], rows[2]
+    assert first[0].find('.//s:t', NS).text == 'Client <0>, "A&B"'
+    assert (first[1].get('r'), first[1].get('s'), first[1].find('s:v', NS).text) == ('B2', '2', '45659')
+    assert first[2].find('s:v', NS).text == '2.50'
+    assert len(first) == 3       # None leaves the cell out
+    assert second[3].get('s') == '3' and float(second[3].find('s:v', NS).text) == pytest.approx(45659 + 13 / 24 + 5 / 1440)
+
+
+@pytest.fixture
+def export_client(monkeypatch):
+    """Admin test client with a fake streamed report"""
+    calls = []
+
+    def rows(start_date, end_date):
+        calls.append((start_date, end_date))
+        yield {'day': date(2025, 1, 2), 'total': 3}
+
+    monkeypatch.setattr(admin_routes, 'REPORT_EXPORTS', {
+        'daily': (rows, [('day', 'Day'), ('total', 'Total')], True),
+        'snapshot': (rows, [('total', 'Total')], False),
+    })
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    app.add_url_rule('/', 'index', lambda: '')
+    app.register_blueprint(admin_routes.admin_bp, url_prefix='/admin')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, role='admin')
+    return client, calls
+
+def test_export_streams_csv(export_client):
+    """The export is a chunked attachment named after the report and range"""
+    client, calls = export_client
+    response = client.get('/admin/reports/daily/export?start_date=2025-01-01&end_date=2025-12-31')
+    assert response.status_code == 200
+    assert response.is_streamed and 'Content-Length' not in response.headers
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=daily_2025-01-01_2025-12-31.csv'
+    assert response.get_data().decode('utf-8-sig').splitlines() == ['Day,Total', '2025-01-02,3']
+    assert calls == [('2025-01-01', '2025-12-31')]
+
+def test_export_xlsx(export_client):
+    """format=xlsx returns a workbook"""
+    client, _ = export_client
+    response = client.get('/admin/reports/snapshot/export?format=xlsx')
+    assert response.mimetype.endswith('spreadsheetml.sheet')
+    assert response.headers['Content-Disposition'].endswith('.xlsx')
+    assert 'xl/worksheets/sheet1.xml' in zipfile.ZipFile(io.BytesIO(response.get_data())).namelist()
+
+@pytest.mark.parametrize('url', ['/admin/reports/nope/export', '/admin/reports/daily/export?format=pdf',
+                                 '/admin/reports/daily/export?start_date=yesterday'])
+def test_export_rejects_bad_requests(export_client, url):
+    """Unknown reports, formats and malformed dates go back to the reports page"""
+    client, calls = export_client
+    response = client.get(url)
+    assert response.status_code == 302
+    assert calls == []
+
+def test_malformed_dates_redirect(export_client, monkeypatch):
+    """Out-of-range dates on the reports page and QR card filters redirect instead of failing"""
+    client, _ = export_client
+    response = client.get('/admin/reports?start_date=2024-13-01&end_date=2024-12-31')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/admin/reports')
+
+    lookups = []
+    monkeypatch.setattr(admin_routes, 'get_clients_for_cards', lambda **filters: lookups.append(filters))
+    response = client.post('/admin/qr-cards', data={'verified_from': '2024-02-30'})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/admin/qr-cards')
+    assert lookups == []
+
+def test_every_report_is_exportable():
+    """Each report_model report has an export entry"""
+    exported = {rows.__name__ for rows, _, _ in report_model.REPORT_EXPORTS.values()}
+    assert exported == {'iter_dashboard_stats', 'iter_donation_summary', 'iter_distribution_summary',
+                        'iter_volunteer_performance_report', 'iter_client_activity_report'}
+
+def test_streamed_reports_match_buffered(mysql_app):
+    """Streaming a report returns the same rows as the buffered query"""
+    pairs = [(report_model.get_donation_summary, report_model.iter_donation_summary),
+             (report_model.get_distribution_summary, report_model.iter_distribution_summary),
+             (report_model.get_volunteer_performance_report, report_model.iter_volunteer_performance_report),
+             (report_model.get_client_activity_report, report_model.iter_client_activity_report)]
+    with mysql_app.app_context():
+        for get, iterate in pairs:
+            assert list(iterate('2025-01-01', '2025-12-31')) == list(get('2025-01-01', '2025-12-31'))
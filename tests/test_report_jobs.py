@@ -0,0 +1,178 @@
+"""
+Unit Tests for Background Report Jobs
+Run with: pytest tests/test_report_jobs.py
+"""
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.database import query_db
+from app.models import report_job_model
+from app.routes import admin_routes
+
+
+class JobsConfig(Config):
+    TESTING = True
+    SECRET_KEY = 'test'
+    DB_CONNECT_ON_START = False
+    CLIENT_INDEX_ENABLED = False
+    RESERVATION_SWEEP_SECONDS = 0
+    PRECOMPILED_TEMPLATES = False
+    MYSQL_REPLICAS = []
+    REPORT_INLINE_MAX_DAYS = 31
+
+
+def _job(job_id, status, report='donation-summary', start='2025-01-01', end='2025-12-31', row_count=None):
+    return {'job_id': job_id, 'report': report, 'status': status, 'row_count': row_count, 'error': None,
+            'params': json.dumps({'start_date': start, 'end_date': end}, sort_keys=True)}
+
+
+def test_results_keep_their_types():
+    """Dates, datetimes and Decimals survive the JSON round trip"""
+    rows = [{'date': date(2025, 1, 2), 'last_visit': datetime(2025, 1, 2, 13, 5, 1),
+             'total_weight': Decimal('12.50'), 'name': 'Ada', 'visits': 3, 'email': None}]
+    stored = zlib.compress(json.dumps(rows, default=report_job_model._encode_value).encode())
+    assert json.loads(zlib.decompress(stored), object_hook=report_job_model._decode_value) == rows
+    with pytest.raises(TypeError):
+        json.dumps([{'x': object()}], default=report_job_model._encode_value)
+
+def test_watermark_covers_each_source_table(monkeypatch):
+    """The watermark names every table's newest id and change; a change this second is not settled"""
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    row = {'now': now, 'users_id': 9, 'users_updated': datetime(2025, 6, 1, 11, 0, 0),
+           'donations_id': None, 'donations_updated': None, 'distributions_id': 40}
+    queries = []
+
+    def fake_query(query, args=(), one=False, **kwargs):
+        queries.append(query)
+        return row
+
+    monkeypatch.setattr(report_job_model, 'query_db', fake_query)
+    watermark, settled = report_job_model.data_watermark(('users', 'donations', 'distributions'))
+    assert watermark == 'users:9@20250601110000;donations:0;distributions:40'
+    assert settled
+    assert 'MAX(updated_at) FROM distributions' not in queries[0]
+
+    row['users_updated'] = now
+    assert report_job_model.data_watermark(('users',))[1] is False
+
+def test_every_report_has_sources():
+    """Each exportable report declares the tables its watermark covers"""
+    assert set(report_job_model.REPORT_SOURCES) == set(report_job_model.REPORT_EXPORTS)
+
+
+@pytest.fixture
+def jobs_app(monkeypatch):
+    """App with the report job model faked in memory"""
+    jobs, submitted = {}, []
+    results = {}
+
+    def submit(report, start_date, end_date, user_id=None):
+        submitted.append((report, start_date, end_date, user_id))
+        job = jobs.setdefault(report, _job(len(jobs) + 1, 'queued', report, start_date, end_date))
+        return job
+
+    def by_id(job_id):
+        return next((job for job in jobs.values() if job['job_id'] == job_id), None)
+
+    def finished(job_ids, report, start_date, end_date):
+        job = jobs.get(report)
+        return job if job and job['job_id'] in job_ids and job['status'] == 'done' else None
+
+    monkeypatch.setattr(report_job_model, 'submit_report_job', submit)
+    monkeypatch.setattr(report_job_model, 'get_report_job', by_id)
+    monkeypatch.setattr(report_job_model, 'get_finished_job', finished)
+    monkeypatch.setattr(report_job_model, 'load_report_result', lambda job_id: results.get(job_id))
+    app = create_app(JobsConfig)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, role='admin')
+    return client, jobs, submitted, results
+
+def test_submit_queues_a_job(jobs_app):
+    """A new job answers 202 with a status URL"""
+    client, _, submitted, _ = jobs_app
+    response = client.post('/admin/reports/jobs', json={'report': 'client-activity',
+                                                        'start_date': '2025-01-01', 'end_date': '2025-12-31'})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status'] == 'queued' and 'download_urls' not in body
+    assert body['status_url'] == f"/admin/reports/jobs/{body['job_id']}"
+    assert submitted == [('client-activity', '2025-01-01', '2025-12-31', 1)]
+
+@pytest.mark.parametrize('body', [{'report': 'nope'}, {'report': 'client-activity', 'start_date': 'soon'}, ['x']])
+def test_submit_rejects_bad_requests(jobs_app, body):
+    """Unknown reports and malformed dates never reach the queue"""
+    client, _, submitted, _ = jobs_app
+    assert client.post('/admin/reports/jobs', json=body).status_code == 400
+    assert submitted == []
+
+def test_finished_job_can_be_downloaded(jobs_app):
+    """A done job links to its downloads, which stream the stored rows"""
+    client, jobs, _, results = jobs_app
+    jobs['donation-summary'] = _job(5, 'done', row_count=1)
+    results[5] = [{'date': date(2025, 3, 1), 'num_donations': 2, 'total_weight': Decimal('4.50')}]
+
+    body = client.get('/admin/reports/jobs/5').get_json()
+    assert body['download_urls']['csv'] == '/admin/reports/jobs/5/download?format=csv'
+    response = client.get(body['download_urls']['csv'])
+    assert response.headers['Content-Disposition'] == 'attachment; filename=donation-summary_2025-01-01_2025-12-31.csv'
+    assert response.get_data().decode('utf-8-sig').splitlines() == [
+        'Date,Number of Donations,Total Weight (kg)', '2025-03-01,2,4.50']
+    assert client.get('/admin/reports/jobs/99').status_code == 404
+    assert client.get('/admin/reports/jobs/99/download').status_code == 302
+
+def test_long_range_report_page_runs_in_background(jobs_app, monkeypatch):
+    """Over REPORT_INLINE_MAX_DAYS the page queues jobs instead of querying inline"""
+    client, jobs, submitted, results = jobs_app
+    monkeypatch.setattr(admin_routes, 'get_donation_summary', lambda *args: pytest.fail('ran inline'))
+
+    page = client.get('/admin/reports?start_date=2025-01-01&end_date=2025-12-31').get_data(as_text=True)
+    assert 'Preparing reports' in page
+    assert [report for report, *_ in submitted] == ['donation-summary', 'volunteer-performance']
+
+    for job in jobs.values():
+        job['status'] = 'done'
+        results[job['job_id']] = []
+    page = client.get('/admin/reports?start_date=2025-01-01&end_date=2025-12-31&job=1&job=2').get_data(as_text=True)
+    assert 'Preparing reports' not in page
+    assert 'No donations found for this period.' in page
+    assert len(submitted) == 2
+
+
+@pytest.fixture
+def report_jobs(mysql_app):
+    """Inline job runner against the test database, with report_jobs emptied"""
+    mysql_app.config['REPORT_JOB_WORKERS'] = 0
+    with mysql_app.app_context():
+        query_db('DELETE FROM report_jobs', commit=True)
+    with mysql_app.test_request_context():
+        yield mysql_app
+
+def test_identical_requests_reuse_the_result(report_jobs, monkeypatch):
+    """A finished result is reused until its watermark moves, then superseded"""
+    monkeypatch.setattr(report_job_model, 'data_watermark', lambda tables: ('v1', True))
+    first = report_job_model.submit_report_job('distribution-summary', '2025-01-01', '2025-12-31')
+    assert first['status'] == 'done'
+    assert report_job_model.load_report_result(first['job_id']) is not None
+    again = report_job_model.submit_report_job('distribution-summary', '2025-01-01', '2025-12-31')
+    assert again['job_id'] == first['job_id']
+
+    monkeypatch.setattr(report_job_model, 'data_watermark', lambda tables: ('v2', True))
+    changed = report_job_model.submit_report_job('distribution-summary', '2025-01-01', '2025-12-31')
+    assert changed['job_id'] != first['job_id'] and changed['status'] == 'done'
+    assert report_job_model.get_report_job(first['job_id']) is None
+
+def test_a_job_runs_once(report_jobs):
+    """Only the first worker to claim a queued job computes it"""
+    job_id = query_db('''INSERT INTO report_jobs (report, params, params_key)
+                         VALUES ('dashboard', %s, 'k')''',
+                      (report_job_model._params('2025-01-01', '2025-01-01'),), commit=True)
+    assert report_job_model.run_report_job(report_jobs, job_id)
+    assert not report_job_model.run_report_job(report_jobs, job_id)
+    assert report_job_model.get_report_job(job_id)['row_count'] == 1
@@ -0,0 +1,175 @@
+"""
+Unit Tests for Pickup Inventory Holds
+Run with: pytest tests/test_reservations.py
+
+Everything past the expirer tests needs a MySQL server (see
+conftest.mysql_app) and is skipped without one. The stress tests race many
+connections against a single inventory row.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from app.database import query_db
+from app.models import pickup_model, reservation_model
+
+WORKERS = 20
+
+
+def test_expirer_disabled_by_zero_interval():
+    """RESERVATION_SWEEP_SECONDS = 0 starts no thread"""
+    app = Flask(__name__)
+    app.config['RESERVATION_SWEEP_SECONDS'] = 0
+    assert reservation_model.start_expirer(app) is None
+
+def test_expirer_sweeps_until_stopped(monkeypatch):
+    """The background thread keeps sweeping through errors until stopped"""
+    app = Flask(__name__)
+    app.config['RESERVATION_SWEEP_SECONDS'] = 0.01
+    calls = []
+    swept = threading.Event()
+
+    def expire():
+        calls.append(1)
+        if len(calls) >= 3:
+            swept.set()
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(reservation_model, 'expire_reservations', expire)
+    stop = reservation_model.start_expirer(app)
+    assert swept.wait(5)
+    stop.set()
+
+@pytest.mark.parametrize('quantity', ['0', '-5', 'abc', 'NaN', None])
+def test_hold_rejects_bad_quantities(quantity):
+    """Zero, negative or non-numeric quantities never reach food_inventory"""
+    with pytest.raises(reservation_model.ReservationError):
+        reservation_model.hold_stock(None, 1, 1, quantity)
+
+
+@pytest.fixture
+def stock(mysql_app):
+    """Factory for an inventory row with the given quantity; yields (app, user_id, make)"""
+    with mysql_app.app_context():
+        user_id = query_db("SELECT user_id FROM users LIMIT 1", one=True)['user_id']
+
+    def make(quantity_kg):
+        with mysql_app.app_context():
+            return query_db(
+                '''INSERT INTO food_inventory (food_category, quantity_kg)
+                   VALUES ('Stress test', %s)''',
+                (quantity_kg,),
+                commit=True
+            )
+    return mysql_app, user_id, make
+
+def quantity_left(app, inventory_id):
+    with app.app_context():
+        return query_db('SELECT quantity_kg FROM food_inventory WHERE inventory_id = %s',
+                        (inventory_id,), one=True, primary=True)['quantity_kg']
+
+def run_concurrently(app, function, items):
+    """function(item) for every item across WORKERS threads, each with its own connection"""
+    def call(item):
+        with app.app_context():
+            return function(item)
+    with ThreadPoolExecutor(WORKERS) as pool:
+        return list(pool.map(call, items))
+
+
+def test_concurrent_requests_never_oversell(stock):
+    """Only as many 1 kg requests as there are kilos get a hold"""
+    app, user_id, make = stock
+    inventory_id = make(10)
+
+    def request(_):
+        try:
+            return pickup_model.create_pickup(user_id, inventory_id, 1)
+        except reservation_model.InsufficientStock:
+            return None
+
+    created = [p for p in run_concurrently(app, request, range(30)) if p]
+    assert len(created) == 10
+    assert quantity_left(app, inventory_id) == 0
+
+def test_concurrent_approvals_never_oversell(stock):
+    """Racing approvals of hold-less pickups deduct stock exactly once each"""
+    app, user_id, make = stock
+    inventory_id = make(10)
+    with app.app_context():
+        # Pending pickups from before holds existed: approval takes the stock
+        pickup_ids = [query_db(
+            '''INSERT INTO pickups (user_id, inventory_id, quantity, status)
+               VALUES (%s, %s, 1, 'pending')''',
+            (user_id, inventory_id), commit=True) for _ in range(30)]
+
+    def approve(pickup_id):
+        try:
+            reservation_model.approve_pickup(pickup_id)
+            return True
+        except reservation_model.InsufficientStock:
+            return False
+
+    assert sum(run_concurrently(app, approve, pickup_ids)) == 10
+    assert quantity_left(app, inventory_id) == 0
+    with app.app_context():
+        approved = query_db(
+            "SELECT COUNT(*) as n FROM pickups WHERE inventory_id = %s AND status = 'approved'",
+            (inventory_id,), one=True, primary=True)['n']
+    assert approved == 10
+
+def test_approve_twice_and_reject_race(stock):
+    """Approve and reject racing on the same pickups: each settles exactly once"""
+    app, user_id, make = stock
+    inventory_id = make(20)
+    with app.app_context():
+        pickup_ids = [pickup_model.create_pickup(user_id, inventory_id, 2) for _ in range(10)]
+    assert quantity_left(app, inventory_id) == 0
+
+    def settle(job):
+        action, pickup_id = job
+        try:
+            action(pickup_id)
+            return action.__name__
+        except reservation_model.ReservationError:
+            return None
+
+    jobs = [(action, pickup_id) for pickup_id in pickup_ids
+            for action in (reservation_model.approve_pickup, reservation_model.reject_pickup,
+                           reservation_model.approve_pickup)]
+    outcomes = [o for o in run_concurrently(app, settle, jobs) if o]
+    assert len(outcomes) == len(pickup_ids)
+    rejected = outcomes.count('reject_pickup')
+    assert quantity_left(app, inventory_id) == Decimal(2 * rejected)
+
+def test_bulk_approve_reports_per_pickup(stock):
+    """One transaction approves what the stock covers and reports the rest"""
+    app, user_id, make = stock
+    inventory_id = make(3)
+    with app.app_context():
+        held = pickup_model.create_pickup(user_id, inventory_id, 2)
+        legacy = [query_db(
+            '''INSERT INTO pickups (user_id, inventory_id, quantity, status)
+               VALUES (%s, %s, 1, 'pending')''',
+            (user_id, inventory_id), commit=True) for _ in range(2)]
+        results = reservation_model.approve_pickups([held] + legacy + [held])
+    assert results[held] is None
+    assert results[legacy[0]] is None
+    assert isinstance(results[legacy[1]], reservation_model.InsufficientStock)
+    assert quantity_left(app, inventory_id) == 0
+
+def test_expired_holds_return_stock(stock):
+    """The sweep puts expired holds back; their pickups take stock again on approval"""
+    app, user_id, make = stock
+    inventory_id = make(5)
+    with app.app_context():
+        pickup_id = pickup_model.create_pickup(user_id, inventory_id, 4)
+        query_db('UPDATE inventory_reservations SET expires_at = NOW() - INTERVAL 1 SECOND '
+                 'WHERE pickup_id = %s', (pickup_id,), commit=True)
+        assert reservation_model.expire_reservations() >= 1
+        assert quantity_left(app, inventory_id) == 5
+        reservation_model.approve_pickup(pickup_id)
+    assert quantity_left(app, inventory_id) == 1
@@ -0,0 +1,123 @@
+"""
+Unit Tests for the Daily Rollups
+Run with: pytest tests/test_rollups.py
+
+The consistency tests need a MySQL server (see conftest.mysql_app) and are
+skipped without one. Each writes through the models, which maintain the
+rollups incrementally, and checks the result against a full rebuild.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.database import query_db
+from app.models import (client_model, donation_model, pickup_model, reservation_model,
+                        rollup_model, user_model, volunteer_model)
+
+DAY_ONE = datetime(2030, 5, 1, 10, 0)
+DAY_TWO = datetime(2030, 5, 2, 16, 30)
+
+# Status moves leave emptied buckets behind, which a rebuild does not create
+ROLLUP_QUERIES = {
+    'daily_donation_rollup': '''SELECT day, status, num_donations, total_weight FROM daily_donation_rollup
+                                WHERE num_donations > 0 ORDER BY day, status''',
+    'daily_distribution_rollup': '''SELECT day, num_distributions, total_weight, unique_clients
+                                    FROM daily_distribution_rollup
+                                    WHERE num_distributions > 0 ORDER BY day''',
+    'daily_distribution_clients': 'SELECT day, client_id FROM daily_distribution_clients ORDER BY day, client_id',
+    'daily_pickup_rollup': '''SELECT day, status, num_pickups, total_quantity FROM daily_pickup_rollup
+                              WHERE num_pickups > 0 ORDER BY day, status''',
+}
+
+
+def rollups():
+    return {table: query_db(query, primary=True) for table, query in ROLLUP_QUERIES.items()}
+
+def assert_matches_rebuild():
+    incremental = rollups()
+    rollup_model.rebuild_rollups()
+    assert incremental == rollups()
+
+
+@pytest.fixture
+def rollup_app(mysql_app):
+    """App context over rebuilt rollups; yields (volunteer_id, [client_id, client_id])"""
+    with mysql_app.app_context():
+        rollup_model.rebuild_rollups()
+        volunteer_id = query_db("SELECT user_id FROM users WHERE role = 'volunteer' LIMIT 1",
+                                one=True)['user_id']
+        client_ids = []
+        for _ in range(2):
+            user_id = user_model.create_user(f'rollup-{uuid.uuid4().hex}@example.com', 'x',
+                                             'Rollup Client', None, 'client', True)
+            client_ids.append(client_model.create_client(user_id, '1 Test St', 2, verification_status='verified'))
+        yield volunteer_id, client_ids
+
+
+def test_rebuild_needs_both_ends_of_a_range():
+    """A range with only one end is refused instead of rebuilding everything"""
+    with pytest.raises(ValueError):
+        rollup_model.rebuild_rollups('2025-01-01', None)
+    with pytest.raises(ValueError):
+        rollup_model.rebuild_rollups(None, '2025-01-01')
+
+def test_donations_match_rebuild(rollup_app):
+    """record_donation and move_donation keep day/status buckets exact"""
+    volunteer_id, _ = rollup_app
+    first = donation_model.create_donation(volunteer_id, DAY_ONE, Decimal('12.50'))
+    second = donation_model.create_donation(volunteer_id, DAY_ONE, Decimal('3.25'), status='in_storage')
+    donation_model.create_donation(volunteer_id, DAY_TWO, Decimal('7.00'))
+
+    donation_model.update_donation_status(first, 'in_storage')
+    donation_model.update_donation_status(first, 'distributed')
+    donation_model.update_donation_status(second, 'in_storage')     # unchanged
+    assert_matches_rebuild()
+
+def test_distributions_count_unique_clients(rollup_app):
+    """Repeat visits on a day count once, whether recorded one by one or synced in a batch"""
+    volunteer_id, (ada, bob) = rollup_app
+    for client_id, when in ((ada, DAY_ONE), (ada, DAY_ONE), (bob, DAY_ONE), (ada, DAY_TWO)):
+        volunteer_model.create_distribution(client_id, volunteer_id, when, Decimal('4.00'), 'Box')
+    volunteer_model.record_synced_distributions(volunteer_id, [
+        {'sync_key': uuid.uuid4().hex, 'client_id': client_id, 'distribution_date': when,
+         'weight_kg': Decimal('2.50'), 'items_description': 'Bag', 'notes': ''}
+        for client_id, when in ((bob, DAY_ONE), (bob, DAY_TWO), (bob, DAY_TWO))
+    ])
+
+    days = {row['day']: row for row in rollups()['daily_distribution_rollup']}
+    assert days[DAY_ONE.date()]['unique_clients'] >= 2
+    assert_matches_rebuild()
+
+def test_pickups_match_rebuild(rollup_app):
+    """record_pickup, move_pickup and the batched move_pickups keep buckets exact"""
+    _, client_ids = rollup_app
+    user_id = query_db('SELECT user_id FROM clients WHERE client_id = %s', (client_ids[0],), one=True)['user_id']
+    inventory_id = query_db("INSERT INTO food_inventory (food_category, quantity_kg) VALUES ('Rollups', 100)",
+                            commit=True)
+    pickups = [pickup_model.create_pickup(user_id, inventory_id, quantity) for quantity in (1, 2, 3, 4)]
+
+    pickup_model.update_pickup_status(pickups[0], 'approved')
+    pickup_model.update_pickup_status(pickups[0], 'completed')
+    reservation_model.approve_pickups(pickups[1:3])
+    reservation_model.reject_pickups(pickups[3:])
+    assert_matches_rebuild()
+
+def test_range_rebuild_only_touches_its_days(rollup_app):
+    """Rebuilding one day restores it and leaves the other days as they were"""
+    volunteer_id, (ada, _) = rollup_app
+    donation_model.create_donation(volunteer_id, DAY_ONE, Decimal('5.00'))
+    volunteer_model.create_distribution(ada, volunteer_id, DAY_ONE, Decimal('1.00'), 'Box')
+    volunteer_model.create_distribution(ada, volunteer_id, DAY_TWO, Decimal('1.00'), 'Box')
+    expected = rollups()
+
+    query_db('DELETE FROM daily_donation_rollup WHERE day = %s', (DAY_ONE.date(),), commit=True)
+    query_db('DELETE FROM daily_distribution_rollup WHERE day = %s', (DAY_ONE.date(),), commit=True)
+    query_db('DELETE FROM daily_distribution_clients WHERE day = %s', (DAY_TWO.date(),), commit=True)
+    rollup_model.rebuild_rollups(DAY_ONE.date(), DAY_ONE.date())
+
+    restored = rollups()
+    assert restored['daily_donation_rollup'] == expected['daily_donation_rollup']
+    assert restored['daily_distribution_rollup'] == expected['daily_distribution_rollup']
+    assert not any(row['day'] == DAY_TWO.date() for row in restored['daily_distribution_clients'])
@@ -0,0 +1,155 @@
+"""
+Unit Tests for Client Number Sequences
+Run with: pytest tests/test_sequences.py
+
+The allocation tests against the real table need a MySQL server (see
+conftest.mysql_app) and are skipped without one.
+"""
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from flask import Flask
+
+from app.database import query_db, transaction
+from app.models import sequence_model
+
+
+@pytest.fixture
+def block_app(monkeypatch):
+    """App context with block prefetch on and _reserve_block faked"""
+    app = Flask(__name__)
+    app.config['CLIENT_NUMBER_BLOCK_SIZE'] = 5
+    reserved = []
+    totals = {}
+
+    def reserve(location_code, block_size):
+        totals[location_code] = totals.get(location_code, 0) + block_size
+        reserved.append(location_code)
+        return totals[location_code]
+
+    monkeypatch.setattr(sequence_model, '_reserve_block', reserve)
+    monkeypatch.setattr(sequence_model, '_blocks', {})
+    with app.app_context():
+        yield reserved
+
+
+def test_format_client_number():
+    """Values are zero-padded to three digits and grow past them"""
+    assert sequence_model.format_client_number('FL', 7) == 'FL-007'
+    assert sequence_model.format_client_number('LOC', 1234) == 'LOC-1234'
+
+def test_rejects_bad_location_codes(block_app):
+    """Codes that would not parse back out of a client number are refused"""
+    for code in ('', 'fl', 'F-L', 'ABCDEFGHIJK', None):
+        with pytest.raises(ValueError):
+            sequence_model.allocate_client_number(code)
+
+def test_block_prefetch_hands_out_numbers_in_order(block_app):
+    """One reservation serves a whole block, then the next block is fetched"""
+    numbers = [sequence_model.allocate_client_number('FL') for _ in range(7)]
+    assert numbers == [f'FL-{n:03d}' for n in range(1, 8)]
+    assert block_app == ['FL', 'FL']
+
+def test_many_numbers_span_blocks(block_app):
+    """A run longer than the block size takes several reservations"""
+    numbers = sequence_model.allocate_client_numbers('FL', 12)
+    assert numbers == [f'FL-{n:03d}' for n in range(1, 13)]
+    assert block_app == ['FL', 'FL', 'FL']
+
+def test_blocks_are_per_location(block_app):
+    """Each location code has its own block and its own numbering"""
+    assert sequence_model.allocate_client_number('FL') == 'FL-001'
+    assert sequence_model.allocate_client_number('LOC') == 'LOC-001'
+    assert sequence_model.allocate_client_number('FL') == 'FL-002'
+
+def test_threads_never_share_a_number(block_app):
+    """Concurrent callers in one worker get distinct numbers"""
+    numbers = []
+
+    def allocate():
+        for _ in range(50):
+            numbers.append(sequence_model.allocate_client_number('FL'))
+
+    app = Flask(__name__)
+    app.config['CLIENT_NUMBER_BLOCK_SIZE'] = 5
+
+    def run():
+        with app.app_context():
+            allocate()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(numbers)) == 200
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_child_drops_parent_blocks(block_app):
+    """A forked worker starts without the parent's prefetched blocks"""
+    sequence_model.allocate_client_number('FL')
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, b'1' if not sequence_model._blocks else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b'1'
+
+def test_imports_without_register_at_fork():
+    """The models import on platforms without os.register_at_fork (Windows)"""
+    code = ("import os, app.database; del os.register_at_fork; "
+            "import app.models.client_model; print('ok')")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    assert result.stdout.strip() == 'ok', result.stderr
+
+
+@pytest.fixture
+def sequence_app(mysql_app):
+    """MySQL app with an empty sequence table and numbers reserved one at a time"""
+    mysql_app.config['CLIENT_NUMBER_BLOCK_SIZE'] = 1
+    with mysql_app.app_context():
+        query_db('DELETE FROM client_number_sequences', commit=True)
+    return mysql_app
+
+def test_allocation_is_sequential(sequence_app):
+    """A new location starts at 001 and counts up"""
+    with sequence_app.app_context():
+        numbers = [sequence_model.allocate_client_number('SEQ') for _ in range(3)]
+    assert numbers == ['SEQ-001', 'SEQ-002', 'SEQ-003']
+
+def test_allocating_a_run(sequence_app):
+    """One statement reserves a consecutive run"""
+    with sequence_app.app_context():
+        sequence_model.allocate_client_number('RUN')
+        numbers = sequence_model.allocate_client_numbers('RUN', 3)
+    assert numbers == ['RUN-002', 'RUN-003', 'RUN-004']
+
+def test_rollback_returns_the_number(sequence_app):
+    """A number taken inside a rolled-back transaction is handed out again"""
+    with sequence_app.app_context():
+        with pytest.raises(RuntimeError):
+            with transaction():
+                assert sequence_model.allocate_client_number('RB') == 'RB-001'
+                raise RuntimeError('verification failed')
+        assert sequence_model.allocate_client_number('RB') == 'RB-001'
+
+def test_concurrent_allocation_is_unique(sequence_app):
+    """Parallel verifications for one location never collide or skip"""
+    numbers = []
+
+    def allocate():
+        with sequence_app.app_context():
+            for _ in range(10):
+                with transaction():
+                    numbers.append(sequence_model.allocate_client_number('CC'))
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(numbers) == [f'CC-{n:03d}' for n in range(1, 81)]
@@ -0,0 +1,65 @@
+"""
+Unit Tests for the Production Server
+Run with: pytest tests/test_serving.py
+"""
+import os
+import threading
+
+import pytest
+from flask import Flask
+
+from app.config import Config
+from app.serving import warm_worker, worker_settings
+
+
+class ServingConfig(Config):
+    WEB_WORKERS = 0
+    WEB_THREADS = 16
+    DB_POOL_SIZE = 6
+
+
+class FakePool:
+    size = 6
+
+    def __init__(self):
+        self.open = 0
+        self.released = []
+
+    def acquire(self):
+        self.open += 1
+        return object()
+
+    def release(self, conn):
+        self.released.append(conn)
+
+
+def test_settings_follow_cpus_and_pool(monkeypatch):
+    """Workers default to 2 x CPUs + 1; threads never exceed the DB pool"""
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    settings = worker_settings(ServingConfig)
+    assert settings['workers'] == 9
+    assert settings['threads'] == 6
+    assert settings['worker_class'] == 'gthread'
+    assert settings['max_requests'] == Config.WEB_MAX_REQUESTS
+
+def test_settings_are_valid_gunicorn_settings():
+    """Every key is a gunicorn setting that accepts the value"""
+    gunicorn_config = pytest.importorskip('gunicorn.config')
+    cfg = gunicorn_config.Config()
+    for key, value in worker_settings().items():
+        cfg.set(key, value)
+    assert cfg.max_requests_jitter == Config.WEB_MAX_REQUESTS_JITTER
+
+def test_warm_worker_opens_pool_and_compiles_templates():
+    """Warmup opens connections up to the pool size and fills the template cache"""
+    app = Flask('app', template_folder=os.path.join(os.path.dirname(__file__), '..', 'app', 'templates'))
+    app.config['WEB_WARMUP_TIMEOUT'] = 1
+    pool = app.extensions['db_pool'] = FakePool()
+    loader = app.extensions['client_index_loader'] = threading.Thread(target=lambda: None)
+    loader.start()
+
+    warm_worker(app, connections=10)
+    assert pool.open == 6 and len(pool.released) == 6
+    assert not loader.is_alive()
+    assert len(app.jinja_env.cache) >= len(
+        [name for name in app.jinja_env.list_templates() if name.endswith('.html')])
@@ -0,0 +1,142 @@
+"""
+Unit Tests for Offline Sign-in Sync
+Run with: pytest tests/test_signin_sync.py
+
+The recording tests need a MySQL server (see conftest.mysql_app) and are
+skipped without one.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from app.database import query_db
+from app.models import volunteer_model
+from app.routes import volunteer_routes
+from app.utils.qrcode_utils import sign_client_qr, verification_epoch
+
+KEY = 'a1b2c3d4-0000-4000-8000-000000000001'
+VERIFIED = datetime(2025, 3, 1, 9, 30)
+
+
+@pytest.fixture
+def sync_client(monkeypatch):
+    """Test client for the sync endpoint with lookups and recording faked"""
+    clients = {'FL-001': {'client_id': 11, 'client_number': 'FL-001', 'verified_date': VERIFIED}}
+    recorded = []
+
+    def record(volunteer_id, distributions):
+        recorded.append((volunteer_id, distributions))
+        return {row['sync_key']: (500 + n, row['sync_key'] != 'already-synced-key')
+                for n, row in enumerate(distributions)}
+
+    monkeypatch.setattr(volunteer_routes, 'find_verified_clients',
+                        lambda numbers: {n: clients[n] for n in numbers if n in clients})
+    monkeypatch.setattr(volunteer_routes, 'record_synced_distributions', record)
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', SIGNIN_SYNC_MAX=3, QR_TOKEN_TTL_DAYS=365)
+    app.register_blueprint(volunteer_routes.volunteer_bp, url_prefix='/volunteer')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=7, role='volunteer')
+    return client, recorded
+
+def signin(key=KEY, **fields):
+    return {'key': key, 'client_number': 'FL-001', 'weight_kg': '2.5', **fields}
+
+
+def test_sync_reports_each_signin(sync_client):
+    """Valid sign-ins are recorded together; bad ones are reported, not fatal"""
+    client, recorded = sync_client
+    response = client.post('/volunteer/signins/sync', json={'signins': [
+        signin(signed_in_at='2025-03-01T17:30:00+00:00'),
+        signin(key='second-key-0002', client_number='FL-999'),
+        signin(key='already-synced-key', client_number='CLIENT:FL-001'),
+    ]})
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == ['created', 'invalid', 'duplicate']
+    assert results[0]['distribution_id'] == 500
+    assert results[1]['message'] == 'Client number not found or not verified'
+
+    volunteer_id, rows = recorded[0]
+    assert volunteer_id == 7
+    assert [row['sync_key'] for row in rows] == [KEY, 'already-synced-key']
+    assert rows[0]['weight_kg'] == Decimal('2.5')
+    assert rows[0]['distribution_date'].tzinfo is None
+
+def test_key_repeated_in_batch_is_recorded_once(sync_client):
+    """A device that queued the same sign-in twice gets one row"""
+    client, recorded = sync_client
+    results = client.post('/volunteer/signins/sync',
+                          json={'signins': [signin(), signin()]}).get_json()['results']
+    assert [r['status'] for r in results] == ['created', 'duplicate']
+    assert len(recorded[0][1]) == 1
+
+@pytest.mark.parametrize('item, message', [
+    ({'key': 'short', 'client_number': 'FL-001', 'weight_kg': 1}, 'Missing or malformed key'),
+    (signin(weight_kg='-1'), 'Weight must be a positive number'),
+    (signin(weight_kg='heavy'), 'Weight must be a positive number'),
+    (signin(signed_in_at='yesterday'), 'Malformed signed_in_at'),
+    (signin(signed_in_at='2999-01-01T00:00:00'), 'signed_in_at is in the future'),
+    ('FL-001', 'Malformed sign-in'),
+])
+def test_invalid_signins(sync_client, item, message):
+    """Each validation failure comes back with a message for the volunteer"""
+    client, recorded = sync_client
+    result = client.post('/volunteer/signins/sync', json={'signins': [item]}).get_json()['results'][0]
+    assert (result['status'], result['message']) == ('invalid', message)
+
+def test_signed_code_from_an_earlier_verification_is_invalid(sync_client):
+    """A queued scan of a code issued before the client's current verification is not recorded"""
+    client, recorded = sync_client
+    with client.application.app_context():
+        old = sign_client_qr(11, 'FL-001', verification_epoch(datetime(2024, 6, 1)))
+        current = sign_client_qr(11, 'FL-001', verification_epoch(VERIFIED))
+    results = client.post('/volunteer/signins/sync', json={'signins': [
+        signin(client_number=old), signin(key='second-key-0002', client_number=current),
+    ]}).get_json()['results']
+    assert [r['status'] for r in results] == ['invalid', 'created']
+    assert results[0]['message'] == 'QR code is no longer valid; please issue a new one'
+    assert [row['sync_key'] for row in recorded[0][1]] == ['second-key-0002']
+
+@pytest.mark.parametrize('body', [{}, {'signins': []}, {'signins': [signin()] * 4}, [signin()]])
+def test_rejects_bad_batches(sync_client, body):
+    """Empty, oversized or malformed batches are refused outright"""
+    client, recorded = sync_client
+    assert client.post('/volunteer/signins/sync', json=body).status_code == 400
+    assert recorded == []
+
+
+@pytest.fixture
+def volunteer_and_client(mysql_app):
+    """Seeded volunteer id and a verified client id"""
+    with mysql_app.app_context():
+        volunteer_id = query_db("SELECT user_id FROM users WHERE role = 'volunteer' LIMIT 1",
+                                one=True)['user_id']
+        user_id = query_db(
+            '''INSERT INTO users (email, password_hash, full_name, role, is_active)
+               VALUES (CONCAT('sync', UUID_SHORT(), '@example.com'), 'x', 'Sync Client', 'client', 1)''',
+            commit=True)
+        client_id = query_db(
+            '''INSERT INTO clients (user_id, address, family_size, verification_status)
+               VALUES (%s, 'Somewhere', 2, 'verified')''',
+            (user_id,), commit=True)
+    return volunteer_id, client_id
+
+def test_resent_batch_is_recorded_once(mysql_app, volunteer_and_client):
+    """Resending a batch returns the original rows and leaves rollups alone"""
+    volunteer_id, client_id = volunteer_and_client
+    day = datetime(2031, 5, 4, 10, 0)
+    batch = [{'sync_key': f'resend-key-{n}-{client_id}', 'client_id': client_id,
+              'distribution_date': day, 'weight_kg': Decimal('1.5'),
+              'items_description': '', 'notes': ''} for n in range(3)]
+    with mysql_app.app_context():
+        first = volunteer_model.record_synced_distributions(volunteer_id, batch)
+        again = volunteer_model.record_synced_distributions(volunteer_id, batch)
+        rollup = query_db('SELECT * FROM daily_distribution_rollup WHERE day = %s',
+                          (day.date(),), one=True, primary=True)
+    assert all(created for _, created in first.values())
+    assert {key: (distribution_id, False) for key, (distribution_id, _) in first.items()} == again
+    assert rollup['num_distributions'] == 3
+    assert rollup['unique_clients'] == 1